@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import os
-from data_manager import initialize_data
+from data_manager import initialize_data, count_records, get_recent, write_behind_status, flush_writes
 
 # Page configuration
 st.set_page_config(
@@ -63,9 +63,7 @@ if 'initialized' not in st.session_state:
     st.session_state.initialized = False
     
     # Initialize empty values for session state to prevent access errors
-    st.session_state.employees = pd.DataFrame()
-    st.session_state.roles = pd.DataFrame()
-    st.session_state.matches = pd.DataFrame()
+    # (employee, role and match tables are loaded lazily by data_manager)
     st.session_state.skills = set()
     st.session_state.departments = set(['Engineering', 'Human Resources', 'Finance', 
                                      'Operations', 'Research & Development', 
@@ -77,6 +75,20 @@ if not st.session_state.initialized:
     initialize_data()
     st.session_state.initialized = True
 
+# Pending writes when write-behind mode is on
+write_status = write_behind_status()
+if write_status is not None:
+    if write_status['failed']:
+        st.sidebar.error(f"{write_status['failed']} change(s) could not be saved: {write_status['last_error']}")
+    if write_status['pending']:
+        st.sidebar.info(f"Saving {write_status['pending']} change(s)... "
+                        f"(oldest {write_status['oldest_age']:.0f}s ago)")
+        if st.sidebar.button("Save now"):
+            flush_writes(timeout=30)
+            st.rerun()
+    elif not write_status['failed']:
+        st.sidebar.caption("All changes saved")
+
 # Main page content with Chevron branding - official colors
 chevron_blue = "#0050AA"  # Chevron's official blue color (PMS 2935 C)
 chevron_red = "#E21836"   # Chevron's official red color (PMS 186 C)
@@ -139,7 +151,7 @@ st.markdown(f"<h3 style='color: {chevron_blue}; margin-top: 2rem;'>Dashboard Ove
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    employee_count = len(st.session_state.employees)
+    employee_count = count_records('employees')
     st.markdown(f"""
     <div class="dashboard-card" style="background: linear-gradient(135deg, rgba(0, 80, 170, 0.15), rgba(0, 80, 170, 0.05)); 
          border-left: 6px solid {chevron_blue}; box-shadow: 0 4px 12px rgba(0, 80, 170, 0.1); transform: translateY(0); 
@@ -161,7 +173,7 @@ with col1:
     """, unsafe_allow_html=True)
 
 with col2:
-    role_count = len(st.session_state.roles)
+    role_count = count_records('roles')
     st.markdown(f"""
     <div class="dashboard-card" style="background: linear-gradient(135deg, rgba(0, 80, 170, 0.15), rgba(0, 80, 170, 0.05)); 
          border-left: 6px solid {chevron_blue}; box-shadow: 0 4px 12px rgba(0, 80, 170, 0.1); transform: translateY(0); 
@@ -205,8 +217,7 @@ with col3:
     """, unsafe_allow_html=True)
 
 with col4:
-    matches = st.session_state.matches if 'matches' in st.session_state else []
-    match_count = len(matches)
+    match_count = count_records('matches')
     st.markdown(f"""
     <div class="dashboard-card" style="background: linear-gradient(135deg, rgba(226, 24, 54, 0.15), rgba(226, 24, 54, 0.05)); 
          border-left: 6px solid {chevron_red}; box-shadow: 0 4px 12px rgba(226, 24, 54, 0.1); transform: translateY(0); 
@@ -234,11 +245,11 @@ st.markdown(f"<h3 style='color: {chevron_blue}; margin-top: 2rem;'>Recent Activi
 activity_tab1, activity_tab2, activity_tab3 = st.tabs(["Recent Employees", "Recent Roles", "Recent Matches"])
 
 with activity_tab1:
-    if len(st.session_state.employees) > 0:
+    # Only the most recent rows are fetched, not the whole table
+    recent_employees = get_recent('employees')
+    if len(recent_employees) > 0:
         # Check if employees is a DataFrame
-        if isinstance(st.session_state.employees, pd.DataFrame):
-            recent_employees = st.session_state.employees.head(5) if len(st.session_state.employees) > 5 else st.session_state.employees
-            
+        if isinstance(recent_employees, pd.DataFrame):
             # Enhanced dataframe with highlighting and styling using Chevron blue
             st.markdown(f"""
             <div style="background-color: rgba(0, 80, 170, 0.05); padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;">
@@ -267,50 +278,15 @@ with activity_tab1:
                 },
                 hide_index=True
             )
-        elif isinstance(st.session_state.employees, list):
-            # Handle if employees is a list of dictionaries
-            employee_list = st.session_state.employees[:5] if len(st.session_state.employees) > 5 else st.session_state.employees
-            
-            st.markdown(f"""
-            <div style="background-color: rgba(0, 80, 170, 0.05); padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;">
-                <div style="display: flex; justify-content: space-between; align-items: center;">
-                    <h5 style="margin: 0; color: {chevron_blue};">Recently Added/Updated Employees</h5>
-                    <span style="background-color: {chevron_blue}; color: white; padding: 3px 8px; border-radius: 10px; font-size: 0.8rem;">
-                        {len(employee_list)} records
-                    </span>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Convert list to DataFrame for display
-            employees_df = pd.DataFrame(employee_list)
-            if not employees_df.empty:
-                display_cols = ['employee_id', 'name', 'department', 'job_title']
-                # Make sure all columns exist in the dataframe
-                valid_cols = [col for col in display_cols if col in employees_df.columns]
-                
-                st.dataframe(
-                    employees_df[valid_cols] if valid_cols else employees_df,
-                    use_container_width=True,
-                    column_config={
-                        "employee_id": "Employee ID",
-                        "name": "Full Name",
-                        "department": "Department",
-                        "job_title": "Current Position"
-                    },
-                    hide_index=True
-                )
-            else:
-                st.info("Employee data available but format needs conversion.")
     else:
         st.info("No employee records found. Add employees using the Employee Management page.")
 
 with activity_tab2:
-    if len(st.session_state.roles) > 0:
+    # Only the most recent rows are fetched, not the whole table
+    recent_roles = get_recent('roles')
+    if len(recent_roles) > 0:
         # Check if roles is a DataFrame
-        if isinstance(st.session_state.roles, pd.DataFrame):
-            recent_roles = st.session_state.roles.head(5) if len(st.session_state.roles) > 5 else st.session_state.roles
-            
+        if isinstance(recent_roles, pd.DataFrame):
             # Enhanced dataframe with highlighting and styling using Chevron blue
             st.markdown(f"""
             <div style="background-color: rgba(0, 80, 170, 0.05); padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;">
@@ -342,52 +318,13 @@ with activity_tab2:
                 },
                 hide_index=True
             )
-        elif isinstance(st.session_state.roles, list):
-            # Handle if roles is a list of dictionaries
-            role_list = st.session_state.roles[:5] if len(st.session_state.roles) > 5 else st.session_state.roles
-            
-            st.markdown(f"""
-            <div style="background-color: rgba(0, 80, 170, 0.05); padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;">
-                <div style="display: flex; justify-content: space-between; align-items: center;">
-                    <h5 style="margin: 0; color: {chevron_blue};">Recently Added/Updated Roles</h5>
-                    <span style="background-color: {chevron_blue}; color: white; padding: 3px 8px; border-radius: 10px; font-size: 0.8rem;">
-                        {len(role_list)} records
-                    </span>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Convert list to DataFrame for display
-            roles_df = pd.DataFrame(role_list)
-            if not roles_df.empty:
-                display_cols = ['role_id', 'title', 'department', 'required_experience']
-                # Make sure all columns exist in the dataframe
-                valid_cols = [col for col in display_cols if col in roles_df.columns]
-                
-                st.dataframe(
-                    roles_df[valid_cols] if valid_cols else roles_df,
-                    use_container_width=True,
-                    column_config={
-                        "role_id": "Role ID",
-                        "title": "Position Title",
-                        "department": "Department",
-                        "required_experience": st.column_config.NumberColumn(
-                            "Required Experience (Years)",
-                            format="%.1f"
-                        )
-                    },
-                    hide_index=True
-                )
-            else:
-                st.info("Role data available but format needs conversion.")
     else:
         st.info("No role records found. Add roles using the Role Management page.")
 
 with activity_tab3:
-    matches = st.session_state.matches if 'matches' in st.session_state else []
-    if isinstance(matches, pd.DataFrame) and len(matches) > 0:
-        recent_matches = matches.head(5) if len(matches) > 5 else matches
-        
+    # Only the most recent rows are fetched, not the whole table
+    recent_matches = get_recent('matches')
+    if isinstance(recent_matches, pd.DataFrame) and len(recent_matches) > 0:
         # Enhanced dataframe with highlighting and styling using Chevron red
         st.markdown(f"""
         <div style="background-color: rgba(226, 24, 54, 0.05); padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;">
@@ -421,45 +358,6 @@ with activity_tab3:
             },
             hide_index=True
         )
-    elif isinstance(matches, list) and len(matches) > 0:
-        # Handle if matches is a list of dictionaries
-        match_list = matches[:5] if len(matches) > 5 else matches
-        st.markdown(f"""
-        <div style="background-color: rgba(226, 24, 54, 0.05); padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;">
-            <div style="display: flex; justify-content: space-between; align-items: center;">
-                <h5 style="margin: 0; color: {chevron_red};">Recent Employee-Role Matches</h5>
-                <span style="background-color: {chevron_red}; color: white; padding: 3px 8px; border-radius: 10px; font-size: 0.8rem;">
-                    {len(match_list)} records
-                </span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Convert list to DataFrame for display
-        matches_df = pd.DataFrame(match_list)
-        if not matches_df.empty:
-            display_cols = ['match_id', 'employee_id', 'role_id', 'match_score']
-            # Make sure all columns exist in the dataframe
-            valid_cols = [col for col in display_cols if col in matches_df.columns]
-            
-            st.dataframe(
-                matches_df[valid_cols] if valid_cols else matches_df,
-                use_container_width=True,
-                column_config={
-                    "match_id": "Match ID",
-                    "employee_id": "Employee",
-                    "role_id": "Role",
-                    "match_score": st.column_config.ProgressColumn(
-                        "Match Score",
-                        format="%.0f%%",
-                        min_value=0,
-                        max_value=100
-                    ) if 'match_score' in matches_df.columns else None
-                },
-                hide_index=True
-            )
-        else:
-            st.info("Match data available but format needs conversion. Use Skill Matching to generate properly formatted matches.")
     else:
         st.info("No match records found. Create matches using the Skill Matching page.")
 
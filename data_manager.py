@@ -2,26 +2,88 @@ import streamlit as st
 import pandas as pd
 import uuid
 import datetime
+import time
 import os
 import json
-from sqlalchemy import create_engine, Column, String, Integer, Float, Text, DateTime
+import io
+import csv
+import hashlib
+import re
+import logging
+from sqlalchemy import (Column, String, Integer, Float, Text, DateTime, ForeignKey, Index, inspect, func,
+                        and_, or_, select, exists, distinct, type_coerce)
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy.sql import text
+from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.sql import text, bindparam
 import numpy as np
 import psycopg2
+import threading
+from functools import partial
+from sqlalchemy import event
+from database import DATABASE_URL, engine, session_scope
+from table_store import (SharedTable, StringListArray, full_bitmap, bitmap_from_mask, compact_frame, plain_frame,
+                         frame_memory, interner)
+from write_queue import WRITE_QUEUE_DIR, WriteQueue
+from nlp_pipeline import run_enrichment
+from matching_algorithm import (compute_soft_skills_features, soft_skills_score_from_features,
+                                add_review_to_features)
 
-# Get the database connection string from environment variables
-DATABASE_URL = os.environ.get('DATABASE_URL')
-if not DATABASE_URL:
-    # Provide a default SQLite connection for local development
-    DATABASE_URL = "sqlite:///chevron_skills.db"
-
-# Create database engine and session
-engine = create_engine(DATABASE_URL)
 Base = declarative_base()
-Session = sessionmaker(bind=engine)
+
+class JSONList(TypeDecorator):
+    """
+    List column: JSONB on PostgreSQL, JSON text elsewhere (read by SQLite's JSON1 functions)
+    
+    Values are Python lists on every dialect; already encoded JSON strings
+    are accepted when writing as well.
+    """
+    
+    impl = Text
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(Text())
+    
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            value = json.loads(value) if value.strip() else None
+        if value is None:
+            return None
+        value = list(value)
+        # psycopg2 serializes JSONB parameters itself
+        return value if dialect.name == 'postgresql' else json.dumps(value)
+    
+    def process_result_value(self, value, dialect):
+        if isinstance(value, str) and dialect.name != 'postgresql':
+            return json.loads(value) if value else None
+        return value
+
+def gin_index(table_name, column):
+    """GIN index over a JSONList column, for containment queries (only created on PostgreSQL)"""
+    return Index(f'ix_{table_name}_{column}_gin', column, postgresql_using='gin').ddl_if(dialect='postgresql')
+
+def list_contains(column, values, match_all=True):
+    """
+    Filter for rows whose JSONList column contains all (or with match_all=False, any) of values
+    
+    PostgreSQL answers it from the GIN index with @> (all) or ?| (any); other
+    databases expand the JSON text with json_each.
+    """
+    values = list(dict.fromkeys(values))
+    if engine.dialect.name == 'postgresql':
+        document = type_coerce(column, JSONB)
+        return document.contains(values) if match_all else document.has_any(array(values))
+    
+    items = func.json_each(column).table_valued('value')
+    if match_all:
+        return select(func.count(distinct(items.c.value))).where(
+            items.c.value.in_(values)
+        ).scalar_subquery() == len(values)
+    return exists().where(items.c.value.in_(values))
 
 # Define database models
 class Employee(Base):
@@ -32,14 +94,22 @@ class Employee(Base):
     department = Column(String)
     job_title = Column(String)
     joining_date = Column(DateTime)
-    skills = Column(Text)  # Store as JSON string
-    certifications = Column(Text)  # Store as JSON string
+    skills = Column(JSONList)
+    certifications = Column(JSONList)
     experience = Column(Float)
     education = Column(String)
-    projects = Column(Text)  # Store as JSON string
-    performance_scores = Column(Text)  # Store as JSON string
+    projects = Column(JSONList)
+    performance_scores = Column(JSONList)
     peer_reviews = Column(Text)
-    last_updated = Column(DateTime)
+    # Running soft skills aggregate over the individual peer reviews
+    review_count = Column(Integer)
+    review_sentiment_sum = Column(Float)
+    review_sentiment = Column(Float)  # Mean compound score
+    review_soft_skills = Column(JSONList)  # Union over reviews
+    soft_skills_score = Column(Float)
+    last_updated = Column(DateTime, index=True)
+    
+    __table_args__ = (gin_index('employees', 'skills'), gin_index('employees', 'certifications'))
 
 class Role(Base):
     __tablename__ = 'roles'
@@ -48,28 +118,42 @@ class Role(Base):
     title = Column(String)
     department = Column(String)
     description = Column(Text)
-    required_skills = Column(Text)  # Store as JSON string
-    preferred_skills = Column(Text)  # Store as JSON string
-    required_certifications = Column(Text)  # Store as JSON string
+    required_skills = Column(JSONList)
+    preferred_skills = Column(JSONList)
+    required_certifications = Column(JSONList)
     required_experience = Column(Float)
     required_education = Column(String)
-    responsibilities = Column(Text)  # Store as JSON string
-    last_updated = Column(DateTime)
+    responsibilities = Column(JSONList)
+    last_updated = Column(DateTime, index=True)
+    
+    __table_args__ = (gin_index('roles', 'required_skills'), gin_index('roles', 'preferred_skills'),
+                      gin_index('roles', 'required_certifications'))
 
 class Match(Base):
     __tablename__ = 'matches'
     
     match_id = Column(String, primary_key=True)
-    employee_id = Column(String)
-    role_id = Column(String)
+    employee_id = Column(String, index=True)
+    role_id = Column(String, index=True)
     match_score = Column(Float)
     skill_match_score = Column(Float)
     experience_match_score = Column(Float)
     certification_match_score = Column(Float)
     education_match_score = Column(Float)
     soft_skills_score = Column(Float)
-    match_date = Column(DateTime)
+    match_date = Column(DateTime, index=True)
     notes = Column(Text)
+    run_id = Column(String, index=True)  # Matching run that saved the row (None for manual matches)
+
+class PeerReview(Base):
+    __tablename__ = 'peer_reviews'
+    
+    review_id = Column(String, primary_key=True)
+    employee_id = Column(String, index=True)
+    review_text = Column(Text)
+    sentiment = Column(Float)
+    soft_skills = Column(JSONList)
+    created_at = Column(DateTime)
 
 class Skill(Base):
     __tablename__ = 'skills'
@@ -89,21 +173,538 @@ class Certification(Base):
     certification_id = Column(Integer, primary_key=True)
     certification_name = Column(String, unique=True)
 
-def initialize_data():
-    """Initialize database tables and load initial data into session state"""
+# Normalized association tables mirroring the JSON list columns. The composite
+# primary key serves lookups by owner; the reversed index serves "who has X".
+class EmployeeSkill(Base):
+    __tablename__ = 'employee_skill'
+    
+    employee_id = Column(String, ForeignKey('employees.employee_id', ondelete='CASCADE'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skills.skill_id'), primary_key=True)
+    
+    __table_args__ = (Index('ix_employee_skill_skill_employee', 'skill_id', 'employee_id'),)
+
+class EmployeeCertification(Base):
+    __tablename__ = 'employee_certification'
+    
+    employee_id = Column(String, ForeignKey('employees.employee_id', ondelete='CASCADE'), primary_key=True)
+    certification_id = Column(Integer, ForeignKey('certifications.certification_id'), primary_key=True)
+    
+    __table_args__ = (Index('ix_employee_certification_certification_employee', 'certification_id', 'employee_id'),)
+
+class RoleRequiredSkill(Base):
+    __tablename__ = 'role_required_skill'
+    
+    role_id = Column(String, ForeignKey('roles.role_id', ondelete='CASCADE'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skills.skill_id'), primary_key=True)
+    
+    __table_args__ = (Index('ix_role_required_skill_skill_role', 'skill_id', 'role_id'),)
+
+class RolePreferredSkill(Base):
+    __tablename__ = 'role_preferred_skill'
+    
+    role_id = Column(String, ForeignKey('roles.role_id', ondelete='CASCADE'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skills.skill_id'), primary_key=True)
+    
+    __table_args__ = (Index('ix_role_preferred_skill_skill_role', 'skill_id', 'role_id'),)
+
+class RoleCertification(Base):
+    __tablename__ = 'role_certification'
+    
+    role_id = Column(String, ForeignKey('roles.role_id', ondelete='CASCADE'), primary_key=True)
+    certification_id = Column(Integer, ForeignKey('certifications.certification_id'), primary_key=True)
+    
+    __table_args__ = (Index('ix_role_certification_certification_role', 'certification_id', 'role_id'),)
+
+# Tombstones for deleted employees and roles, so other processes can drop them
+# from their in-memory tables during delta sync (see read_changes)
+class DeletedRecord(Base):
+    __tablename__ = 'deleted_records'
+    
+    tombstone_id = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String, nullable=False)
+    record_id = Column(String, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, index=True)
+
+# Daily and monthly match score statistics kept after raw matches expire
+# (see compact_matches), per role, per role department and overall
+class MatchRollup(Base):
+    __tablename__ = 'match_rollups'
+    
+    period = Column(String, primary_key=True)  # 'day' or 'month'
+    period_start = Column(DateTime, primary_key=True)
+    scope = Column(String, primary_key=True)  # 'all', 'role' or 'department'
+    scope_id = Column(String, primary_key=True)  # Role ID or department name ('' for 'all')
+    match_count = Column(Integer)
+    score_sum = Column(Float)
+    score_min = Column(Float)
+    score_max = Column(Float)
+    p25 = Column(Float)
+    p50 = Column(Float)
+    p75 = Column(Float)
+    p90 = Column(Float)
+    quantiles = Column(JSONList)  # Scores at evenly spaced quantiles, for merging
+
+class Vocabulary:
+    """
+    Get-or-create service for a name lookup table (skills, certifications, departments)
+    
+    Known names and their IDs are cached in memory and shared by every write
+    path in the process. Unknown names are resolved with one IN (...) query
+    and the ones still missing are inserted with a single statement.
+    """
+    
+    def __init__(self, model, id_column, name_column):
+        self.model = model
+        self.id_column = getattr(model, id_column)
+        self.name_column = getattr(model, name_column)
+        self._ids = {}
+        self._lock = threading.Lock()
+    
+    def _lookup(self, db_session, names):
+        """Fetch IDs for names from the database"""
+        found = {}
+        for start in range(0, len(names), PREFETCH_BATCH_SIZE):
+            batch = names[start:start + PREFETCH_BATCH_SIZE]
+            found.update(db_session.query(self.name_column, self.id_column).filter(self.name_column.in_(batch)))
+        return found
+    
+    def _cache(self, ids):
+        with self._lock:
+            self._ids.update(ids)
+    
+    def resolve(self, names, db_session=None):
+        """
+        Return a name -> ID mapping for names, creating any that don't exist yet
+        
+        The lookup and inserts run in db_session if given, otherwise in the
+        current thread's session scope. Newly inserted IDs are only cached once
+        the enclosing transaction commits.
+        """
+        names = list(dict.fromkeys(name.strip() for name in names if isinstance(name, str) and name.strip()))
+        missing = [name for name in names if name not in self._ids]
+        
+        if not missing:
+            return {name: self._ids[name] for name in names}
+        
+        if db_session is None:
+            with session_scope() as scoped:
+                return self.resolve(names, scoped)
+        
+        found = self._lookup(db_session, missing)
+        to_insert = [name for name in missing if name not in found]
+        
+        if to_insert:
+            name_key = self.name_column.key
+            dialect_insert = _dialect_insert()
+            if dialect_insert is None:
+                db_session.add_all([self.model(**{name_key: name}) for name in to_insert])
+                db_session.flush()
+            else:
+                stmt = dialect_insert(self.model.__table__).on_conflict_do_nothing(index_elements=[name_key])
+                db_session.execute(stmt, [{name_key: name} for name in to_insert])
+            inserted = self._lookup(db_session, to_insert)
+            found.update(inserted)
+            event.listen(db_session, 'after_commit', lambda _: self._cache(inserted), once=True)
+        
+        # Names that already existed in the database are safe to cache right away
+        self._cache({name: found[name] for name in missing if name not in to_insert})
+        
+        return {name: found.get(name, self._ids.get(name)) for name in names}
+    
+    def find(self, names, db_session=None):
+        """Return a name -> ID mapping for the names that already exist, without creating any"""
+        names = list(dict.fromkeys(name.strip() for name in names if isinstance(name, str) and name.strip()))
+        found = {name: self._ids[name] for name in names if name in self._ids}
+        missing = [name for name in names if name not in found]
+        
+        if missing and db_session is not None:
+            found.update(self._lookup(db_session, missing))
+        elif missing:
+            with session_scope() as scoped:
+                found.update(self._lookup(scoped, missing))
+        
+        return found
+    
+    def load(self):
+        """Reload the whole table into the cache and return the set of names"""
+        with session_scope() as db_session:
+            ids = dict(db_session.query(self.name_column, self.id_column))
+        with self._lock:
+            self._ids = ids
+        return set(ids)
+    
+    def clear(self):
+        """Forget all cached names"""
+        with self._lock:
+            self._ids = {}
+
+skill_vocabulary = Vocabulary(Skill, 'skill_id', 'skill_name')
+certification_vocabulary = Vocabulary(Certification, 'certification_id', 'certification_name')
+department_vocabulary = Vocabulary(Department, 'department_id', 'department_name')
+
+# Association table, vocabulary resolving its names and the list column it mirrors
+EMPLOYEE_ASSOCIATIONS = [
+    (EmployeeSkill, skill_vocabulary, 'skills'),
+    (EmployeeCertification, certification_vocabulary, 'certifications')
+]
+ROLE_ASSOCIATIONS = [
+    (RoleRequiredSkill, skill_vocabulary, 'required_skills'),
+    (RolePreferredSkill, skill_vocabulary, 'preferred_skills'),
+    (RoleCertification, certification_vocabulary, 'required_certifications')
+]
+
+def migrate_schema():
+    """Add columns and indexes introduced after a table was first created and backfill derived data"""
+    inspector = inspect(engine)
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                elif isinstance(column.type, JSONList):
+                    migrate_list_column(conn, table.name, column.name, existing_columns[column.name])
+            
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+    
+    backfill_review_features()
+    backfill_associations()
+    
+    if create_search_index():
+        backfill_search_index()
+
+def migrate_list_column(conn, table_name, column_name, existing_type):
+    """Convert a list column created as JSON text to JSONB on PostgreSQL (other databases keep the text)"""
+    if engine.dialect.name != 'postgresql' or isinstance(existing_type, JSONB):
+        return
+    conn.execute(text(
+        f"ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE jsonb "
+        f"USING NULLIF(BTRIM({column_name}), '')::jsonb"
+    ))
+
+def backfill_review_features():
+    """Compute stored soft skills features for employees that have reviews but no features yet"""
+    with session_scope() as db_session:
+        pending = db_session.query(Employee.employee_id, Employee.peer_reviews).filter(
+            Employee.peer_reviews.isnot(None),
+            Employee.peer_reviews != '',
+            Employee.review_count.is_(None)
+        ).all()
+    
+    if not pending:
+        return 0
+    
+    def write_features(results):
+        rows = []
+        reviews = []
+        for employee_id, item in results:
+            compound = item['sentiment']['compound']
+            features = {
+                'review_count': 1,
+                'review_sentiment_sum': compound,
+                'review_sentiment': compound,
+                'review_soft_skills': item['soft_skills'],
+                'soft_skills_score': soft_skills_score_from_features(compound, len(item['soft_skills']))
+            }
+            rows.append({'employee_id': employee_id, **review_feature_columns(features)})
+            reviews.append(peer_review_row(employee_id, item['text'], features))
+        
+        # The existing review text becomes the employee's first review entry
+        with session_scope() as db_session:
+            db_session.query(PeerReview).filter(
+                PeerReview.employee_id.in_([row['employee_id'] for row in rows])
+            ).delete(synchronize_session=False)
+            db_session.bulk_insert_mappings(PeerReview, reviews)
+            db_session.bulk_update_mappings(Employee, rows)
+    
+    return run_enrichment(pending, total=len(pending), writer=write_features)
+
+def backfill_associations():
+    """One-time copy of the JSON list columns into association tables that are still empty"""
+    for owner_model, key, associations in ((Employee, 'employee_id', EMPLOYEE_ASSOCIATIONS),
+                                           (Role, 'role_id', ROLE_ASSOCIATIONS)):
+        for model, vocabulary, column in associations:
+            with session_scope() as db_session:
+                if db_session.query(model).first() is not None:
+                    continue
+                
+                source = getattr(owner_model, column)
+                rows = db_session.query(getattr(owner_model, key), source).filter(source.isnot(None)).all()
+                names_by_owner = {owner_id: names for owner_id, names in rows if names}
+                if names_by_owner:
+                    replace_associations(db_session, model, vocabulary, names_by_owner)
+
+def replace_associations(db_session, model, vocabulary, names_by_owner):
+    """Replace the association rows of each owner ID with the IDs of the given names"""
+    owner_column, item_column = model.__table__.primary_key.columns
+    owner_ids = list(names_by_owner)
+    ids = vocabulary.resolve({name for names in names_by_owner.values() for name in names}, db_session)
+    
+    for start in range(0, len(owner_ids), PREFETCH_BATCH_SIZE):
+        db_session.query(model).filter(
+            owner_column.in_(owner_ids[start:start + PREFETCH_BATCH_SIZE])
+        ).delete(synchronize_session=False)
+    
+    rows = [
+        {owner_column.name: owner_id, item_column.name: ids[name]}
+        for owner_id, names in names_by_owner.items()
+        for name in dict.fromkeys(name.strip() for name in names if isinstance(name, str) and name.strip())
+    ]
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        db_session.execute(model.__table__.insert(), rows[start:start + UPSERT_BATCH_SIZE])
+
+def sync_associations(db_session, associations, key, records):
+    """Mirror the list columns present in records into their association tables"""
+    # Owner rows must exist before association rows reference them
+    db_session.flush()
+    for model, vocabulary, column in associations:
+        names_by_owner = {record[key]: _as_list(record[column]) for record in records if column in record}
+        if names_by_owner:
+            replace_associations(db_session, model, vocabulary, names_by_owner)
+
+def review_feature_columns(features):
+    """Map soft skills features to Employee column values"""
+    return {
+        'review_count': int(features['review_count']),
+        'review_sentiment_sum': float(features['review_sentiment_sum']),
+        'review_sentiment': float(features['review_sentiment']),
+        'review_soft_skills': list(features['review_soft_skills']),
+        'soft_skills_score': float(features['soft_skills_score'])
+    }
+
+def stored_review_features(employee):
+    """Read the soft skills aggregate back from an Employee record"""
+    return {
+        'review_count': employee.review_count or 0,
+        'review_sentiment_sum': employee.review_sentiment_sum or 0.0,
+        'review_sentiment': employee.review_sentiment,
+        'review_soft_skills': employee.review_soft_skills or [],
+        'soft_skills_score': employee.soft_skills_score
+    }
+
+def peer_review_row(employee_id, review_text, features):
+    """Build a PeerReview row for a single analyzed review"""
+    return {
+        'review_id': str(uuid.uuid4()),
+        'employee_id': employee_id,
+        'review_text': review_text,
+        'sentiment': features['review_sentiment'],
+        'soft_skills': list(features['review_soft_skills']),
+        'created_at': datetime.datetime.now()
+    }
+
+def replace_peer_reviews(db_session, employee_id, peer_reviews, features):
+    """Reset an employee's review entries to a single entry holding the full review text"""
+    db_session.query(PeerReview).filter_by(employee_id=employee_id).delete(synchronize_session=False)
+    if features['review_count']:
+        db_session.add(PeerReview(**peer_review_row(employee_id, peer_reviews, features)))
+
+# Full-text search over peer reviews and role descriptions/responsibilities.
+# Documents live in a plain table written by the data_manager write paths;
+# SQLite indexes it with an external-content FTS5 table kept in step by
+# triggers, PostgreSQL with a generated tsvector column and a GIN index
+SEARCH_TABLE = 'search_documents'
+SEARCH_SCOPES = ('reviews', 'roles')  # Employee peer reviews, role texts
+SEARCH_LANGUAGE = os.environ.get('SEARCH_LANGUAGE', 'english')  # PostgreSQL text search configuration
+SEARCH_LIMIT = 50
+
+def search_supported():
+    """Return True if the database has a full-text index (SQLite FTS5 or PostgreSQL)"""
+    return engine.dialect.name in ('sqlite', 'postgresql')
+
+def create_search_index():
+    """Create the full-text index if it does not exist yet; returns True if it was created"""
+    if not search_supported() or inspect(engine).has_table(SEARCH_TABLE):
+        return False
+    
+    with engine.begin() as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.execute(text(
+                f"CREATE TABLE {SEARCH_TABLE} (id INTEGER PRIMARY KEY, scope TEXT NOT NULL, "
+                f"record_id TEXT NOT NULL, body TEXT NOT NULL, UNIQUE (scope, record_id))"
+            ))
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE}_fts USING fts5(body, content='{SEARCH_TABLE}', "
+                f"content_rowid='id', tokenize='porter unicode61')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER {SEARCH_TABLE}_ai AFTER INSERT ON {SEARCH_TABLE} BEGIN "
+                f"INSERT INTO {SEARCH_TABLE}_fts (rowid, body) VALUES (new.id, new.body); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER {SEARCH_TABLE}_ad AFTER DELETE ON {SEARCH_TABLE} BEGIN "
+                f"INSERT INTO {SEARCH_TABLE}_fts ({SEARCH_TABLE}_fts, rowid, body) "
+                f"VALUES ('delete', old.id, old.body); END"
+            ))
+        else:
+            # DDL takes no bind parameters: only a configuration found in the catalog is spliced in
+            language = _search_language(conn)
+            conn.execute(text(
+                f"CREATE TABLE {SEARCH_TABLE} (scope TEXT NOT NULL, record_id TEXT NOT NULL, "
+                f"body TEXT NOT NULL, body_tsv tsvector GENERATED ALWAYS AS "
+                f"(to_tsvector('{language}'::regconfig, body)) STORED, PRIMARY KEY (scope, record_id))"
+            ))
+            conn.execute(text(f"CREATE INDEX ix_{SEARCH_TABLE}_body_tsv ON {SEARCH_TABLE} USING GIN (body_tsv)"))
+    return True
+
+def _search_language(conn):
+    """Return SEARCH_LANGUAGE if it names a PostgreSQL text search configuration (raises ValueError otherwise)"""
+    language = conn.execute(
+        text("SELECT cfgname FROM pg_ts_config WHERE cfgname = :language"), {'language': SEARCH_LANGUAGE}
+    ).scalar()
+    if language is None:
+        raise ValueError(f"Unknown text search configuration: {SEARCH_LANGUAGE!r}")
+    return language
+
+def role_search_text(description, responsibilities):
+    """Text of a role as indexed for search: its description and responsibilities"""
+    return '\n'.join([description or ''] + [str(item) for item in responsibilities or []]).strip()
+
+def index_documents(db_session, scope, documents):
+    """
+    Replace the indexed text of some records in the current transaction
+    
+    Parameters:
+    - db_session: Session whose transaction the statements run in (not committed here)
+    - scope: One of SEARCH_SCOPES
+    - documents: Dictionary mapping record IDs to their text (None or empty removes the record)
+    """
+    if not documents or not search_supported():
+        return
+    
+    record_ids = [str(record_id) for record_id in documents]
+    delete = text(f"DELETE FROM {SEARCH_TABLE} WHERE scope = :scope AND record_id IN :record_ids").bindparams(
+        bindparam('record_ids', expanding=True)
+    )
+    for start in range(0, len(record_ids), PREFETCH_BATCH_SIZE):
+        db_session.execute(delete, {'scope': scope, 'record_ids': record_ids[start:start + PREFETCH_BATCH_SIZE]})
+    
+    rows = [{'scope': scope, 'record_id': str(record_id), 'body': body}
+            for record_id, body in documents.items() if body and body.strip()]
+    insert = text(f"INSERT INTO {SEARCH_TABLE} (scope, record_id, body) VALUES (:scope, :record_id, :body)")
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        db_session.execute(insert, rows[start:start + UPSERT_BATCH_SIZE])
+
+def backfill_search_index():
+    """Index the peer reviews and role texts already stored (run once, when the index is created)"""
+    with session_scope() as db_session:
+        index_documents(db_session, 'reviews', dict(db_session.query(Employee.employee_id, Employee.peer_reviews).filter(
+            Employee.peer_reviews.isnot(None), Employee.peer_reviews != ''
+        )))
+        index_documents(db_session, 'roles', {
+            role_id: role_search_text(description, responsibilities or [])
+            for role_id, description, responsibilities in db_session.query(
+                Role.role_id, Role.description, Role.responsibilities
+            )
+        })
+
+def _search_query(query):
+    """Translate AND/OR/NOT search syntax for the database's full-text query parser"""
+    if engine.dialect.name == 'postgresql':
+        # websearch_to_tsquery ANDs terms by default and spells NOT as a leading '-'
+        return re.sub(r'\bNOT\s+', '-', re.sub(r'\bAND\b', ' ', query))
+    return query
+
+def search(query, scope='reviews', limit=SEARCH_LIMIT):
+    """
+    Full-text search over employee peer reviews or role descriptions and responsibilities
+    
+    Parameters:
+    - query: Search terms; supports AND, OR, NOT and "quoted phrases" (e.g. "mentoring AND offshore")
+    - scope: 'reviews' (returns employee IDs) or 'roles' (returns role IDs)
+    - limit: Maximum number of IDs returned
+    
+    Returns:
+    - List of matching record IDs, best match first
+    """
     try:
+        if scope not in SEARCH_SCOPES:
+            raise ValueError(f"Unknown search scope: {scope}")
+        if not query or not query.strip():
+            return []
+        if not search_supported():
+            raise ValueError(f"Full-text search is not available on {engine.dialect.name}")
+        
+        params = {'query': _search_query(query), 'scope': scope, 'limit': limit}
+        if engine.dialect.name == 'sqlite':
+            statement = text(
+                f"SELECT d.record_id FROM {SEARCH_TABLE}_fts f JOIN {SEARCH_TABLE} d ON d.id = f.rowid "
+                f"WHERE {SEARCH_TABLE}_fts MATCH :query AND d.scope = :scope ORDER BY f.rank LIMIT :limit"
+            )
+        else:
+            params['language'] = SEARCH_LANGUAGE
+            statement = text(
+                f"SELECT record_id FROM {SEARCH_TABLE}, "
+                f"websearch_to_tsquery(CAST(:language AS regconfig), :query) q "
+                f"WHERE scope = :scope AND body_tsv @@ q ORDER BY ts_rank_cd(body_tsv, q) DESC LIMIT :limit"
+            )
+        
+        def run():
+            with session_scope() as db_session:
+                return [record_id for (record_id,) in db_session.execute(statement, params)]
+        
+        try:
+            return run()
+        except OperationalError:
+            # Not valid FTS5 syntax (e.g. stray punctuation): search for all the words instead
+            words = re.findall(r'\w+', query)
+            if not words:
+                return []
+            params['query'] = ' '.join(f'"{word}"' for word in words)
+            return run()
+    
+    except Exception as e:
+        st.error(f"Error searching: {e}")
+        return []
+
+# Schema setup runs once per process; tombstone pruning and match compaction
+# run on a background timer rather than on every session start
+MAINTENANCE_INTERVAL = float(os.environ.get('MAINTENANCE_INTERVAL', 3600))  # Seconds between maintenance runs
+_database_ready = False
+_database_lock = threading.Lock()
+
+def prepare_database():
+    """Create, migrate and backfill the schema and start the maintenance timer (once per process)"""
+    global _database_ready
+    if _database_ready:
+        return
+    with _database_lock:
+        if _database_ready:
+            return
         # Create tables if they don't exist
         Base.metadata.create_all(engine, checkfirst=True)
+        migrate_schema()
+        threading.Thread(target=_maintenance_loop, name='maintenance', daemon=True).start()
+        _database_ready = True
+
+def run_maintenance():
+    """Prune expired tombstones and compact expired matches into rollups"""
+    prune_tombstones()
+    compact_matches()
+
+def _maintenance_loop():
+    """Maintenance timer: run_maintenance right away, then every MAINTENANCE_INTERVAL seconds"""
+    while True:
+        try:
+            run_maintenance()
+        except Exception as e:
+            # Never let the timer die; the next run tries again
+            logging.getLogger(__name__).warning("Database maintenance failed: %s", e)
+        time.sleep(MAINTENANCE_INTERVAL)
+
+def initialize_data():
+    """Initialize database tables and load initial data into session state"""
+    try:
+        prepare_database()
         
-        # Initialize empty DataFrames and sets in session state if they don't exist
-        if 'employees' not in st.session_state:
-            st.session_state.employees = pd.DataFrame()
-        
-        if 'roles' not in st.session_state:
-            st.session_state.roles = pd.DataFrame()
-        
-        if 'matches' not in st.session_state:
-            st.session_state.matches = pd.DataFrame()
+        # Employee, role and match tables are shared snapshots loaded on first use (see get_table)
         
         if 'skills' not in st.session_state:
             st.session_state.skills = set()
@@ -114,19 +715,6 @@ def initialize_data():
         if 'certifications' not in st.session_state:
             st.session_state.certifications = set()
         
-        # Load data from database into session state for convenience
-        employees_df = get_all_employees()
-        if not employees_df.empty:
-            st.session_state.employees = employees_df
-        
-        roles_df = get_all_roles()
-        if not roles_df.empty:
-            st.session_state.roles = roles_df
-        
-        matches_df = get_all_matches()
-        if not matches_df.empty:
-            st.session_state.matches = matches_df
-        
         # Load master data lists
         skills = get_all_skills()
         if skills:
@@ -138,8 +726,7 @@ def initialize_data():
             default_departments = ['Engineering', 'Human Resources', 'Finance', 
                                   'Operations', 'Research & Development', 
                                   'Information Technology', 'Marketing', 'Legal']
-            for dept in default_departments:
-                add_department(dept)
+            department_vocabulary.resolve(default_departments)
             st.session_state.departments.update(default_departments)
         else:
             st.session_state.departments.update(departments)
@@ -151,12 +738,6 @@ def initialize_data():
     except Exception as e:
         st.error(f"Error initializing data: {e}")
         # Ensure we at least have empty session state variables
-        if 'employees' not in st.session_state:
-            st.session_state.employees = pd.DataFrame()
-        if 'roles' not in st.session_state:
-            st.session_state.roles = pd.DataFrame()
-        if 'matches' not in st.session_state:
-            st.session_state.matches = pd.DataFrame()
         if 'skills' not in st.session_state:
             st.session_state.skills = set()
         if 'departments' not in st.session_state:
@@ -174,67 +755,84 @@ def add_employee(employee_data):
     employee_data['last_updated'] = datetime.datetime.now()
     
     try:
-        # Process skills
-        if 'skills' in employee_data and employee_data['skills']:
-            skills_list = [skill.strip() for skill in employee_data['skills']]
-            st.session_state.skills.update(skills_list)
-            employee_data['skills'] = skills_list
-            
-            # Add skills to the skills table
-            for skill in skills_list:
-                add_skill(skill)
-            
-            skills_json = json.dumps(skills_list)
-        else:
-            skills_json = '[]'
-        
-        # Process certifications
-        if 'certifications' in employee_data and employee_data['certifications']:
-            cert_list = [cert.strip() for cert in employee_data['certifications']]
-            st.session_state.certifications.update(cert_list)
-            employee_data['certifications'] = cert_list
-            
-            # Add certifications to the certifications table
-            for cert in cert_list:
-                add_certification(cert)
-                
-            certs_json = json.dumps(cert_list)
-        else:
-            certs_json = '[]'
-        
-        # Process projects
-        if 'projects' in employee_data and employee_data['projects']:
-            if isinstance(employee_data['projects'], list):
-                projects_list = employee_data['projects']
-            else:
-                projects_list = [p.strip() for p in employee_data['projects'].split(',') if p.strip()]
-            projects_json = json.dumps(projects_list)
+        if write_queue is not None:
+            return queue_write('employees', 'add', employee_data['employee_id'], employee_data)
+        return _add_employee(employee_data)
+    
+    except Exception as e:
+        st.error(f"Error adding employee: {e}")
+        return None
+
+def _add_employee(employee_data):
+    """Write an employee to the database and patch the shared snapshot (raises on failure)"""
+    # Process skills
+    if 'skills' in employee_data and employee_data['skills']:
+        skills_list = [skill.strip() for skill in employee_data['skills']]
+        _session_names('skills').update(skills_list)
+        employee_data['skills'] = skills_list
+        
+        # Add skills to the skills table
+        skill_vocabulary.resolve(skills_list)
+    else:
+        skills_list = []
+    
+    # Process certifications
+    if 'certifications' in employee_data and employee_data['certifications']:
+        cert_list = [cert.strip() for cert in employee_data['certifications']]
+        _session_names('certifications').update(cert_list)
+        employee_data['certifications'] = cert_list
+        
+        # Add certifications to the certifications table
+        certification_vocabulary.resolve(cert_list)
+    else:
+        cert_list = []
+    
+    # Process projects
+    if 'projects' in employee_data and employee_data['projects']:
+        if isinstance(employee_data['projects'], list):
+            projects_list = employee_data['projects']
         else:
-            projects_json = '[]'
-        
-        # Process department
-        if 'department' in employee_data and employee_data['department']:
-            st.session_state.departments.add(employee_data['department'])
-            add_department(employee_data['department'])
-        
-        # Add to database
-        db_session = Session()
-        
+            projects_list = [p.strip() for p in employee_data['projects'].split(',') if p.strip()]
+    else:
+        projects_list = []
+    
+    # Process department
+    if 'department' in employee_data and employee_data['department']:
+        _session_names('departments').add(employee_data['department'])
+        department_vocabulary.resolve([employee_data['department']])
+    
+    # Add to database
+    with session_scope() as db_session:
         # Check if employee already exists
         existing = db_session.query(Employee).filter_by(employee_id=employee_data['employee_id']).first()
         
+        # Derive soft skills features from the review text unless it is unchanged
+        peer_reviews = employee_data.get('peer_reviews', '')
+        reviews_changed = not (existing and existing.peer_reviews == peer_reviews
+                               and existing.review_count is not None)
+        if reviews_changed:
+            features = compute_soft_skills_features(peer_reviews)
+            replace_peer_reviews(db_session, employee_data['employee_id'], peer_reviews, features)
+            index_documents(db_session, 'reviews', {employee_data['employee_id']: peer_reviews})
+        else:
+            features = stored_review_features(existing)
+        # A merged copy, so the caller's dict doesn't gain the derived columns
+        employee_data = {**employee_data, **features}
+        
         if existing:
             # Update existing record
             existing.name = employee_data.get('name', '')
             existing.department = employee_data.get('department', '')
             existing.job_title = employee_data.get('job_title', '')
             existing.joining_date = employee_data.get('joining_date', datetime.datetime.now())
-            existing.skills = skills_json
-            existing.certifications = certs_json
+            existing.skills = skills_list
+            existing.certifications = cert_list
             existing.experience = float(employee_data.get('experience', 0))
             existing.education = employee_data.get('education', '')
-            existing.projects = projects_json
-            existing.peer_reviews = employee_data.get('peer_reviews', '')
+            existing.projects = projects_list
+            existing.peer_reviews = peer_reviews
+            for column, value in review_feature_columns(features).items():
+                setattr(existing, column, value)
             existing.last_updated = datetime.datetime.now()
         else:
             # Create new record
@@ -244,91 +842,101 @@ def add_employee(employee_data):
                 department=employee_data.get('department', ''),
                 job_title=employee_data.get('job_title', ''),
                 joining_date=employee_data.get('joining_date', datetime.datetime.now()),
-                skills=skills_json,
-                certifications=certs_json,
+                skills=skills_list,
+                certifications=cert_list,
                 experience=float(employee_data.get('experience', 0)),
                 education=employee_data.get('education', ''),
-                projects=projects_json,
-                peer_reviews=employee_data.get('peer_reviews', ''),
+                projects=projects_list,
+                peer_reviews=peer_reviews,
+                **review_feature_columns(features),
                 last_updated=datetime.datetime.now()
             )
             db_session.add(employee)
         
-        db_session.commit()
-        
-        # Update session state
-        new_employee_df = pd.DataFrame([employee_data])
-        st.session_state.employees = pd.concat([st.session_state.employees, new_employee_df], ignore_index=True)
-        
-        db_session.close()
-        
-        return employee_data['employee_id']
+        # Keep the skill and certification association tables in sync
+        sync_associations(db_session, EMPLOYEE_ASSOCIATIONS, 'employee_id', [{
+            'employee_id': employee_data['employee_id'],
+            'skills': employee_data.get('skills') or [],
+            'certifications': employee_data.get('certifications') or []
+        }])
     
-    except Exception as e:
-        st.error(f"Error adding employee: {e}")
-        return None
+    # Patch the new row into the shared snapshot
+    sync_rows('employees', [employee_data['employee_id']])
+    
+    return employee_data['employee_id']
 
 def update_employee(employee_id, updated_data):
     """Update an existing employee's information"""
     try:
-        # Find the employee in session state
-        employee_idx = st.session_state.employees.index[st.session_state.employees['employee_id'] == employee_id].tolist()
-        
-        if not employee_idx:
+        # Make sure the employee exists
+        if not record_exists('employees', employee_id):
             return False
         
         # Update timestamp
         updated_data['last_updated'] = datetime.datetime.now()
         
-        # Process skills
-        if 'skills' in updated_data and updated_data['skills']:
-            skills_list = [skill.strip() for skill in updated_data['skills']]
-            st.session_state.skills.update(skills_list)
-            updated_data['skills'] = skills_list
-            
-            # Add skills to the skills table
-            for skill in skills_list:
-                add_skill(skill)
-            
-            skills_json = json.dumps(skills_list)
-        else:
-            skills_json = '[]'
-        
-        # Process certifications
-        if 'certifications' in updated_data and updated_data['certifications']:
-            cert_list = [cert.strip() for cert in updated_data['certifications']]
-            st.session_state.certifications.update(cert_list)
-            updated_data['certifications'] = cert_list
-            
-            # Add certifications to the certifications table
-            for cert in cert_list:
-                add_certification(cert)
-                
-            certs_json = json.dumps(cert_list)
-        else:
-            certs_json = '[]'
-        
-        # Process projects
-        if 'projects' in updated_data and updated_data['projects']:
-            if isinstance(updated_data['projects'], list):
-                projects_list = updated_data['projects']
-            else:
-                projects_list = [p.strip() for p in updated_data['projects'].split(',') if p.strip()]
-            projects_json = json.dumps(projects_list)
+        if write_queue is not None:
+            queue_write('employees', 'update', employee_id, updated_data)
+            return True
+        return _update_employee(employee_id, updated_data)
+    
+    except Exception as e:
+        st.error(f"Error updating employee: {e}")
+        return False
+
+def _update_employee(employee_id, updated_data):
+    """Write changes to an employee to the database and patch the shared snapshot (raises on failure)"""
+    # Process skills
+    if 'skills' in updated_data and updated_data['skills']:
+        skills_list = [skill.strip() for skill in updated_data['skills']]
+        _session_names('skills').update(skills_list)
+        updated_data['skills'] = skills_list
+        
+        # Add skills to the skills table
+        skill_vocabulary.resolve(skills_list)
+    else:
+        skills_list = []
+    
+    # Process certifications
+    if 'certifications' in updated_data and updated_data['certifications']:
+        cert_list = [cert.strip() for cert in updated_data['certifications']]
+        _session_names('certifications').update(cert_list)
+        updated_data['certifications'] = cert_list
+        
+        # Add certifications to the certifications table
+        certification_vocabulary.resolve(cert_list)
+    else:
+        cert_list = []
+    
+    # Process projects
+    if 'projects' in updated_data and updated_data['projects']:
+        if isinstance(updated_data['projects'], list):
+            projects_list = updated_data['projects']
         else:
-            projects_json = '[]'
-        
-        # Process department
-        if 'department' in updated_data and updated_data['department']:
-            st.session_state.departments.add(updated_data['department'])
-            add_department(updated_data['department'])
-        
-        # Update database
-        db_session = Session()
-        
+            projects_list = [p.strip() for p in updated_data['projects'].split(',') if p.strip()]
+    else:
+        projects_list = []
+    
+    # Process department
+    if 'department' in updated_data and updated_data['department']:
+        _session_names('departments').add(updated_data['department'])
+        department_vocabulary.resolve([updated_data['department']])
+    
+    # Update database
+    with session_scope() as db_session:
         # Check if employee exists in database
         employee = db_session.query(Employee).filter_by(employee_id=employee_id).first()
         
+        # Re-derive soft skills features only when the review text changes; the
+        # review columns are only ever set from these, never from the payload
+        features = None
+        if 'peer_reviews' in updated_data or not employee:
+            peer_reviews = updated_data.get('peer_reviews', '')
+            if not employee or employee.peer_reviews != peer_reviews or employee.review_count is None:
+                features = compute_soft_skills_features(peer_reviews)
+                replace_peer_reviews(db_session, employee_id, peer_reviews, features)
+                index_documents(db_session, 'reviews', {employee_id: peer_reviews})
+        
         if not employee:
             # Employee doesn't exist in database, create new
             employee = Employee(
@@ -337,12 +945,13 @@ def update_employee(employee_id, updated_data):
                 department=updated_data.get('department', ''),
                 job_title=updated_data.get('job_title', ''),
                 joining_date=updated_data.get('joining_date', datetime.datetime.now()),
-                skills=skills_json,
-                certifications=certs_json,
+                skills=skills_list,
+                certifications=cert_list,
                 experience=float(updated_data.get('experience', 0)),
                 education=updated_data.get('education', ''),
-                projects=projects_json,
+                projects=projects_list,
                 peer_reviews=updated_data.get('peer_reviews', ''),
+                **review_feature_columns(features),
                 last_updated=datetime.datetime.now()
             )
             db_session.add(employee)
@@ -354,69 +963,145 @@ def update_employee(employee_id, updated_data):
             if 'joining_date' in updated_data:
                 employee.joining_date = updated_data['joining_date']
             if 'skills' in updated_data:
-                employee.skills = skills_json
+                employee.skills = skills_list
             if 'certifications' in updated_data:
-                employee.certifications = certs_json
+                employee.certifications = cert_list
             if 'experience' in updated_data:
                 employee.experience = float(updated_data['experience'])
             if 'education' in updated_data:
                 employee.education = updated_data['education']
             if 'projects' in updated_data:
-                employee.projects = projects_json
+                employee.projects = projects_list
             if 'peer_reviews' in updated_data:
                 employee.peer_reviews = updated_data['peer_reviews']
+            if features is not None:
+                for column, value in review_feature_columns(features).items():
+                    setattr(employee, column, value)
             employee.last_updated = datetime.datetime.now()
         
-        db_session.commit()
-        db_session.close()
+        # Keep the association tables in sync with the list columns that changed
+        record = {column: updated_data[column] or [] for column in ('skills', 'certifications')
+                  if column in updated_data}
+        record['employee_id'] = employee_id
+        sync_associations(db_session, EMPLOYEE_ASSOCIATIONS, 'employee_id', [record])
+    
+    # Patch the changed row into the shared snapshot
+    sync_rows('employees', [employee_id])
+    
+    return True
+
+def delete_employee(employee_id):
+    """Remove an employee from the database"""
+    try:
+        # Make sure the employee exists
+        if not record_exists('employees', employee_id):
+            return False
+        
+        # Queued writes must not re-create the employee after the delete
+        flush_writes()
+        
+        # Remove from database
+        match_ids = []
+        with session_scope() as db_session:
+            employee = db_session.query(Employee).filter_by(employee_id=employee_id).first()
+            
+            if employee:
+                db_session.delete(employee)
+                
+                # Also remove any matches for this employee from database (one indexed DELETE)
+                matches = db_session.query(Match).filter_by(employee_id=employee_id)
+                match_ids = [match_id for match_id, in matches.with_entities(Match.match_id)]
+                matches.delete(synchronize_session=False)
+                
+                # Leave a tombstone for other processes' delta sync
+                db_session.add(DeletedRecord(table_name='employees', record_id=employee_id,
+                                             deleted_at=datetime.datetime.now()))
+                
+                # And the employee's individual peer reviews
+                db_session.query(PeerReview).filter_by(employee_id=employee_id).delete(synchronize_session=False)
+                index_documents(db_session, 'reviews', {employee_id: None})
         
-        # Update session state
-        for key, value in updated_data.items():
-            st.session_state.employees.at[employee_idx[0], key] = value
+        # Drop the employee and its matches from the shared snapshots
+        remove_rows('employees', [employee_id])
+        remove_rows('matches', match_ids)
         
         return True
     
     except Exception as e:
-        st.error(f"Error updating employee: {e}")
+        st.error(f"Error deleting employee: {e}")
         return False
 
-def delete_employee(employee_id):
-    """Remove an employee from the database"""
+def add_peer_review(employee_id, review_text):
+    """
+    Append a single peer review to an employee, updating the soft skills
+    aggregate incrementally instead of re-analyzing the full review history
+    """
     try:
-        # Find the employee in session state
-        employee_idx = st.session_state.employees.index[st.session_state.employees['employee_id'] == employee_id].tolist()
-        
-        if not employee_idx:
+        if not review_text or not review_text.strip():
             return False
         
-        # Remove from database
-        db_session = Session()
-        employee = db_session.query(Employee).filter_by(employee_id=employee_id).first()
+        # The review aggregate builds on the stored review state
+        flush_writes()
         
-        if employee:
-            db_session.delete(employee)
+        with session_scope() as db_session:
+            employee = db_session.query(Employee).filter_by(employee_id=employee_id).first()
             
-            # Also remove any matches for this employee from database
-            matches = db_session.query(Match).filter_by(employee_id=employee_id).all()
-            for match in matches:
-                db_session.delete(match)
+            if not employee:
+                return False
             
-            db_session.commit()
-        
-        db_session.close()
-        
-        # Remove from session state
-        st.session_state.employees = st.session_state.employees.drop(employee_idx[0])
+            # Analyze only the new review, then fold it into the running aggregate
+            review_features = compute_soft_skills_features(review_text)
+            if employee.review_count is None:
+                current = compute_soft_skills_features(employee.peer_reviews)
+                replace_peer_reviews(db_session, employee_id, employee.peer_reviews, current)
+            else:
+                current = stored_review_features(employee)
+            features = add_review_to_features(current, review_features)
+            
+            db_session.add(PeerReview(**peer_review_row(employee_id, review_text, review_features)))
+            
+            # Keep the combined review text for display
+            employee.peer_reviews = f"{employee.peer_reviews}\n\n{review_text}" if employee.peer_reviews else review_text
+            index_documents(db_session, 'reviews', {employee_id: employee.peer_reviews})
+            for column, value in review_feature_columns(features).items():
+                setattr(employee, column, value)
+            employee.last_updated = datetime.datetime.now()
         
-        # Also remove any matches for this employee from session state
-        st.session_state.matches = st.session_state.matches[st.session_state.matches['employee_id'] != employee_id]
+        # Patch the new aggregate into the shared snapshot
+        sync_rows('employees', [employee_id])
         
         return True
     
     except Exception as e:
-        st.error(f"Error deleting employee: {e}")
+        st.error(f"Error adding peer review: {e}")
         return False
 
+def get_peer_reviews(employee_id):
+    """Retrieve an employee's individual peer reviews, oldest first"""
+    try:
+        with session_scope() as db_session:
+            reviews = db_session.query(PeerReview).filter_by(employee_id=employee_id).order_by(PeerReview.created_at).all()
+            
+            reviews_data = [{
+                'review_id': review.review_id,
+                'employee_id': review.employee_id,
+                'review_text': review.review_text,
+                'sentiment': review.sentiment,
+                'soft_skills': review.soft_skills or [],
+                'created_at': review.created_at
+            } for review in reviews]
+        
+        return pd.DataFrame(
+            reviews_data,
+            columns=['review_id', 'employee_id', 'review_text', 'sentiment', 'soft_skills', 'created_at']
+        )
+    
+    except Exception as e:
+        st.error(f"Error retrieving peer reviews: {e}")
+        return pd.DataFrame(
+            columns=['review_id', 'employee_id', 'review_text', 'sentiment', 'soft_skills', 'created_at']
+        )
+
 def add_role(role_data):
     """Add a new role to the database"""
     # Generate unique ID if not provided
@@ -427,66 +1112,65 @@ def add_role(role_data):
     role_data['last_updated'] = datetime.datetime.now()
     
     try:
-        # Process required skills
-        if 'required_skills' in role_data and role_data['required_skills']:
-            skills_list = [skill.strip() for skill in role_data['required_skills']]
-            st.session_state.skills.update(skills_list)
-            role_data['required_skills'] = skills_list
-            
-            # Add skills to the skills table
-            for skill in skills_list:
-                add_skill(skill)
-            
-            req_skills_json = json.dumps(skills_list)
-        else:
-            req_skills_json = '[]'
-        
-        # Process preferred skills
-        if 'preferred_skills' in role_data and role_data['preferred_skills']:
-            skills_list = [skill.strip() for skill in role_data['preferred_skills']]
-            st.session_state.skills.update(skills_list)
-            role_data['preferred_skills'] = skills_list
-            
-            # Add skills to the skills table
-            for skill in skills_list:
-                add_skill(skill)
-                
-            pref_skills_json = json.dumps(skills_list)
-        else:
-            pref_skills_json = '[]'
-        
-        # Process certifications
-        if 'required_certifications' in role_data and role_data['required_certifications']:
-            cert_list = [cert.strip() for cert in role_data['required_certifications']]
-            st.session_state.certifications.update(cert_list)
-            role_data['required_certifications'] = cert_list
-            
-            # Add certifications to the certifications table
-            for cert in cert_list:
-                add_certification(cert)
-                
-            certs_json = json.dumps(cert_list)
-        else:
-            certs_json = '[]'
-        
-        # Process responsibilities
-        if 'responsibilities' in role_data and role_data['responsibilities']:
-            if isinstance(role_data['responsibilities'], list):
-                resp_list = role_data['responsibilities']
-            else:
-                resp_list = [r.strip() for r in role_data['responsibilities'].split(',') if r.strip()]
-            resp_json = json.dumps(resp_list)
+        if write_queue is not None:
+            return queue_write('roles', 'add', role_data['role_id'], role_data)
+        return _add_role(role_data)
+    
+    except Exception as e:
+        st.error(f"Error adding role: {e}")
+        return None
+
+def _add_role(role_data):
+    """Write a role to the database and patch the shared snapshot (raises on failure)"""
+    # Process required skills
+    if 'required_skills' in role_data and role_data['required_skills']:
+        req_skills_list = [skill.strip() for skill in role_data['required_skills']]
+        _session_names('skills').update(req_skills_list)
+        role_data['required_skills'] = req_skills_list
+        
+        # Add skills to the skills table
+        skill_vocabulary.resolve(req_skills_list)
+    else:
+        req_skills_list = []
+    
+    # Process preferred skills
+    if 'preferred_skills' in role_data and role_data['preferred_skills']:
+        pref_skills_list = [skill.strip() for skill in role_data['preferred_skills']]
+        _session_names('skills').update(pref_skills_list)
+        role_data['preferred_skills'] = pref_skills_list
+        
+        # Add skills to the skills table
+        skill_vocabulary.resolve(pref_skills_list)
+    else:
+        pref_skills_list = []
+    
+    # Process certifications
+    if 'required_certifications' in role_data and role_data['required_certifications']:
+        cert_list = [cert.strip() for cert in role_data['required_certifications']]
+        _session_names('certifications').update(cert_list)
+        role_data['required_certifications'] = cert_list
+        
+        # Add certifications to the certifications table
+        certification_vocabulary.resolve(cert_list)
+    else:
+        cert_list = []
+    
+    # Process responsibilities
+    if 'responsibilities' in role_data and role_data['responsibilities']:
+        if isinstance(role_data['responsibilities'], list):
+            resp_list = role_data['responsibilities']
         else:
-            resp_json = '[]'
-        
-        # Process department
-        if 'department' in role_data and role_data['department']:
-            st.session_state.departments.add(role_data['department'])
-            add_department(role_data['department'])
-        
-        # Add to database
-        db_session = Session()
-        
+            resp_list = [r.strip() for r in role_data['responsibilities'].split(',') if r.strip()]
+    else:
+        resp_list = []
+    
+    # Process department
+    if 'department' in role_data and role_data['department']:
+        _session_names('departments').add(role_data['department'])
+        department_vocabulary.resolve([role_data['department']])
+    
+    # Add to database
+    with session_scope() as db_session:
         # Check if role already exists
         existing = db_session.query(Role).filter_by(role_id=role_data['role_id']).first()
         
@@ -495,12 +1179,12 @@ def add_role(role_data):
             existing.title = role_data.get('title', '')
             existing.department = role_data.get('department', '')
             existing.description = role_data.get('description', '')
-            existing.required_skills = req_skills_json
-            existing.preferred_skills = pref_skills_json
-            existing.required_certifications = certs_json
+            existing.required_skills = req_skills_list
+            existing.preferred_skills = pref_skills_list
+            existing.required_certifications = cert_list
             existing.required_experience = float(role_data.get('required_experience', 0))
             existing.required_education = role_data.get('required_education', '')
-            existing.responsibilities = resp_json
+            existing.responsibilities = resp_list
             existing.last_updated = datetime.datetime.now()
         else:
             # Create new record
@@ -509,102 +1193,103 @@ def add_role(role_data):
                 title=role_data.get('title', ''),
                 department=role_data.get('department', ''),
                 description=role_data.get('description', ''),
-                required_skills=req_skills_json,
-                preferred_skills=pref_skills_json,
-                required_certifications=certs_json,
+                required_skills=req_skills_list,
+                preferred_skills=pref_skills_list,
+                required_certifications=cert_list,
                 required_experience=float(role_data.get('required_experience', 0)),
                 required_education=role_data.get('required_education', ''),
-                responsibilities=resp_json,
+                responsibilities=resp_list,
                 last_updated=datetime.datetime.now()
             )
             db_session.add(role)
         
-        db_session.commit()
-        
-        # Update session state
-        new_role_df = pd.DataFrame([role_data])
-        st.session_state.roles = pd.concat([st.session_state.roles, new_role_df], ignore_index=True)
-        
-        db_session.close()
-        
-        return role_data['role_id']
+        index_documents(db_session, 'roles', {
+            role_data['role_id']: role_search_text(role_data.get('description'), resp_list)
+        })
+        
+        # Keep the skill and certification association tables in sync
+        sync_associations(db_session, ROLE_ASSOCIATIONS, 'role_id', [{
+            'role_id': role_data['role_id'],
+            'required_skills': role_data.get('required_skills') or [],
+            'preferred_skills': role_data.get('preferred_skills') or [],
+            'required_certifications': role_data.get('required_certifications') or []
+        }])
     
-    except Exception as e:
-        st.error(f"Error adding role: {e}")
-        return None
+    # Patch the new row into the shared snapshot
+    sync_rows('roles', [role_data['role_id']])
+    
+    return role_data['role_id']
 
 def update_role(role_id, updated_data):
     """Update an existing role's information"""
     try:
-        # Find the role in session state
-        role_idx = st.session_state.roles.index[st.session_state.roles['role_id'] == role_id].tolist()
-        
-        if not role_idx:
+        # Make sure the role exists
+        if not record_exists('roles', role_id):
             return False
         
         # Update timestamp
         updated_data['last_updated'] = datetime.datetime.now()
         
-        # Process required skills
-        if 'required_skills' in updated_data and updated_data['required_skills']:
-            skills_list = [skill.strip() for skill in updated_data['required_skills']]
-            st.session_state.skills.update(skills_list)
-            updated_data['required_skills'] = skills_list
-            
-            # Add skills to the skills table
-            for skill in skills_list:
-                add_skill(skill)
-            
-            req_skills_json = json.dumps(skills_list)
+        if write_queue is not None:
+            queue_write('roles', 'update', role_id, updated_data)
+            return True
+        return _update_role(role_id, updated_data)
+    
+    except Exception as e:
+        st.error(f"Error updating role: {e}")
+        return False
+
+def _update_role(role_id, updated_data):
+    """Write changes to a role to the database and patch the shared snapshot (raises on failure)"""
+    # Process required skills
+    if 'required_skills' in updated_data and updated_data['required_skills']:
+        req_skills_list = [skill.strip() for skill in updated_data['required_skills']]
+        _session_names('skills').update(req_skills_list)
+        updated_data['required_skills'] = req_skills_list
+        
+        # Add skills to the skills table
+        skill_vocabulary.resolve(req_skills_list)
+    else:
+        req_skills_list = []
+    
+    # Process preferred skills
+    if 'preferred_skills' in updated_data and updated_data['preferred_skills']:
+        pref_skills_list = [skill.strip() for skill in updated_data['preferred_skills']]
+        _session_names('skills').update(pref_skills_list)
+        updated_data['preferred_skills'] = pref_skills_list
+        
+        # Add skills to the skills table
+        skill_vocabulary.resolve(pref_skills_list)
+    else:
+        pref_skills_list = []
+    
+    # Process certifications
+    if 'required_certifications' in updated_data and updated_data['required_certifications']:
+        cert_list = [cert.strip() for cert in updated_data['required_certifications']]
+        _session_names('certifications').update(cert_list)
+        updated_data['required_certifications'] = cert_list
+        
+        # Add certifications to the certifications table
+        certification_vocabulary.resolve(cert_list)
+    else:
+        cert_list = []
+    
+    # Process responsibilities
+    if 'responsibilities' in updated_data and updated_data['responsibilities']:
+        if isinstance(updated_data['responsibilities'], list):
+            resp_list = updated_data['responsibilities']
         else:
-            req_skills_json = '[]'
-        
-        # Process preferred skills
-        if 'preferred_skills' in updated_data and updated_data['preferred_skills']:
-            skills_list = [skill.strip() for skill in updated_data['preferred_skills']]
-            st.session_state.skills.update(skills_list)
-            updated_data['preferred_skills'] = skills_list
-            
-            # Add skills to the skills table
-            for skill in skills_list:
-                add_skill(skill)
-                
-            pref_skills_json = json.dumps(skills_list)
-        else:
-            pref_skills_json = '[]'
-        
-        # Process certifications
-        if 'required_certifications' in updated_data and updated_data['required_certifications']:
-            cert_list = [cert.strip() for cert in updated_data['required_certifications']]
-            st.session_state.certifications.update(cert_list)
-            updated_data['required_certifications'] = cert_list
-            
-            # Add certifications to the certifications table
-            for cert in cert_list:
-                add_certification(cert)
-                
-            certs_json = json.dumps(cert_list)
-        else:
-            certs_json = '[]'
-        
-        # Process responsibilities
-        if 'responsibilities' in updated_data and updated_data['responsibilities']:
-            if isinstance(updated_data['responsibilities'], list):
-                resp_list = updated_data['responsibilities']
-            else:
-                resp_list = [r.strip() for r in updated_data['responsibilities'].split(',') if r.strip()]
-            resp_json = json.dumps(resp_list)
-        else:
-            resp_json = '[]'
-        
-        # Process department
-        if 'department' in updated_data and updated_data['department']:
-            st.session_state.departments.add(updated_data['department'])
-            add_department(updated_data['department'])
-        
-        # Update database
-        db_session = Session()
-        
+            resp_list = [r.strip() for r in updated_data['responsibilities'].split(',') if r.strip()]
+    else:
+        resp_list = []
+    
+    # Process department
+    if 'department' in updated_data and updated_data['department']:
+        _session_names('departments').add(updated_data['department'])
+        department_vocabulary.resolve([updated_data['department']])
+    
+    # Update database
+    with session_scope() as db_session:
         # Check if role exists in database
         role = db_session.query(Role).filter_by(role_id=role_id).first()
         
@@ -615,12 +1300,12 @@ def update_role(role_id, updated_data):
                 title=updated_data.get('title', ''),
                 department=updated_data.get('department', ''),
                 description=updated_data.get('description', ''),
-                required_skills=req_skills_json,
-                preferred_skills=pref_skills_json,
-                required_certifications=certs_json,
+                required_skills=req_skills_list,
+                preferred_skills=pref_skills_list,
+                required_certifications=cert_list,
                 required_experience=float(updated_data.get('required_experience', 0)),
                 required_education=updated_data.get('required_education', ''),
-                responsibilities=resp_json,
+                responsibilities=resp_list,
                 last_updated=datetime.datetime.now()
             )
             db_session.add(role)
@@ -630,62 +1315,66 @@ def update_role(role_id, updated_data):
             role.department = updated_data.get('department', role.department)
             role.description = updated_data.get('description', role.description)
             if 'required_skills' in updated_data:
-                role.required_skills = req_skills_json
+                role.required_skills = req_skills_list
             if 'preferred_skills' in updated_data:
-                role.preferred_skills = pref_skills_json
+                role.preferred_skills = pref_skills_list
             if 'required_certifications' in updated_data:
-                role.required_certifications = certs_json
+                role.required_certifications = cert_list
             if 'required_experience' in updated_data:
                 role.required_experience = float(updated_data['required_experience'])
             if 'required_education' in updated_data:
                 role.required_education = updated_data['required_education']
             if 'responsibilities' in updated_data:
-                role.responsibilities = resp_json
+                role.responsibilities = resp_list
             role.last_updated = datetime.datetime.now()
         
-        db_session.commit()
-        db_session.close()
-        
-        # Update session state
-        for key, value in updated_data.items():
-            st.session_state.roles.at[role_idx[0], key] = value
+        index_documents(db_session, 'roles', {
+            role_id: role_search_text(role.description, role.responsibilities or [])
+        })
         
-        return True
+        # Keep the association tables in sync with the list columns that changed
+        record = {column: updated_data[column] or []
+                  for column in ('required_skills', 'preferred_skills', 'required_certifications')
+                  if column in updated_data}
+        record['role_id'] = role_id
+        sync_associations(db_session, ROLE_ASSOCIATIONS, 'role_id', [record])
     
-    except Exception as e:
-        st.error(f"Error updating role: {e}")
-        return False
+    # Patch the changed row into the shared snapshot
+    sync_rows('roles', [role_id])
+    
+    return True
 
 def delete_role(role_id):
     """Remove a role from the database"""
     try:
-        # Find the role in session state
-        role_idx = st.session_state.roles.index[st.session_state.roles['role_id'] == role_id].tolist()
-        
-        if not role_idx:
+        # Make sure the role exists
+        if not record_exists('roles', role_id):
             return False
         
-        # Remove from database
-        db_session = Session()
-        role = db_session.query(Role).filter_by(role_id=role_id).first()
+        # Queued writes must not re-create the role after the delete
+        flush_writes()
         
-        if role:
-            db_session.delete(role)
-            
-            # Also remove any matches for this role from database
-            matches = db_session.query(Match).filter_by(role_id=role_id).all()
-            for match in matches:
-                db_session.delete(match)
+        # Remove from database
+        match_ids = []
+        with session_scope() as db_session:
+            role = db_session.query(Role).filter_by(role_id=role_id).first()
             
-            db_session.commit()
-        
-        db_session.close()
-        
-        # Remove from session state
-        st.session_state.roles = st.session_state.roles.drop(role_idx[0])
+            if role:
+                db_session.delete(role)
+                
+                # Also remove any matches for this role from database (one indexed DELETE)
+                matches = db_session.query(Match).filter_by(role_id=role_id)
+                match_ids = [match_id for match_id, in matches.with_entities(Match.match_id)]
+                matches.delete(synchronize_session=False)
+                
+                # Leave a tombstone for other processes' delta sync
+                db_session.add(DeletedRecord(table_name='roles', record_id=role_id,
+                                             deleted_at=datetime.datetime.now()))
+                index_documents(db_session, 'roles', {role_id: None})
         
-        # Also remove any matches for this role from session state
-        st.session_state.matches = st.session_state.matches[st.session_state.matches['role_id'] != role_id]
+        # Drop the role and its matches from the shared snapshots
+        remove_rows('roles', [role_id])
+        remove_rows('matches', match_ids)
         
         return True
     
@@ -704,9 +1393,18 @@ def add_match(match_data):
         if 'match_date' not in match_data:
             match_data['match_date'] = datetime.datetime.now()
         
-        # Add to database
-        db_session = Session()
-        
+        if write_queue is not None:
+            return queue_write('matches', 'add', match_data['match_id'], match_data)
+        return _add_match(match_data)
+    
+    except Exception as e:
+        st.error(f"Error adding match: {e}")
+        return None
+
+def _add_match(match_data):
+    """Write a match to the database and patch the shared snapshot (raises on failure)"""
+    # Add to database
+    with session_scope() as db_session:
         # Check if match already exists
         existing = db_session.query(Match).filter_by(match_id=match_data['match_id']).first()
         
@@ -722,6 +1420,7 @@ def add_match(match_data):
             existing.soft_skills_score = float(match_data.get('soft_skills_score', 0))
             existing.match_date = match_data.get('match_date', datetime.datetime.now())
             existing.notes = match_data.get('notes', '')
+            existing.run_id = match_data.get('run_id')
         else:
             # Create new record
             match = Match(
@@ -735,475 +1434,1660 @@ def add_match(match_data):
                 education_match_score=float(match_data.get('education_match_score', 0)),
                 soft_skills_score=float(match_data.get('soft_skills_score', 0)),
                 match_date=match_data.get('match_date', datetime.datetime.now()),
-                notes=match_data.get('notes', '')
+                notes=match_data.get('notes', ''),
+                run_id=match_data.get('run_id')
             )
             db_session.add(match)
-        
-        db_session.commit()
-        
-        # Update session state
-        new_match_df = pd.DataFrame([match_data])
-        st.session_state.matches = pd.concat([st.session_state.matches, new_match_df], ignore_index=True)
-        
-        db_session.close()
-        
-        return match_data['match_id']
     
-    except Exception as e:
-        st.error(f"Error adding match: {e}")
-        return None
+    # Patch the new row into the shared snapshot
+    sync_rows('matches', [match_data['match_id']])
+    
+    return match_data['match_id']
+
+# Database writers run by the write-behind worker, per (data type, operation)
+QUEUED_WRITERS = {
+    ('employees', 'add'): _add_employee,
+    ('employees', 'update'): _update_employee,
+    ('roles', 'add'): _add_role,
+    ('roles', 'update'): _update_role,
+    ('matches', 'add'): _add_match
+}
+
+# Session vocabulary set fed by each list or name column of a record
+NAME_COLUMNS = {
+    'skills': 'skills',
+    'required_skills': 'skills',
+    'preferred_skills': 'skills',
+    'certifications': 'certifications',
+    'required_certifications': 'certifications',
+    'department': 'departments'
+}
+
+def _session_names(kind):
+    """Return the session's set of known names of a kind (a throwaway set outside a Streamlit session)"""
+    try:
+        return st.session_state[kind]
+    except (KeyError, AttributeError):
+        # e.g. on the write-behind worker thread, which has no session
+        return set()
+
+def remember_names(record):
+    """Add the skills, certifications and department of a record to the session's name sets"""
+    for column, kind in NAME_COLUMNS.items():
+        value = record.get(column)
+        names = [value] if isinstance(value, str) else _as_list(value)
+        _session_names(kind).update(name.strip() for name in names if isinstance(name, str) and name.strip())
 
 def get_employee_by_id(employee_id):
     """Retrieve an employee by ID"""
-    employee = st.session_state.employees[st.session_state.employees['employee_id'] == employee_id]
-    if len(employee) == 0:
-        return None
-    return employee.iloc[0]
+    return get_record('employees', employee_id)
 
 def get_role_by_id(role_id):
     """Retrieve a role by ID"""
-    role = st.session_state.roles[st.session_state.roles['role_id'] == role_id]
-    if len(role) == 0:
-        return None
-    return role.iloc[0]
+    return get_record('roles', role_id)
 
 def get_match_by_id(match_id):
     """Retrieve a match by ID"""
-    match = st.session_state.matches[st.session_state.matches['match_id'] == match_id]
-    if len(match) == 0:
-        return None
-    return match.iloc[0]
+    return get_record('matches', match_id)
+
+def get_employees_by_ids(employee_ids):
+    """Retrieve several employees by ID in one vectorized lookup"""
+    return get_records('employees', employee_ids)
+
+def get_roles_by_ids(role_ids):
+    """Retrieve several roles by ID in one vectorized lookup"""
+    return get_records('roles', role_ids)
+
+def get_matches_by_ids(match_ids):
+    """Retrieve several matches by ID in one vectorized lookup"""
+    return get_records('matches', match_ids)
 
 def filter_employees(filters):
-    """Filter employees based on provided criteria"""
-    filtered_df = st.session_state.employees.copy()
+    """Filter employees based on provided criteria (cached per session until the data changes)"""
+    return session_view('filter_employees', json.dumps(filters, sort_keys=True, default=str), 'employees',
+                        lambda: _filter_employees(filters))
+
+def _filter_employees(filters):
+    """Apply employee filters by combining bitmap indexes of the shared snapshot"""
+    snapshot = shared_tables['employees'].load()
+    selected = full_bitmap(len(snapshot))
     
     if 'name' in filters and filters['name']:
-        filtered_df = filtered_df[filtered_df['name'].str.contains(filters['name'], case=False, na=False)]
+        selected &= bitmap_from_mask(snapshot.frame['name'].str.contains(filters['name'], case=False, na=False))
     
     if 'department' in filters and filters['department']:
-        filtered_df = filtered_df[filtered_df['department'] == filters['department']]
+        selected &= snapshot.bitmap('department').get(filters['department'])
     
     if 'skills' in filters and filters['skills']:
-        # For list-type columns, filter for rows that contain all the requested skills
-        mask = filtered_df['skills'].apply(
-            lambda x: all(skill in x for skill in filters['skills']) if isinstance(x, list) else False
-        )
-        filtered_df = filtered_df[mask]
+        # Rows with all the requested skills (or any of them with skills_match='any')
+        selected &= _list_bitmap(snapshot, 'skills', filters['skills'], filters.get('skills_match'))
     
     if 'certifications' in filters and filters['certifications']:
-        # For list-type columns, filter for rows that contain all the requested certifications
-        mask = filtered_df['certifications'].apply(
-            lambda x: all(cert in x for cert in filters['certifications']) if isinstance(x, list) else False
-        )
-        filtered_df = filtered_df[mask]
+        selected &= _list_bitmap(snapshot, 'certifications', filters['certifications'],
+                                 filters.get('certifications_match'))
     
-    return filtered_df
+    # The frame is only copied here, for the selected rows
+    return snapshot.select(selected)
+
+def _list_bitmap(snapshot, column, values, match=None):
+    """Bitmap of rows whose list column contains all (or with match='any', any) of values"""
+    index = snapshot.bitmap(column)
+    return index.any_of(values) if match == 'any' else index.all_of(values)
 
 def filter_roles(filters):
-    """Filter roles based on provided criteria"""
-    filtered_df = st.session_state.roles.copy()
+    """Filter roles based on provided criteria (cached per session until the data changes)"""
+    return session_view('filter_roles', json.dumps(filters, sort_keys=True, default=str), 'roles',
+                        lambda: _filter_roles(filters))
+
+def _filter_roles(filters):
+    """Apply role filters by combining bitmap indexes of the shared snapshot"""
+    snapshot = shared_tables['roles'].load()
+    selected = full_bitmap(len(snapshot))
     
     if 'title' in filters and filters['title']:
-        filtered_df = filtered_df[filtered_df['title'].str.contains(filters['title'], case=False, na=False)]
+        selected &= bitmap_from_mask(snapshot.frame['title'].str.contains(filters['title'], case=False, na=False))
     
     if 'department' in filters and filters['department']:
-        filtered_df = filtered_df[filtered_df['department'] == filters['department']]
+        selected &= snapshot.bitmap('department').get(filters['department'])
     
     if 'required_skills' in filters and filters['required_skills']:
-        # For list-type columns, filter for rows that contain all the requested skills
-        mask = filtered_df['required_skills'].apply(
-            lambda x: all(skill in x for skill in filters['required_skills']) if isinstance(x, list) else False
-        )
-        filtered_df = filtered_df[mask]
+        # Rows with all the requested skills (or any of them with required_skills_match='any')
+        selected &= _list_bitmap(snapshot, 'required_skills', filters['required_skills'],
+                                 filters.get('required_skills_match'))
     
     if 'required_certifications' in filters and filters['required_certifications']:
-        # For list-type columns, filter for rows that contain all the requested certifications
-        mask = filtered_df['required_certifications'].apply(
-            lambda x: all(cert in x for cert in filters['required_certifications']) if isinstance(x, list) else False
-        )
-        filtered_df = filtered_df[mask]
-    
-    return filtered_df
-
-def export_data(data_type, file_format="csv"):
-    """Export data to a file"""
-    if data_type == "employees":
-        data = st.session_state.employees
-    elif data_type == "roles":
-        data = st.session_state.roles
-    elif data_type == "matches":
-        data = st.session_state.matches
-    else:
+        selected &= _list_bitmap(snapshot, 'required_certifications', filters['required_certifications'],
+                                 filters.get('required_certifications_match'))
+    
+    # The frame is only copied here, for the selected rows
+    return snapshot.select(selected)
+
+def _find_owners(model, vocabulary, names, match_all=True, list_column=None):
+    """
+    Return the owner IDs in an association table linked to all (or any) of the given names
+    
+    On PostgreSQL the owner's GIN-indexed list_column answers the query
+    directly; elsewhere the association table's reversed index does.
+    """
+    owner_column, item_column = model.__table__.primary_key.columns
+    wanted = set(name.strip() for name in names if isinstance(name, str) and name.strip())
+    
+    if list_column is not None and engine.dialect.name == 'postgresql':
+        if not wanted:
+            return []
+        key_column = list_column.class_.__table__.c[owner_column.name]
+        with session_scope() as db_session:
+            return [owner_id for owner_id, in db_session.query(key_column).filter(
+                list_contains(list_column, sorted(wanted), match_all)
+            )]
+    
+    ids = vocabulary.find(names)
+    if not ids or (match_all and len(ids) < len(wanted)):
+        # A name nobody has can never be matched by every owner
+        return []
+    
+    with session_scope() as db_session:
+        query = db_session.query(owner_column).filter(item_column.in_(list(ids.values()))).group_by(owner_column)
+        if match_all:
+            query = query.having(func.count() == len(ids))
+        return [owner_id for owner_id, in query]
+
+def find_employees_with_skills(skills, match_all=True):
+    """Return the IDs of employees with all (or, if match_all is False, any) of the given skills"""
+    try:
+        return _find_owners(EmployeeSkill, skill_vocabulary, skills, match_all, Employee.skills)
+    except Exception as e:
+        st.error(f"Error searching employees by skill: {e}")
+        return []
+
+def find_employees_with_certifications(certifications, match_all=True):
+    """Return the IDs of employees with all (or, if match_all is False, any) of the given certifications"""
+    try:
+        return _find_owners(EmployeeCertification, certification_vocabulary, certifications, match_all,
+                            Employee.certifications)
+    except Exception as e:
+        st.error(f"Error searching employees by certification: {e}")
+        return []
+
+def find_roles_requiring_skills(skills, match_all=True):
+    """Return the IDs of roles requiring all (or, if match_all is False, any) of the given skills"""
+    try:
+        return _find_owners(RoleRequiredSkill, skill_vocabulary, skills, match_all, Role.required_skills)
+    except Exception as e:
+        st.error(f"Error searching roles by skill: {e}")
+        return []
+
+def find_candidate_employees(role_id, min_required_skills=1):
+    """
+    Pre-filter candidates for a role by counting shared skills with indexed joins
+    
+    Returns a DataFrame of employee_id, required_matched and preferred_matched
+    for employees having at least min_required_skills of the role's required
+    skills, best candidates first.
+    """
+    columns = ['employee_id', 'required_matched', 'preferred_matched']
+    try:
+        with session_scope() as db_session:
+            counts = {}
+            for association, column in ((RoleRequiredSkill, 'required_matched'),
+                                        (RolePreferredSkill, 'preferred_matched')):
+                rows = db_session.query(EmployeeSkill.employee_id, func.count()).join(
+                    association, association.skill_id == EmployeeSkill.skill_id
+                ).filter(association.role_id == role_id).group_by(EmployeeSkill.employee_id)
+                counts[column] = pd.Series(dict(rows.all()), dtype='int64')
+        
+        candidates = pd.DataFrame(counts).fillna(0).astype('int64')
+        candidates = candidates.reindex(columns=columns[1:], fill_value=0)
+        candidates = candidates[candidates['required_matched'] >= min_required_skills]
+        candidates = candidates.rename_axis('employee_id').reset_index()
+        return candidates.sort_values(columns[1:], ascending=False, ignore_index=True)[columns]
+    
+    except Exception as e:
+        st.error(f"Error finding candidate employees: {e}")
+        return pd.DataFrame(columns=columns)
+
+def export_data(data_type, file_format="csv", target=None, chunk_size=None):
+    """
+    Export a table, streaming it from the database in chunks
+    
+    With a target (a path or file-like object: text for csv/json/jsonl,
+    binary for parquet) rows are written incrementally and memory use stays
+    bounded by the chunk size; the number of rows written is returned.
+    Without one, the export is returned as a string (bytes for parquet), or
+    as a DataFrame for excel.
+    """
+    if data_type not in TABLES or file_format not in EXPORT_WRITERS + ('excel',):
         return None
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
     
-    if file_format == "csv":
-        return data.to_csv(index=False)
-    elif file_format == "excel":
+    if file_format == "excel":
         # For Excel, we'll return the DataFrame directly
-        return data
+        return get_table(data_type)
+    
+    if target is None:
+        buffer = io.BytesIO() if file_format == "parquet" else io.StringIO()
+        export_data(data_type, file_format, buffer, chunk_size)
+        return buffer.getvalue()
+    
+    if isinstance(target, (str, os.PathLike)):
+        mode = 'wb' if file_format == "parquet" else 'w'
+        with open(target, mode, **({} if mode == 'wb' else {'newline': '', 'encoding': 'utf-8'})) as handle:
+            return export_data(data_type, file_format, handle, chunk_size)
+    
+    chunks = iter_table_chunks(data_type, chunk_size)
+    if file_format == "csv":
+        return _write_csv(data_type, chunks, target)
     elif file_format == "json":
-        return data.to_json(orient="records")
+        return _write_json(chunks, target)
+    elif file_format == "jsonl":
+        return _write_jsonl(chunks, target)
+    return _write_parquet(data_type, chunks, target)
+
+# Streaming export
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 5000))  # Rows read per database query
+EXPORT_WRITERS = ('csv', 'json', 'jsonl', 'parquet')
+
+# Columns holding lists (stored as JSON text, parsed by the *_to_dict converters)
+LIST_COLUMNS = {
+    'employees': ['skills', 'certifications', 'projects', 'review_soft_skills'],
+    'roles': ['required_skills', 'preferred_skills', 'required_certifications', 'responsibilities'],
+    'matches': []
+}
+
+def iter_table_chunks(data_type, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a table as DataFrames of at most chunk_size rows, reading it with keyset pagination on the key"""
+    model, key, _, to_dict, columns = TABLES[data_type]
+    key_column = getattr(model, key)
+    after = None
+    while True:
+        # A short session per chunk so loaded ORM objects don't accumulate
+        with session_scope() as db_session:
+            query = db_session.query(model)
+            if after is not None:
+                query = query.filter(key_column > after)
+            records = [to_dict(row) for row in query.order_by(key_column).limit(chunk_size)]
+        if not records:
+            return
+        yield pd.DataFrame(records, columns=columns)
+        if len(records) < chunk_size:
+            return
+        after = records[-1][key]
+
+def _write_csv(data_type, chunks, target):
+    """Write chunks as CSV with a single header row; list columns become JSON arrays"""
+    list_columns = LIST_COLUMNS[data_type]
+    rows = 0
+    for chunk in chunks:
+        chunk = chunk.assign(**{column: chunk[column].map(json.dumps) for column in list_columns})
+        chunk.to_csv(target, header=rows == 0, index=False)
+        rows += len(chunk)
+    if rows == 0:
+        pd.DataFrame(columns=TABLES[data_type][4]).to_csv(target, index=False)
+    return rows
+
+def _write_jsonl(chunks, target):
+    """Write chunks as JSON Lines (one object per row, lists as native arrays)"""
+    rows = 0
+    for chunk in chunks:
+        target.write(chunk.to_json(orient="records", lines=True, date_format="iso").rstrip("\n") + "\n")
+        rows += len(chunk)
+    return rows
+
+def _write_json(chunks, target):
+    """Write chunks as a single JSON array of row objects"""
+    rows = 0
+    target.write("[")
+    for chunk in chunks:
+        if rows:
+            target.write(",")
+        # Strip each chunk's own brackets and splice it into the outer array
+        target.write(chunk.to_json(orient="records", date_format="iso")[1:-1])
+        rows += len(chunk)
+    target.write("]")
+    return rows
+
+def _arrow_schema(data_type):
+    """Arrow schema for a table (exports and snapshot files): list columns as list<string>, others from the model"""
+    import pyarrow as pa
     
-    return None
+    model, _, _, _, columns = TABLES[data_type]
+    list_columns = LIST_COLUMNS[data_type]
+    model_columns = model.__table__.columns
+    fields = []
+    for column in columns:
+        if column in list_columns:
+            arrow_type = pa.list_(pa.string())
+        elif isinstance(model_columns[column].type, DateTime):
+            arrow_type = pa.timestamp('us')
+        elif isinstance(model_columns[column].type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(model_columns[column].type, Integer):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+def _as_string_list(value):
+    """Normalize a list cell for Arrow list<string> (non-string items are JSON encoded)"""
+    return [item if isinstance(item, str) else json.dumps(item) for item in _as_list(value)]
 
-def import_data(data_type, data, file_format="csv"):
-    """Import data from a file"""
+def _write_parquet(data_type, chunks, target):
+    """Write chunks as Parquet, one row group per chunk, with list columns as native lists"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = _arrow_schema(data_type)
+    list_columns = LIST_COLUMNS[data_type]
+    rows = 0
+    with pq.ParquetWriter(target, schema) as writer:
+        for chunk in chunks:
+            chunk = chunk.assign(**{column: chunk[column].map(_as_string_list) for column in list_columns})
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+def import_data(data_type, data, file_format="csv", chunk_size=None):
+    """
+    Import data from a file, streaming it through the bulk writers in chunks
+    
+    CSV, JSON Lines and Parquet are read incrementally (JSON arrays and Excel
+    workbooks can't be, and are read whole before being chunked). Columns are
+    read with explicit dtypes, and list columns are parsed and validated per
+    chunk. Each chunk is committed on its own, so an invalid chunk stops the
+    import after the chunks before it were written.
+    """
+    if data_type not in BULK_WRITERS:
+        return False
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    
     try:
-        if file_format == "csv":
-            imported_df = pd.read_csv(data)
-        elif file_format == "excel":
-            imported_df = pd.read_excel(data)
-        elif file_format == "json":
-            imported_df = pd.read_json(data)
-        else:
-            return False
-        
-        if data_type == "employees":
-            st.session_state.employees = imported_df
-            
-            # Update database
-            db_session = Session()
-            for _, row in imported_df.iterrows():
-                # Convert list fields to JSON strings
-                if isinstance(row.get('skills'), list):
-                    skills_json = json.dumps(row['skills'])
-                    st.session_state.skills.update(row['skills'])
-                    for skill in row['skills']:
-                        add_skill(skill)
-                else:
-                    skills_json = '[]'
-                
-                if isinstance(row.get('certifications'), list):
-                    certs_json = json.dumps(row['certifications'])
-                    st.session_state.certifications.update(row['certifications'])
-                    for cert in row['certifications']:
-                        add_certification(cert)
-                else:
-                    certs_json = '[]'
-                
-                if isinstance(row.get('projects'), list):
-                    projects_json = json.dumps(row['projects'])
-                else:
-                    projects_json = '[]'
-                
-                if row.get('department'):
-                    st.session_state.departments.add(row['department'])
-                    add_department(row['department'])
-                
-                # Check if employee exists
-                existing = db_session.query(Employee).filter_by(employee_id=row['employee_id']).first()
-                
-                if existing:
-                    # Update existing record
-                    existing.name = row.get('name', '')
-                    existing.department = row.get('department', '')
-                    existing.job_title = row.get('job_title', '')
-                    existing.joining_date = row.get('joining_date', datetime.datetime.now())
-                    existing.skills = skills_json
-                    existing.certifications = certs_json
-                    existing.experience = float(row.get('experience', 0))
-                    existing.education = row.get('education', '')
-                    existing.projects = projects_json
-                    existing.peer_reviews = row.get('peer_reviews', '')
-                    existing.last_updated = datetime.datetime.now()
-                else:
-                    # Create new record
-                    employee = Employee(
-                        employee_id=row['employee_id'],
-                        name=row.get('name', ''),
-                        department=row.get('department', ''),
-                        job_title=row.get('job_title', ''),
-                        joining_date=row.get('joining_date', datetime.datetime.now()),
-                        skills=skills_json,
-                        certifications=certs_json,
-                        experience=float(row.get('experience', 0)),
-                        education=row.get('education', ''),
-                        projects=projects_json,
-                        peer_reviews=row.get('peer_reviews', ''),
-                        last_updated=datetime.datetime.now()
-                    )
-                    db_session.add(employee)
-            
-            db_session.commit()
-            db_session.close()
-        
-        elif data_type == "roles":
-            st.session_state.roles = imported_df
-            
-            # Update database
-            db_session = Session()
-            for _, row in imported_df.iterrows():
-                # Convert list fields to JSON strings
-                if isinstance(row.get('required_skills'), list):
-                    req_skills_json = json.dumps(row['required_skills'])
-                    st.session_state.skills.update(row['required_skills'])
-                    for skill in row['required_skills']:
-                        add_skill(skill)
-                else:
-                    req_skills_json = '[]'
-                
-                if isinstance(row.get('preferred_skills'), list):
-                    pref_skills_json = json.dumps(row['preferred_skills'])
-                    st.session_state.skills.update(row['preferred_skills'])
-                    for skill in row['preferred_skills']:
-                        add_skill(skill)
-                else:
-                    pref_skills_json = '[]'
-                
-                if isinstance(row.get('required_certifications'), list):
-                    certs_json = json.dumps(row['required_certifications'])
-                    st.session_state.certifications.update(row['required_certifications'])
-                    for cert in row['required_certifications']:
-                        add_certification(cert)
-                else:
-                    certs_json = '[]'
-                
-                if isinstance(row.get('responsibilities'), list):
-                    resp_json = json.dumps(row['responsibilities'])
-                else:
-                    resp_json = '[]'
-                
-                if row.get('department'):
-                    st.session_state.departments.add(row['department'])
-                    add_department(row['department'])
-                
-                # Check if role exists
-                existing = db_session.query(Role).filter_by(role_id=row['role_id']).first()
-                
-                if existing:
-                    # Update existing record
-                    existing.title = row.get('title', '')
-                    existing.department = row.get('department', '')
-                    existing.description = row.get('description', '')
-                    existing.required_skills = req_skills_json
-                    existing.preferred_skills = pref_skills_json
-                    existing.required_certifications = certs_json
-                    existing.required_experience = float(row.get('required_experience', 0))
-                    existing.required_education = row.get('required_education', '')
-                    existing.responsibilities = resp_json
-                    existing.last_updated = datetime.datetime.now()
-                else:
-                    # Create new record
-                    role = Role(
-                        role_id=row['role_id'],
-                        title=row.get('title', ''),
-                        department=row.get('department', ''),
-                        description=row.get('description', ''),
-                        required_skills=req_skills_json,
-                        preferred_skills=pref_skills_json,
-                        required_certifications=certs_json,
-                        required_experience=float(row.get('required_experience', 0)),
-                        required_education=row.get('required_education', ''),
-                        responsibilities=resp_json,
-                        last_updated=datetime.datetime.now()
-                    )
-                    db_session.add(role)
-            
-            db_session.commit()
-            db_session.close()
+        # Queued writes are older than the file and must not overwrite it afterwards
+        flush_writes()
         
-        elif data_type == "matches":
-            st.session_state.matches = imported_df
-            
-            # Update database
-            db_session = Session()
-            for _, row in imported_df.iterrows():
-                # Check if match exists
-                existing = db_session.query(Match).filter_by(match_id=row['match_id']).first()
-                
-                if existing:
-                    # Update existing record
-                    existing.employee_id = row.get('employee_id', '')
-                    existing.role_id = row.get('role_id', '')
-                    existing.match_score = float(row.get('match_score', 0))
-                    existing.skill_match_score = float(row.get('skill_match_score', 0))
-                    existing.experience_match_score = float(row.get('experience_match_score', 0))
-                    existing.certification_match_score = float(row.get('certification_match_score', 0))
-                    existing.education_match_score = float(row.get('education_match_score', 0))
-                    existing.soft_skills_score = float(row.get('soft_skills_score', 0))
-                    existing.match_date = row.get('match_date', datetime.datetime.now())
-                    existing.notes = row.get('notes', '')
-                else:
-                    # Create new record
-                    match = Match(
-                        match_id=row['match_id'],
-                        employee_id=row.get('employee_id', ''),
-                        role_id=row.get('role_id', ''),
-                        match_score=float(row.get('match_score', 0)),
-                        skill_match_score=float(row.get('skill_match_score', 0)),
-                        experience_match_score=float(row.get('experience_match_score', 0)),
-                        certification_match_score=float(row.get('certification_match_score', 0)),
-                        education_match_score=float(row.get('education_match_score', 0)),
-                        soft_skills_score=float(row.get('soft_skills_score', 0)),
-                        match_date=row.get('match_date', datetime.datetime.now()),
-                        notes=row.get('notes', '')
-                    )
-                    db_session.add(match)
-            
-            db_session.commit()
-            db_session.close()
-        
-        else:
+        chunks = read_import_chunks(data_type, data, file_format, chunk_size)
+        if chunks is None:
             return False
         
+        try:
+            for chunk in chunks:
+                BULK_WRITERS[data_type](parse_import_chunk(data_type, chunk))
+        finally:
+            # Imported rows are merged into the database; the shared snapshot reloads on next use
+            mark_changed(data_type)
         return True
     
     except Exception as e:
         st.error(f"Error importing data: {e}")
         return False
 
+# Streaming import
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 20000))  # Rows per parsed and committed chunk
+# Separators for list cells that aren't JSON arrays (e.g. "Python; SQL" or "Python|SQL")
+IMPORT_LIST_SEPARATORS = os.environ.get('IMPORT_LIST_SEPARATORS', r'\s*[;|,]\s*')
+
+def import_dtypes(data_type):
+    """Explicit dtypes for reading an import: floats for numeric columns, strings otherwise (dates are parsed later)"""
+    model, _, _, _, columns = TABLES[data_type]
+    model_columns = model.__table__.columns
+    dtypes = {}
+    for column in columns:
+        column_type = model_columns[column].type
+        if isinstance(column_type, (Float, Integer)):
+            dtypes[column] = 'float64'
+        elif not isinstance(column_type, DateTime) and column not in LIST_COLUMNS[data_type]:
+            # Keeps identifiers such as 00123 intact
+            dtypes[column] = 'object'
+    return dtypes
+
+def read_import_chunks(data_type, data, file_format, chunk_size=IMPORT_CHUNK_SIZE):
+    """Return an iterator of DataFrame chunks read from an import file, or None for an unknown format"""
+    dtypes = import_dtypes(data_type)
+    
+    if file_format == "csv":
+        # List columns stay text here and are parsed per chunk
+        return pd.read_csv(data, chunksize=chunk_size, dtype=dtypes)
+    elif file_format == "jsonl":
+        return pd.read_json(data, lines=True, chunksize=chunk_size, dtype=dtypes)
+    elif file_format == "parquet":
+        import pyarrow.parquet as pq
+        return (batch.to_pandas() for batch in pq.ParquetFile(data).iter_batches(batch_size=chunk_size))
+    elif file_format == "excel":
+        frame = pd.read_excel(data, dtype=dtypes)
+    elif file_format == "json":
+        frame = pd.read_json(data, dtype=dtypes)
+    else:
+        return None
+    return (frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size))
+
+def parse_import_chunk(data_type, chunk):
+    """Validate an imported chunk and convert its list and numeric columns"""
+    key = TABLES[data_type][1]
+    if key not in chunk:
+        raise ValueError(f"Missing required column '{key}'")
+    
+    missing = chunk[key].isna() | (chunk[key].astype(str).str.strip() == '')
+    if missing.any():
+        raise ValueError(f"Missing {key} in row {missing.idxmax()}")
+    
+    converted = {key: chunk[key].astype(str)}
+    for column, dtype in import_dtypes(data_type).items():
+        if dtype == 'float64' and column in chunk and chunk[column].dtype == object:
+            # Formats without typed reads (JSON, Parquet) can still carry numbers as text
+            converted[column] = pd.to_numeric(chunk[column], errors='raise')
+    for column in LIST_COLUMNS[data_type]:
+        if column in chunk:
+            converted[column] = parse_list_column(chunk[column], column)
+    return chunk.assign(**converted)
+
+def parse_list_column(values, column='value'):
+    """
+    Parse a column of list cells: lists pass through, JSON arrays are decoded
+    with one json.loads call per chunk and other text is split on
+    IMPORT_LIST_SEPARATORS. Missing cells become empty lists. Raises
+    ValueError naming the first invalid row.
+    """
+    parsed = [[] for _ in range(len(values))]
+    
+    cells = values.to_numpy(dtype=object)
+    is_list = np.fromiter((isinstance(cell, (list, np.ndarray)) for cell in cells), dtype=bool, count=len(cells))
+    for position in np.flatnonzero(is_list):
+        parsed[position] = list(cells[position])
+    
+    text = values.where(~is_list).astype('string').str.strip()
+    is_json = text.str.startswith('[').fillna(False).to_numpy(dtype=bool)
+    is_delimited = (text.notna() & (text != '')).fillna(False).to_numpy(dtype=bool) & ~is_json
+    
+    if is_json.any():
+        json_cells = text[is_json]
+        try:
+            decoded = json.loads('[' + ','.join(json_cells) + ']')
+        except json.JSONDecodeError:
+            decoded = None
+        if decoded is None or len(decoded) != len(json_cells) or not all(isinstance(item, list) for item in decoded):
+            # Find the offending cell for the error message
+            for label, cell in json_cells.items():
+                try:
+                    valid = isinstance(json.loads(cell), list)
+                except json.JSONDecodeError:
+                    valid = False
+                if not valid:
+                    raise ValueError(f"Invalid {column} in row {label}: {cell!r}")
+        for position, items in zip(np.flatnonzero(is_json), decoded):
+            parsed[position] = items
+    
+    if is_delimited.any():
+        split = text[is_delimited].str.split(IMPORT_LIST_SEPARATORS, regex=True)
+        for position, items in zip(np.flatnonzero(is_delimited), split):
+            parsed[position] = [item for item in items if item]
+    
+    return pd.Series(parsed, index=values.index, name=values.name, dtype=object)
+
+# Bulk import helpers
+UPSERT_BATCH_SIZE = 5000  # Rows per executemany INSERT ... ON CONFLICT call
+PREFETCH_BATCH_SIZE = 5000  # IDs per SELECT ... IN (...) query
+
+def _clean(value, default=None):
+    """Replace missing values (None/NaN/NaT) coming from a DataFrame with a default"""
+    if value is None:
+        return default
+    if not isinstance(value, (list, dict)) and pd.isna(value):
+        return default
+    return value
+
+def _as_list(value):
+    """Return value if it is a list, otherwise an empty list"""
+    return value if isinstance(value, list) else []
+
+def _as_datetime(value):
+    """Convert an imported date value to a datetime, defaulting to now"""
+    value = pd.to_datetime(_clean(value), errors='coerce')
+    return datetime.datetime.now() if pd.isna(value) else value.to_pydatetime()
+
+def _dialect_insert():
+    """Return the dialect-specific insert() construct supporting ON CONFLICT, if any"""
+    if engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+def prefetch_existing(db_session, columns, key_column, ids):
+    """Fetch the given columns for all existing rows whose key is in ids, keyed by ID"""
+    existing = {}
+    ids = list(ids)
+    for start in range(0, len(ids), PREFETCH_BATCH_SIZE):
+        batch = ids[start:start + PREFETCH_BATCH_SIZE]
+        for row in db_session.query(*columns).filter(key_column.in_(batch)):
+            existing[row[0]] = row
+    return existing
+
+def bulk_upsert(db_session, model, rows, update_columns=None):
+    """
+    Insert or update many rows using INSERT ... ON CONFLICT (SQLite/PostgreSQL)
+    
+    Parameters:
+    - db_session: Session whose transaction the statements run in (not committed here)
+    - model: Mapped class to write to
+    - rows: List of column dictionaries, all with the same keys
+    - update_columns: Columns to overwrite on conflict (default: all non-key columns)
+    """
+    if not rows:
+        return
+    
+    table = model.__table__
+    key_columns = [column.name for column in table.primary_key.columns]
+    if update_columns is None:
+        update_columns = [column for column in rows[0] if column not in key_columns]
+    
+    dialect_insert = _dialect_insert()
+    if dialect_insert is None:
+        # Generic fallback: one merge per row, still in a single transaction
+        for row in rows:
+            db_session.merge(model(**row))
+        return
+    
+    # One compiled statement executed with many parameter sets
+    stmt = dialect_insert(table)
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={column: stmt.excluded[column] for column in update_columns}
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=key_columns)
+    
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        db_session.execute(stmt, rows[start:start + UPSERT_BATCH_SIZE])
+
+def bulk_import_employees(imported_df):
+    """Upsert imported employees in one transaction and return the frame with derived review features"""
+    # An ID repeated in one INSERT ... ON CONFLICT would update the same row twice; the last one wins
+    imported_df = imported_df.drop_duplicates(subset='employee_id', keep='last')
+    records = imported_df.to_dict('records')
+    ids = [str(record['employee_id']) for record in records]
+    
+    # One query for every existing employee's review state. It gets a short
+    # transaction of its own: the NLP run below can take minutes and must not
+    # hold a pooled connection idle inside the write transaction
+    with session_scope() as db_session:
+        existing = prefetch_existing(
+            db_session,
+            [Employee.employee_id, Employee.peer_reviews, Employee.review_count,
+             Employee.review_sentiment_sum, Employee.review_sentiment,
+             Employee.review_soft_skills, Employee.soft_skills_score],
+            Employee.employee_id, ids
+        )
+    
+    # Only rows whose review text changed need the NLP features recomputed
+    changed = [
+        employee_id not in existing
+        or existing[employee_id].peer_reviews != _clean(record.get('peer_reviews'), '')
+        or existing[employee_id].review_count is None
+        for employee_id, record in zip(ids, records)
+    ]
+    enrich_peer_reviews(imported_df[changed])
+    
+    now = datetime.datetime.now()
+    changed_rows = []
+    unchanged_rows = []
+    review_rows = []
+    feature_records = []
+    for employee_id, record, is_changed in zip(ids, records, changed):
+        peer_reviews = _clean(record.get('peer_reviews'), '')
+        row = {
+            'employee_id': employee_id,
+            'name': _clean(record.get('name'), ''),
+            'department': _clean(record.get('department'), ''),
+            'job_title': _clean(record.get('job_title'), ''),
+            'joining_date': _as_datetime(record.get('joining_date')),
+            'skills': _as_list(record.get('skills')),
+            'certifications': _as_list(record.get('certifications')),
+            'experience': float(_clean(record.get('experience'), 0)),
+            'education': _clean(record.get('education'), ''),
+            'projects': _as_list(record.get('projects')),
+            'peer_reviews': peer_reviews,
+            'last_updated': now
+        }
+        
+        if is_changed:
+            features = compute_soft_skills_features(peer_reviews)
+            row.update(review_feature_columns(features))
+            changed_rows.append(row)
+            if features['review_count']:
+                review_rows.append(peer_review_row(employee_id, peer_reviews, features))
+        else:
+            features = stored_review_features(existing[employee_id])
+            unchanged_rows.append(row)
+        feature_records.append(features)
+    
+    skills = {skill for record in records for skill in _as_list(record.get('skills'))}
+    certifications = {cert for record in records for cert in _as_list(record.get('certifications'))}
+    departments = {_clean(record.get('department')) for record in records} - {None, ''}
+    
+    # The write transaction only covers the upserts and the association sync
+    with session_scope() as db_session:
+        # Lookup tables, bulk-inserted once from the deduplicated vocabulary
+        # (skills and certifications are resolved while syncing the associations)
+        department_vocabulary.resolve(departments, db_session)
+        
+        bulk_upsert(db_session, Employee, changed_rows)
+        bulk_upsert(db_session, Employee, unchanged_rows)
+        sync_associations(db_session, EMPLOYEE_ASSOCIATIONS, 'employee_id', [{
+            'employee_id': employee_id,
+            'skills': _as_list(record.get('skills')),
+            'certifications': _as_list(record.get('certifications'))
+        } for employee_id, record in zip(ids, records)])
+        
+        # Changed review text replaces the employee's individual review entries
+        changed_ids = [row['employee_id'] for row in changed_rows]
+        for start in range(0, len(changed_ids), PREFETCH_BATCH_SIZE):
+            db_session.query(PeerReview).filter(
+                PeerReview.employee_id.in_(changed_ids[start:start + PREFETCH_BATCH_SIZE])
+            ).delete(synchronize_session=False)
+        db_session.bulk_insert_mappings(PeerReview, review_rows)
+        index_documents(db_session, 'reviews', {row['employee_id']: row['peer_reviews'] for row in changed_rows})
+    
+    _session_names('skills').update(skills)
+    _session_names('certifications').update(certifications)
+    _session_names('departments').update(departments)
+    
+    features = pd.DataFrame(feature_records, index=imported_df.index)
+    return imported_df.drop(columns=features.columns, errors='ignore').join(features)
+
+def bulk_import_roles(imported_df):
+    """Upsert imported roles in one transaction"""
+    # An ID repeated in one INSERT ... ON CONFLICT would update the same row twice; the last one wins
+    records = imported_df.drop_duplicates(subset='role_id', keep='last').to_dict('records')
+    now = datetime.datetime.now()
+    
+    rows = [{
+        'role_id': str(record['role_id']),
+        'title': _clean(record.get('title'), ''),
+        'department': _clean(record.get('department'), ''),
+        'description': _clean(record.get('description'), ''),
+        'required_skills': _as_list(record.get('required_skills')),
+        'preferred_skills': _as_list(record.get('preferred_skills')),
+        'required_certifications': _as_list(record.get('required_certifications')),
+        'required_experience': float(_clean(record.get('required_experience'), 0)),
+        'required_education': _clean(record.get('required_education'), ''),
+        'responsibilities': _as_list(record.get('responsibilities')),
+        'last_updated': now
+    } for record in records]
+    
+    skills = {skill for record in records
+              for column in ('required_skills', 'preferred_skills')
+              for skill in _as_list(record.get(column))}
+    certifications = {cert for record in records for cert in _as_list(record.get('required_certifications'))}
+    departments = {_clean(record.get('department')) for record in records} - {None, ''}
+    
+    with session_scope() as db_session:
+        department_vocabulary.resolve(departments, db_session)
+        bulk_upsert(db_session, Role, rows)
+        sync_associations(db_session, ROLE_ASSOCIATIONS, 'role_id', [{
+            'role_id': row['role_id'],
+            'required_skills': _as_list(record.get('required_skills')),
+            'preferred_skills': _as_list(record.get('preferred_skills')),
+            'required_certifications': _as_list(record.get('required_certifications'))
+        } for row, record in zip(rows, records)])
+        index_documents(db_session, 'roles', {
+            row['role_id']: role_search_text(row['description'], _as_list(record.get('responsibilities')))
+            for row, record in zip(rows, records)
+        })
+    
+    _session_names('skills').update(skills)
+    _session_names('certifications').update(certifications)
+    _session_names('departments').update(departments)
+
+def bulk_import_matches(imported_df):
+    """Upsert imported matches in one transaction"""
+    rows = [{
+        'match_id': str(record['match_id']),
+        'employee_id': _clean(record.get('employee_id'), ''),
+        'role_id': _clean(record.get('role_id'), ''),
+        'match_score': float(_clean(record.get('match_score'), 0)),
+        'skill_match_score': float(_clean(record.get('skill_match_score'), 0)),
+        'experience_match_score': float(_clean(record.get('experience_match_score'), 0)),
+        'certification_match_score': float(_clean(record.get('certification_match_score'), 0)),
+        'education_match_score': float(_clean(record.get('education_match_score'), 0)),
+        'soft_skills_score': float(_clean(record.get('soft_skills_score'), 0)),
+        'match_date': _as_datetime(record.get('match_date')),
+        'notes': _clean(record.get('notes'), ''),
+        'run_id': _clean(record.get('run_id'))
+    } for record in imported_df.drop_duplicates(subset='match_id', keep='last').to_dict('records')]
+    
+    with session_scope() as db_session:
+        bulk_upsert(db_session, Match, rows)
+
+def bulk_insert(db_session, model, rows):
+    """
+    Insert many new rows: COPY ... FROM STDIN on PostgreSQL, executemany INSERT elsewhere
+    
+    Parameters:
+    - db_session: Session whose transaction the statements run in (not committed here)
+    - model: Mapped class to write to
+    - rows: List of column dictionaries, all with the same keys
+    """
+    if not rows:
+        return
+    
+    table = model.__table__
+    columns = list(rows[0])
+    
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        if engine.dialect.name != 'postgresql':
+            db_session.execute(table.insert(), batch)
+            continue
+        
+        # None is sent as \N so that it stays distinct from empty strings
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([['\\N' if row[column] is None else row[column] for column in columns]
+                                      for row in batch])
+        buffer.seek(0)
+        cursor = db_session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+            )
+        finally:
+            cursor.close()
+
+def save_match_run(results, run_id=None):
+    """
+    Save the top matches of a matching run, with every component score, in one transaction
+    
+    Rows saved by earlier runs for the same employees and roles are replaced;
+    matches added by hand (without a run ID) are kept.
+    
+    Parameters:
+    - results: Dictionary returned by match_employees_to_roles
+    - run_id: Identifier stored with the rows (default: a new UUID)
+    
+    Returns:
+    - The run ID, or None on failure
+    """
+    try:
+        run_id = run_id or str(uuid.uuid4())
+        now = datetime.datetime.now()
+        
+        # Top-N pairs of both directions, each pair once
+        pairs = {}
+        for matches in list(results['employee_to_role'].values()) + list(results['role_to_employee'].values()):
+            for match in matches:
+                pairs.setdefault((match['employee_id'], match['role_id']), match)
+        
+        rows = [{
+            'match_id': str(uuid.uuid4()),
+            'employee_id': employee_id,
+            'role_id': role_id,
+            'match_score': float(match['overall_score']),
+            'skill_match_score': float(match['skill_match']),
+            'experience_match_score': float(match['experience_match']),
+            'certification_match_score': float(match['certification_match']),
+            'education_match_score': float(match['education_match']),
+            'soft_skills_score': float(match['soft_skills']),
+            'match_date': now,
+            'notes': '',
+            'run_id': run_id
+        } for (employee_id, role_id), match in pairs.items()]
+        
+        # The run's scope: every employee and role it scored
+        employee_ids = list(results['employee_to_role'])
+        role_ids = list(results['role_to_employee'])
+        
+        with session_scope() as db_session:
+            for start in range(0, len(employee_ids), PREFETCH_BATCH_SIZE):
+                for role_start in range(0, len(role_ids), PREFETCH_BATCH_SIZE):
+                    db_session.query(Match).filter(
+                        Match.run_id.isnot(None),
+                        Match.employee_id.in_(employee_ids[start:start + PREFETCH_BATCH_SIZE]),
+                        Match.role_id.in_(role_ids[role_start:role_start + PREFETCH_BATCH_SIZE])
+                    ).delete(synchronize_session=False)
+            bulk_insert(db_session, Match, rows)
+        
+        mark_changed('matches')
+        
+        return run_id
+    
+    except Exception as e:
+        st.error(f"Error saving match run: {e}")
+        return None
+
+# Bulk writer per data type, called once per imported chunk
+BULK_WRITERS = {
+    'employees': bulk_import_employees,
+    'roles': bulk_import_roles,
+    'matches': bulk_import_matches
+}
+
+def enrich_peer_reviews(employees_df):
+    """Run the NLP enrichment pipeline over the peer reviews of the given employees"""
+    if 'peer_reviews' not in employees_df or employees_df.empty:
+        return 0
+    
+    reviews = employees_df[['employee_id', 'peer_reviews']].dropna()
+    if reviews.empty:
+        return 0
+    
+    progress = st.progress(0.0, text="Analyzing peer reviews...")
+    
+    def report(done, total):
+        progress.progress(done / total, text=f"Analyzing peer reviews ({done}/{total})...")
+    
+    count = run_enrichment(
+        reviews.itertuples(index=False, name=None),
+        total=len(reviews),
+        progress_callback=report
+    )
+    progress.empty()
+    return count
+
 # Database helper functions
+EMPLOYEE_COLUMNS = ['employee_id', 'name', 'department', 'job_title', 'joining_date',
+                    'skills', 'certifications', 'experience', 'education', 'projects',
+                    'peer_reviews', 'review_count', 'review_sentiment_sum',
+                    'review_sentiment', 'review_soft_skills',
+                    'soft_skills_score', 'last_updated']
+
+ROLE_COLUMNS = ['role_id', 'title', 'department', 'description', 'required_skills',
+                'preferred_skills', 'required_certifications', 'required_experience',
+                'required_education', 'responsibilities', 'last_updated']
+
+MATCH_COLUMNS = ['match_id', 'employee_id', 'role_id', 'match_score',
+                 'skill_match_score', 'experience_match_score', 'certification_match_score',
+                 'education_match_score', 'soft_skills_score', 'match_date', 'notes', 'run_id']
+
+def employee_to_dict(emp):
+    """Convert an Employee record to a dictionary"""
+    return {
+        'employee_id': emp.employee_id,
+        'name': emp.name,
+        'department': emp.department,
+        'job_title': emp.job_title,
+        'joining_date': emp.joining_date,
+        'skills': emp.skills or [],
+        'certifications': emp.certifications or [],
+        'experience': emp.experience,
+        'education': emp.education,
+        'projects': emp.projects or [],
+        'peer_reviews': emp.peer_reviews,
+        'review_count': emp.review_count,
+        'review_sentiment_sum': emp.review_sentiment_sum,
+        'review_sentiment': emp.review_sentiment,
+        'review_soft_skills': emp.review_soft_skills or [],
+        'soft_skills_score': emp.soft_skills_score,
+        'last_updated': emp.last_updated
+    }
+
+def role_to_dict(role):
+    """Convert a Role record to a dictionary"""
+    return {
+        'role_id': role.role_id,
+        'title': role.title,
+        'department': role.department,
+        'description': role.description,
+        'required_skills': role.required_skills or [],
+        'preferred_skills': role.preferred_skills or [],
+        'required_certifications': role.required_certifications or [],
+        'required_experience': role.required_experience,
+        'required_education': role.required_education,
+        'responsibilities': role.responsibilities or [],
+        'last_updated': role.last_updated
+    }
+
+def match_to_dict(match):
+    """Convert a Match record to a dictionary"""
+    return {
+        'match_id': match.match_id,
+        'employee_id': match.employee_id,
+        'role_id': match.role_id,
+        'match_score': match.match_score,
+        'skill_match_score': match.skill_match_score,
+        'experience_match_score': match.experience_match_score,
+        'certification_match_score': match.certification_match_score,
+        'education_match_score': match.education_match_score,
+        'soft_skills_score': match.soft_skills_score,
+        'match_date': match.match_date,
+        'notes': match.notes,
+        'run_id': match.run_id
+    }
+
 def get_all_employees():
     """Retrieve all employees from the database"""
     try:
-        db_session = Session()
-        employees = db_session.query(Employee).all()
-        
-        # Convert to DataFrame
-        employees_data = []
-        for emp in employees:
-            # Parse JSON strings back to lists
-            skills = json.loads(emp.skills) if emp.skills else []
-            certifications = json.loads(emp.certifications) if emp.certifications else []
-            projects = json.loads(emp.projects) if emp.projects else []
-            
-            employees_data.append({
-                'employee_id': emp.employee_id,
-                'name': emp.name,
-                'department': emp.department,
-                'job_title': emp.job_title,
-                'joining_date': emp.joining_date,
-                'skills': skills,
-                'certifications': certifications,
-                'experience': emp.experience,
-                'education': emp.education,
-                'projects': projects,
-                'peer_reviews': emp.peer_reviews,
-                'last_updated': emp.last_updated
-            })
-        
-        db_session.close()
-        
-        if employees_data:
-            return pd.DataFrame(employees_data)
-        else:
-            return pd.DataFrame(
-                columns=['employee_id', 'name', 'department', 'job_title', 'joining_date', 
-                         'skills', 'certifications', 'experience', 'education', 'projects',
-                         'peer_reviews', 'last_updated']
-            )
+        return read_table('employees')
     
     except Exception as e:
         st.error(f"Error retrieving employees: {e}")
-        return pd.DataFrame(
-            columns=['employee_id', 'name', 'department', 'job_title', 'joining_date', 
-                     'skills', 'certifications', 'experience', 'education', 'projects',
-                     'peer_reviews', 'last_updated']
-        )
+        return pd.DataFrame(columns=EMPLOYEE_COLUMNS)
 
 def get_all_roles():
     """Retrieve all roles from the database"""
     try:
-        db_session = Session()
-        roles = db_session.query(Role).all()
-        
-        # Convert to DataFrame
-        roles_data = []
-        for role in roles:
-            # Parse JSON strings back to lists
-            required_skills = json.loads(role.required_skills) if role.required_skills else []
-            preferred_skills = json.loads(role.preferred_skills) if role.preferred_skills else []
-            required_certifications = json.loads(role.required_certifications) if role.required_certifications else []
-            responsibilities = json.loads(role.responsibilities) if role.responsibilities else []
-            
-            roles_data.append({
-                'role_id': role.role_id,
-                'title': role.title,
-                'department': role.department,
-                'description': role.description,
-                'required_skills': required_skills,
-                'preferred_skills': preferred_skills,
-                'required_certifications': required_certifications,
-                'required_experience': role.required_experience,
-                'required_education': role.required_education,
-                'responsibilities': responsibilities,
-                'last_updated': role.last_updated
-            })
-        
-        db_session.close()
-        
-        if roles_data:
-            return pd.DataFrame(roles_data)
-        else:
-            return pd.DataFrame(
-                columns=['role_id', 'title', 'department', 'description', 'required_skills',
-                         'preferred_skills', 'required_certifications', 'required_experience',
-                         'required_education', 'responsibilities', 'last_updated']
-            )
+        return read_table('roles')
     
     except Exception as e:
         st.error(f"Error retrieving roles: {e}")
-        return pd.DataFrame(
-            columns=['role_id', 'title', 'department', 'description', 'required_skills',
-                     'preferred_skills', 'required_certifications', 'required_experience',
-                     'required_education', 'responsibilities', 'last_updated']
-        )
+        return pd.DataFrame(columns=ROLE_COLUMNS)
 
 def get_all_matches():
     """Retrieve all matches from the database"""
     try:
-        db_session = Session()
-        matches = db_session.query(Match).all()
-        
-        # Convert to DataFrame
-        matches_data = []
-        for match in matches:
-            matches_data.append({
-                'match_id': match.match_id,
-                'employee_id': match.employee_id,
-                'role_id': match.role_id,
-                'match_score': match.match_score,
-                'skill_match_score': match.skill_match_score,
-                'experience_match_score': match.experience_match_score,
-                'certification_match_score': match.certification_match_score,
-                'education_match_score': match.education_match_score,
-                'soft_skills_score': match.soft_skills_score,
-                'match_date': match.match_date,
-                'notes': match.notes
-            })
-        
-        db_session.close()
-        
-        if matches_data:
-            return pd.DataFrame(matches_data)
-        else:
-            return pd.DataFrame(
-                columns=['match_id', 'employee_id', 'role_id', 'match_score', 
-                         'skill_match_score', 'experience_match_score', 'certification_match_score',
-                         'education_match_score', 'soft_skills_score', 'match_date', 'notes']
-            )
+        return read_table('matches')
     
     except Exception as e:
         st.error(f"Error retrieving matches: {e}")
-        return pd.DataFrame(
-            columns=['match_id', 'employee_id', 'role_id', 'match_score', 
-                     'skill_match_score', 'experience_match_score', 'certification_match_score',
-                     'education_match_score', 'soft_skills_score', 'match_date', 'notes']
+        return pd.DataFrame(columns=MATCH_COLUMNS)
+
+# Lazy data access: full tables are only materialized when a computation needs
+# them; pages and views use paginated slices and aggregates instead
+PAGE_SIZE = 50
+
+# Model, key column, column used for recency ordering, converter and columns per data type
+TABLES = {
+    'employees': (Employee, 'employee_id', 'last_updated', employee_to_dict, EMPLOYEE_COLUMNS),
+    'roles': (Role, 'role_id', 'last_updated', role_to_dict, ROLE_COLUMNS),
+    'matches': (Match, 'match_id', 'match_date', match_to_dict, MATCH_COLUMNS)
+}
+
+def read_table(data_type):
+    """Read a whole table from the database into a DataFrame"""
+    model, _, _, to_dict, columns = TABLES[data_type]
+    with session_scope() as db_session:
+        records = [to_dict(row) for row in db_session.query(model)]
+    return pd.DataFrame(records, columns=columns)
+
+# Delta sync: how often readers merge changes made by other processes, how far
+# back each sync looks before its watermark (to catch transactions that commit
+# out of timestamp order) and how long tombstones are kept
+DELTA_SYNC_SECONDS = float(os.environ.get('DELTA_SYNC_SECONDS', 5))
+DELTA_SYNC_OVERLAP = datetime.timedelta(seconds=float(os.environ.get('DELTA_SYNC_OVERLAP_SECONDS', 30)))
+TOMBSTONE_RETENTION = datetime.timedelta(days=float(os.environ.get('TOMBSTONE_RETENTION_DAYS', 7)))
+
+# Tables whose rows carry a last_updated timestamp (matches are synced by reloading)
+DELTA_SYNC_TABLES = ('employees', 'roles')
+
+def read_changes(data_type, since):
+    """
+    Read the rows of a table changed at or after since, and the keys deleted since then
+    
+    Returns (records, deleted_ids), or None if the tombstones no longer reach
+    back to since (the caller must reload the whole table).
+    """
+    since = since - DELTA_SYNC_OVERLAP
+    if since < datetime.datetime.now() - TOMBSTONE_RETENTION:
+        return None
+    
+    model, _, stamp, to_dict, _ = TABLES[data_type]
+    with session_scope() as db_session:
+        records = [to_dict(row) for row in db_session.query(model).filter(getattr(model, stamp) >= since)]
+        deleted = [record_id for (record_id,) in db_session.query(DeletedRecord.record_id).filter(
+            DeletedRecord.table_name == data_type, DeletedRecord.deleted_at >= since
+        )]
+    return records, deleted
+
+def prune_tombstones():
+    """Delete tombstones older than the retention period"""
+    with session_scope() as db_session:
+        db_session.query(DeletedRecord).filter(
+            DeletedRecord.deleted_at < datetime.datetime.now() - TOMBSTONE_RETENTION
+        ).delete(synchronize_session=False)
+
+# Match history retention: raw matches are kept for MATCH_RETENTION, then
+# compacted into daily and monthly rollups; daily rollups are kept for
+# DAILY_ROLLUP_RETENTION and monthly ones indefinitely
+MATCH_RETENTION = datetime.timedelta(days=float(os.environ.get('MATCH_RETENTION_DAYS', 90)))
+DAILY_ROLLUP_RETENTION = datetime.timedelta(days=float(os.environ.get('DAILY_ROLLUP_RETENTION_DAYS', 730)))
+ROLLUP_PERIODS = ('day', 'month')
+ROLLUP_SCOPES = ('all', 'role', 'department')
+ROLLUP_PERCENTILES = (25, 50, 75, 90)
+ROLLUP_QUANTILE_LEVELS = np.linspace(0, 1, 101)  # Resolution of the stored quantile sketch
+
+def _period_start(dates, period):
+    """Floor timestamps to the start of their day or month"""
+    dates = pd.to_datetime(dates)
+    return dates.dt.to_period('M').dt.to_timestamp() if period == 'month' else dates.dt.floor('D')
+
+def _score_parts(frame, departments, period, scope):
+    """
+    Summarize raw match scores per period and scope key
+    
+    Parameters:
+    - frame: DataFrame with match_date, role_id and match_score columns
+    - departments: Dictionary mapping role IDs to departments
+    - period: 'day' or 'month'
+    - scope: 'all', 'role' or 'department'
+    
+    Returns:
+    - List of rollup part dictionaries (see _merge_parts)
+    """
+    frame = frame.dropna(subset=['match_date', 'match_score'])
+    if frame.empty:
+        return []
+    
+    if scope == 'all':
+        keys = pd.Series('', index=frame.index)
+    elif scope == 'role':
+        keys = frame['role_id'].fillna('').astype(str)
+    else:
+        keys = frame['role_id'].map(departments).fillna('').astype(str)
+    
+    parts = []
+    grouped = frame['match_score'].astype(float).groupby([_period_start(frame['match_date'], period), keys])
+    for (start, scope_id), scores in grouped:
+        values = scores.to_numpy()
+        parts.append({
+            'period': period,
+            'period_start': start.to_pydatetime(),
+            'scope': scope,
+            'scope_id': scope_id,
+            'match_count': len(values),
+            'score_sum': float(values.sum()),
+            'quantiles': np.quantile(values, ROLLUP_QUANTILE_LEVELS)
+        })
+    return parts
+
+def _merge_parts(parts):
+    """
+    Combine rollup parts of the same period and scope key into one rollup row
+    
+    Counts and sums add up exactly; the quantile sketches are merged by
+    weighting each part's quantile values by its share of the matches.
+    """
+    first = parts[0]
+    if len(parts) == 1:
+        quantiles = np.asarray(first['quantiles'], dtype=float)
+    else:
+        values = np.concatenate([np.asarray(part['quantiles'], dtype=float) for part in parts])
+        weights = np.concatenate([np.full(len(part['quantiles']), part['match_count'] / len(part['quantiles']))
+                                  for part in parts])
+        order = np.argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+        cumulative = (np.cumsum(weights) - weights / 2) / weights.sum()
+        quantiles = np.interp(ROLLUP_QUANTILE_LEVELS, cumulative, values)
+        quantiles[0], quantiles[-1] = values[0], values[-1]
+    
+    row = {
+        'period': first['period'],
+        'period_start': first['period_start'],
+        'scope': first['scope'],
+        'scope_id': first['scope_id'],
+        'match_count': int(sum(part['match_count'] for part in parts)),
+        'score_sum': float(sum(part['score_sum'] for part in parts)),
+        'score_min': float(quantiles[0]),
+        'score_max': float(quantiles[-1]),
+        'quantiles': [round(float(value), 6) for value in quantiles]
+    }
+    for percentile in ROLLUP_PERCENTILES:
+        row[f'p{percentile}'] = float(np.interp(percentile / 100, ROLLUP_QUANTILE_LEVELS, quantiles))
+    return row
+
+def _rollup_part(rollup):
+    """Turn a stored MatchRollup back into a part for _merge_parts"""
+    return {
+        'period': rollup.period,
+        'period_start': rollup.period_start,
+        'scope': rollup.scope,
+        'scope_id': rollup.scope_id,
+        'match_count': rollup.match_count,
+        'score_sum': rollup.score_sum,
+        'quantiles': rollup.quantiles
+    }
+
+def _group_parts(parts):
+    """Merge parts sharing (period, period_start, scope, scope_id)"""
+    grouped = {}
+    for part in parts:
+        grouped.setdefault((part['period'], part['period_start'], part['scope'], part['scope_id']), []).append(part)
+    return {key: _merge_parts(group) for key, group in grouped.items()}
+
+def compact_matches(now=None):
+    """
+    Roll up raw matches older than the retention window and delete them
+    
+    Whole days before the cutoff are summarized into daily and monthly
+    rollups for every scope, merged with rollups already stored for the same
+    periods (so late-arriving rows and months spanning several runs add up),
+    all in one transaction. Daily rollups past their own retention are dropped.
+    
+    Parameters:
+    - now: Reference time (default: the current time)
+    
+    Returns:
+    - Number of raw matches compacted
+    """
+    now = now or datetime.datetime.now()
+    cutoff = datetime.datetime.combine((now - MATCH_RETENTION).date(), datetime.time())
+    
+    with session_scope() as db_session:
+        expired = pd.DataFrame(
+            db_session.query(Match.match_date, Match.role_id, Match.match_score).filter(
+                Match.match_date < cutoff
+            ).all(),
+            columns=['match_date', 'role_id', 'match_score']
         )
+        
+        if not expired.empty:
+            departments = dict(db_session.query(Role.role_id, Role.department).all())
+            parts = [part for period in ROLLUP_PERIODS for scope in ROLLUP_SCOPES
+                     for part in _score_parts(expired, departments, period, scope)]
+            
+            # Fold in what earlier runs stored for the same periods
+            for period in ROLLUP_PERIODS:
+                starts = sorted({part['period_start'] for part in parts if part['period'] == period})
+                for start in range(0, len(starts), PREFETCH_BATCH_SIZE):
+                    parts.extend(_rollup_part(rollup) for rollup in db_session.query(MatchRollup).filter(
+                        MatchRollup.period == period,
+                        MatchRollup.period_start.in_(starts[start:start + PREFETCH_BATCH_SIZE])
+                    ))
+            
+            bulk_upsert(db_session, MatchRollup, list(_group_parts(parts).values()))
+            db_session.query(Match).filter(Match.match_date < cutoff).delete(synchronize_session=False)
+        
+        db_session.query(MatchRollup).filter(
+            MatchRollup.period == 'day',
+            MatchRollup.period_start < now - DAILY_ROLLUP_RETENTION
+        ).delete(synchronize_session=False)
+    
+    if not expired.empty:
+        mark_changed('matches')
+    
+    return len(expired)
+
+# Score parts of the raw matches per (period, scope), with the matches and
+# roles data versions they were computed from
+_raw_parts_cache = {}
+
+def _raw_score_parts(period, scope):
+    """Score parts of the raw matches in the shared snapshot, summarized once per data version"""
+    cached = _raw_parts_cache.get((period, scope))
+    if cached is not None and cached[0] == (data_version('matches'), data_version('roles')):
+        return cached[1]
+    
+    matches = shared_tables['matches'].load()
+    roles = shared_tables['roles'].load()
+    departments = dict(zip(roles.frame['role_id'], roles.frame['department']))
+    parts = _score_parts(matches.frame[['match_date', 'role_id', 'match_score']], departments, period, scope)
+    _raw_parts_cache[period, scope] = ((matches.version, roles.version), parts)
+    return parts
+
+def match_score_trend(period='day', scope='all', scope_id=None, since=None):
+    """
+    Match score statistics over time, served from rollups plus the raw matches still retained
+    
+    Parameters:
+    - period: 'day' or 'month'
+    - scope: 'all', 'role' or 'department'
+    - scope_id: Role ID or department to restrict to (default: every key of the scope)
+    - since: Earliest period start to include
+    
+    Returns:
+    - DataFrame with period_start, scope_id, match_count, mean, score_min,
+      p25, p50, p75, p90 and score_max, ordered by period_start
+    """
+    with session_scope() as db_session:
+        query = db_session.query(MatchRollup).filter(MatchRollup.period == period, MatchRollup.scope == scope)
+        if scope_id is not None:
+            query = query.filter(MatchRollup.scope_id == scope_id)
+        if since is not None:
+            query = query.filter(MatchRollup.period_start >= since)
+        parts = [_rollup_part(rollup) for rollup in query]
+    
+    # Raw matches not compacted yet come from the shared snapshot
+    parts.extend(part for part in _raw_score_parts(period, scope)
+                 if (scope_id is None or part['scope_id'] == scope_id)
+                 and (since is None or part['period_start'] >= since))
+    
+    columns = ['period_start', 'scope_id', 'match_count', 'mean', 'score_min'] + \
+              [f'p{percentile}' for percentile in ROLLUP_PERCENTILES] + ['score_max']
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    
+    trend = pd.DataFrame(list(_group_parts(parts).values()))
+    trend['mean'] = trend['score_sum'] / trend['match_count']
+    return trend[columns].sort_values(['period_start', 'scope_id']).reset_index(drop=True)
+
+# Columnar snapshot files: delta-synced tables are saved as uncompressed Arrow
+# IPC files so a cold start memory-maps them instead of building ORM objects
+# and parsing JSON row by row, then merges the database delta since the save
+TABLE_SNAPSHOT_DIR = os.environ.get('TABLE_SNAPSHOT_DIR', '.table_snapshots')
+TABLE_SNAPSHOT_INTERVAL = float(os.environ.get('TABLE_SNAPSHOT_INTERVAL', 60))  # Seconds between saves
+TABLE_SNAPSHOT_FORMAT = '1'  # Bump when the file layout or columns change
+
+def database_tag():
+    """Short hash of DATABASE_URL naming the local files that belong to this database"""
+    return hashlib.sha256(DATABASE_URL.encode('utf-8')).hexdigest()[:12]
+
+def snapshot_path(data_type):
+    """Path of a table's snapshot file (one per database)"""
+    return os.path.join(TABLE_SNAPSHOT_DIR, f'{data_type}-{database_tag()}.arrow')
+
+def save_table_snapshot(data_type, frame, watermark):
+    """Write a table to its snapshot file atomically, recording the sync watermark"""
+    import pyarrow as pa
+    
+    list_columns = LIST_COLUMNS[data_type]
+    if any(not isinstance(item, str) for column in list_columns for cell in frame[column] for item in _as_list(cell)):
+        # list<string> can't hold these losslessly; keep loading from the database
+        return False
+    
+    schema = _arrow_schema(data_type).with_metadata({
+        'format': TABLE_SNAPSHOT_FORMAT,
+        'watermark': watermark.isoformat()
+    })
+    table = pa.Table.from_pandas(
+        frame.assign(**{column: frame[column].map(_as_list) for column in list_columns}),
+        schema=schema, preserve_index=False
+    )
+    
+    path = snapshot_path(data_type)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with pa.OSFile(temporary, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_table(table)
+    os.replace(temporary, path)
+    return True
+
+def load_table_snapshot(data_type):
+    """Read a table from its snapshot file as (frame, watermark), or None if it is missing or unusable"""
+    path = snapshot_path(data_type)
+    if not os.path.exists(path):
+        return None
+    try:
+        import pyarrow as pa
+        
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        metadata = table.schema.metadata or {}
+        if metadata.get(b'format') != TABLE_SNAPSHOT_FORMAT.encode() or \
+                table.schema.remove_metadata() != _arrow_schema(data_type):
+            return None
+        
+        # Numeric columns come straight from the mapped buffers; list columns become Python lists
+        list_columns = LIST_COLUMNS[data_type]
+        frame = table.drop_columns(list_columns).to_pandas(coerce_temporal_nanoseconds=True)
+        for column in list_columns:
+            if COMPACT_TABLES:
+                # Straight from the Arrow offsets and dictionary-encoded values into CSR form
+                frame[column] = pd.Series(StringListArray.from_arrow(table.column(column)))
+            else:
+                frame[column] = pd.Series(_arrow_lists(table.column(column)), dtype=object)
+        return frame[TABLES[data_type][4]], datetime.datetime.fromisoformat(metadata[b'watermark'].decode())
+    
+    except Exception as e:
+        logging.getLogger(__name__).warning("Ignoring table snapshot %s: %s", path, e)
+        return None
+
+def _arrow_lists(column):
+    """Convert an Arrow list<string> column to Python lists (distinct strings converted once, then sliced by offsets)"""
+    column = column.combine_chunks()
+    encoded = column.flatten().dictionary_encode()
+    distinct = encoded.dictionary.to_pylist()
+    values = [distinct[i] for i in encoded.indices.to_numpy().tolist()]
+    offsets = column.offsets.to_numpy()
+    offsets = (offsets - offsets[0]).tolist()
+    return [values[offsets[i]:offsets[i + 1]] for i in range(len(column))]
+
+def _persist_table_snapshot(data_type, frame, watermark):
+    """Background save of a shared table (errors are logged, never raised into the app)"""
+    try:
+        save_table_snapshot(data_type, frame, watermark)
+    except Exception as e:
+        logging.getLogger(__name__).warning("Could not save table snapshot for %s: %s", data_type, e)
+
+# Compact in-memory tables: low-cardinality strings as categoricals, list
+# columns as CSR offsets plus interned int32 IDs, numeric columns as float32
+COMPACT_TABLES = os.environ.get('COMPACT_TABLES', 'true').lower() in ('1', 'true', 'yes')
+CATEGORICAL_COLUMNS = {
+    'employees': ['department', 'job_title', 'education'],
+    'roles': ['department', 'required_education'],
+    'matches': []
+}
+
+def compact_table(data_type, frame):
+    """Convert a loaded table to its compact in-memory representation"""
+    model = TABLES[data_type][0]
+    return compact_frame(
+        frame,
+        categorical=CATEGORICAL_COLUMNS[data_type],
+        lists=LIST_COLUMNS[data_type],
+        float32=[column.name for column in model.__table__.columns if isinstance(column.type, Float)]
+    )
+
+def table_memory_report():
+    """
+    Memory used by each loaded shared table, compact versus plain pandas columns
+    
+    Returns:
+    - DataFrame with rows, plain_bytes, compact_bytes, saved_bytes and saved_pct
+      per table (the shared list vocabulary is counted in its own row)
+    """
+    rows = []
+    for data_type, table in shared_tables.items():
+        frame = table.peek()
+        if frame is None:
+            continue
+        rows.append({
+            'table': data_type,
+            'rows': len(frame),
+            'plain_bytes': int(frame_memory(plain_frame(frame)).sum()),
+            'compact_bytes': int(frame_memory(frame).sum())
+        })
+    rows.append({'table': 'list vocabulary', 'rows': len(interner), 'plain_bytes': 0,
+                 'compact_bytes': interner.nbytes})
+    
+    report = pd.DataFrame(rows)
+    report['saved_bytes'] = report['plain_bytes'] - report['compact_bytes']
+    report['saved_pct'] = (100 * report['saved_bytes'] / report['plain_bytes'].where(report['plain_bytes'] > 0)).round(1)
+    return report
+
+def _shared_table(data_type):
+    """Build the shared snapshot of a table, with delta sync and a snapshot file where supported"""
+    _, key, stamp, _, _ = TABLES[data_type]
+    compact = partial(compact_table, data_type) if COMPACT_TABLES else None
+    if data_type not in DELTA_SYNC_TABLES:
+        return SharedTable(data_type, partial(read_table, data_type), key, compact=compact)
+    return SharedTable(
+        data_type, partial(read_table, data_type), key,
+        delta=partial(read_changes, data_type), stamp=stamp, sync_interval=DELTA_SYNC_SECONDS,
+        seed=partial(load_table_snapshot, data_type), persist=partial(_persist_table_snapshot, data_type),
+        persist_interval=TABLE_SNAPSHOT_INTERVAL, compact=compact
+    )
+
+# One read-only snapshot per table, shared by every browser session in the process
+shared_tables = {data_type: _shared_table(data_type) for data_type in TABLES}
+
+def mark_changed(*data_types):
+    """Bump the data version of tables after a committed write (the snapshot reloads on next use)"""
+    for data_type in data_types:
+        shared_tables[data_type].bump()
+
+def sync_rows(data_type, record_ids):
+    """Patch the committed state of some rows into the shared snapshot, bitmaps included"""
+    deferred = getattr(_deferred_syncs, 'rows', None)
+    if deferred is not None:
+        # Inside apply_queued_writes: the rows are not committed yet
+        deferred.setdefault(data_type, []).extend(record_ids)
+        return
+    shared_tables[data_type].refresh(lambda: fetch_rows(data_type, record_ids))
+
+def remove_rows(data_type, record_ids):
+    """Drop committed deletes from the shared snapshot instead of reloading the whole table"""
+    shared_tables[data_type].remove(record_ids)
+
+# Rows touched by the queued writes being applied on this thread (see apply_queued_writes)
+_deferred_syncs = threading.local()
+
+# Optional write-behind mode: adds and updates are queued durably and committed
+# in batches by a background worker, while the shared snapshot shows them at once
+WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+write_queue = None
+
+def write_queue_path():
+    """Path of the write-behind queue file (one per database, so writes are only replayed where they belong)"""
+    return os.path.join(WRITE_QUEUE_DIR, f'write_queue-{database_tag()}.db')
+
+def enable_write_behind(path=None):
+    """Start the write-behind queue (and apply any writes left queued by a previous run)"""
+    global write_queue
+    if write_queue is None:
+        write_queue = WriteQueue(apply_queued_writes, path or write_queue_path())
+    return write_queue
+
+def queue_write(data_type, operation, record_id, payload):
+    """Queue an add ('add') or partial update ('update') and show it in the shared snapshot right away"""
+    remember_names(payload)
+    write_queue.enqueue(data_type, operation, record_id, payload)
+    
+    # Until the worker commits it (and patches in the stored row) the snapshot shows the payload
+    columns = TABLES[data_type][4]
+    current = get_record(data_type, record_id) if operation == 'update' else None
+    record = {} if current is None else current.to_dict()
+    record.update({column: payload[column] for column in columns if column in payload})
+    record = {column: record.get(column) for column in columns}
+    shared_tables[data_type].refresh(lambda: [record], save=False)
+    return record_id
+
+def apply_queued_writes(writes):
+    """Apply coalesced queued writes in one transaction; raises so the queue can retry"""
+    # The writers' snapshot syncs wait for the commit, so a batch that rolls
+    # back never publishes (or saves to the snapshot file) its rows
+    _deferred_syncs.rows = {}
+    try:
+        with session_scope():
+            for data_type, operation, record_id, payload in writes:
+                if operation == 'add':
+                    QUEUED_WRITERS[data_type, operation](payload)
+                else:
+                    QUEUED_WRITERS[data_type, operation](record_id, payload)
+        committed = _deferred_syncs.rows
+    finally:
+        _deferred_syncs.rows = None
+    
+    for data_type, record_ids in committed.items():
+        sync_rows(data_type, list(dict.fromkeys(record_ids)))
+
+def flush_writes(timeout=None):
+    """Wait until queued writes are committed; True if there is no write-behind queue"""
+    return True if write_queue is None else write_queue.flush(timeout)
+
+def write_behind_status():
+    """Pending/failed write counts of the write-behind queue, or None when it is off"""
+    return None if write_queue is None else write_queue.status()
+
+def sync_changes(data_type):
+    """Merge changes made by other processes into the shared snapshot now and return the data version"""
+    shared_tables[data_type].sync()
+    return data_version(data_type)
+
+def data_version(data_type):
+    """Return the current data version of a table"""
+    return shared_tables[data_type].version
+
+def is_loaded(data_type):
+    """Return True if an up-to-date snapshot of the table is in memory"""
+    return shared_tables[data_type].is_current()
+
+def get_table(data_type):
+    """
+    Return the full table as a read-only DataFrame shared by all sessions
+    
+    The snapshot is loaded on first use and reloaded once after any write;
+    copy it before modifying it.
+    """
+    try:
+        return shared_tables[data_type].load().frame
+    
+    except Exception as e:
+        st.error(f"Error retrieving {data_type}: {e}")
+        return pd.DataFrame(columns=TABLES[data_type][4])
+
+def get_employees():
+    """Return all employees, loading them on first use"""
+    return get_table('employees')
+
+def get_roles():
+    """Return all roles, loading them on first use"""
+    return get_table('roles')
+
+def get_matches():
+    """Return all matches, loading them on first use"""
+    return get_table('matches')
+
+def session_view(name, key, data_type, compute):
+    """
+    Cache a per-session derived view (e.g. a filtered table) until its inputs change
+    
+    The view is recomputed when key changes or the table's data version moves on.
+    """
+    views = st.session_state.setdefault('_views', {})
+    version = data_version(data_type)
+    cached = views.get(name)
+    if cached is not None and cached[0] == key and cached[1] == version:
+        return cached[2]
+    
+    result = compute()
+    views[name] = (key, version, result)
+    return result
+
+def column_filter(model, column, value):
+    """Filter for column == value, or for list columns, rows containing every item of value"""
+    attribute = getattr(model, column)
+    if isinstance(attribute.type, JSONList):
+        return list_contains(attribute, [value] if isinstance(value, str) else list(value))
+    return attribute == value
+
+def count_records(data_type, filters=None):
+    """Count the rows of a table (optionally matching column filters, see column_filter) without loading it"""
+    model = TABLES[data_type][0]
+    try:
+        table = shared_tables[data_type].peek()
+        if not filters and table is not None:
+            return len(table)
+        
+        with session_scope() as db_session:
+            query = db_session.query(func.count()).select_from(model)
+            for column, value in (filters or {}).items():
+                query = query.filter(column_filter(model, column, value))
+            return query.scalar()
+    
+    except Exception as e:
+        st.error(f"Error counting {data_type}: {e}")
+        return 0
+
+def get_page(data_type, after=None, page_size=PAGE_SIZE, filters=None):
+    """
+    Fetch one page of a table, most recently updated first, using keyset pagination
+    
+    The cursor is the (recency value, key) pair of the last row of the previous
+    page, so each page is an indexed range scan however deep it is.
+    
+    Returns a (DataFrame, cursor) pair; the cursor is None on the last page.
+    """
+    model, key, order, to_dict, columns = TABLES[data_type]
+    key_column = getattr(model, key)
+    order_column = getattr(model, order)
+    
+    try:
+        with session_scope() as db_session:
+            query = db_session.query(model)
+            for column, value in (filters or {}).items():
+                query = query.filter(column_filter(model, column, value))
+            
+            if after is not None:
+                after_order, after_key = after
+                if after_order is None:
+                    # Rows without a timestamp sort last
+                    query = query.filter(order_column.is_(None), key_column < after_key)
+                else:
+                    query = query.filter(or_(
+                        order_column < after_order,
+                        and_(order_column == after_order, key_column < after_key),
+                        order_column.is_(None)
+                    ))
+            
+            rows = query.order_by(order_column.desc().nulls_last(), key_column.desc()).limit(page_size + 1).all()
+            records = [to_dict(row) for row in rows[:page_size]]
+        
+        page = pd.DataFrame(records, columns=columns)
+        cursor = None
+        if len(rows) > page_size:
+            cursor = (records[-1][order], records[-1][key])
+        return page, cursor
+    
+    except Exception as e:
+        st.error(f"Error retrieving {data_type}: {e}")
+        return pd.DataFrame(columns=columns), None
+
+def record_exists(data_type, record_id):
+    """Check for a row by key with an indexed query (rows with queued writes exist too)"""
+    if write_queue is not None and write_queue.is_pending(data_type, record_id):
+        return True
+    model, key = TABLES[data_type][:2]
+    with session_scope() as db_session:
+        return db_session.query(getattr(model, key)).filter(getattr(model, key) == record_id).first() is not None
+
+def get_recent(data_type, limit=5):
+    """Return the most recently updated rows of a table"""
+    return get_page(data_type, page_size=limit)[0]
+
+def get_record(data_type, record_id):
+    """Fetch a single row by key: an O(1) index lookup if the snapshot is loaded, else one indexed query"""
+    try:
+        return shared_tables[data_type].get(record_id)
+    except LookupError:
+        pass
+    
+    model, _, _, to_dict, _ = TABLES[data_type]
+    with session_scope() as db_session:
+        record = db_session.get(model, record_id)
+        return None if record is None else pd.Series(to_dict(record))
+
+def get_records(data_type, record_ids):
+    """
+    Fetch many rows by key at once, in the order requested (unknown keys are skipped)
+    
+    Uses a vectorized index lookup on the shared snapshot if it is loaded,
+    otherwise batched IN (...) queries.
+    """
+    record_ids = list(record_ids)
+    try:
+        return shared_tables[data_type].get_many(record_ids)
+    except LookupError:
+        return fetch_records(data_type, record_ids)
+
+def fetch_records(data_type, record_ids):
+    """Read rows by key from the database with batched IN (...) queries, in the order requested"""
+    return pd.DataFrame(fetch_rows(data_type, record_ids), columns=TABLES[data_type][4])
+
+def fetch_rows(data_type, record_ids):
+    """Read rows by key from the database as dictionaries, in the order requested (unknown keys are skipped)"""
+    record_ids = list(record_ids)
+    model, key, _, to_dict, _ = TABLES[data_type]
+    found = {}
+    with session_scope() as db_session:
+        for start in range(0, len(record_ids), PREFETCH_BATCH_SIZE):
+            batch = record_ids[start:start + PREFETCH_BATCH_SIZE]
+            for record in db_session.query(model).filter(getattr(model, key).in_(batch)):
+                found[getattr(record, key)] = to_dict(record)
+    return [found[record_id] for record_id in record_ids if record_id in found]
+
+def count_by(data_type, column):
+    """Count the rows of a table per value of a column with a GROUP BY (no table load)"""
+    model = TABLES[data_type][0]
+    group_column = getattr(model, column)
+    try:
+        with session_scope() as db_session:
+            rows = db_session.query(group_column, func.count()).group_by(group_column).all()
+        return pd.Series(dict(rows), dtype='int64').sort_values(ascending=False)
+    
+    except Exception as e:
+        st.error(f"Error aggregating {data_type}: {e}")
+        return pd.Series(dtype='int64')
+
+def count_skills(limit=None):
+    """Count employees per skill using the association table, most common first"""
+    try:
+        with session_scope() as db_session:
+            query = db_session.query(Skill.skill_name, func.count(EmployeeSkill.employee_id)).join(
+                EmployeeSkill, EmployeeSkill.skill_id == Skill.skill_id
+            ).group_by(Skill.skill_name).order_by(func.count(EmployeeSkill.employee_id).desc())
+            if limit:
+                query = query.limit(limit)
+            rows = query.all()
+        return pd.Series(dict(rows), dtype='int64')
+    
+    except Exception as e:
+        st.error(f"Error aggregating skills: {e}")
+        return pd.Series(dtype='int64')
 
 def get_all_skills():
     """Retrieve all skills from the database"""
     try:
-        db_session = Session()
-        skills = db_session.query(Skill).all()
-        
-        result = set()
-        for skill in skills:
-            result.add(skill.skill_name)
-        
-        db_session.close()
-        return result
+        return skill_vocabulary.load()
     
     except Exception as e:
         st.error(f"Error retrieving skills: {e}")
@@ -1212,15 +3096,7 @@ def get_all_skills():
 def get_all_departments():
     """Retrieve all departments from the database"""
     try:
-        db_session = Session()
-        departments = db_session.query(Department).all()
-        
-        result = set()
-        for dept in departments:
-            result.add(dept.department_name)
-        
-        db_session.close()
-        return result
+        return department_vocabulary.load()
     
     except Exception as e:
         st.error(f"Error retrieving departments: {e}")
@@ -1229,15 +3105,7 @@ def get_all_departments():
 def get_all_certifications():
     """Retrieve all certifications from the database"""
     try:
-        db_session = Session()
-        certifications = db_session.query(Certification).all()
-        
-        result = set()
-        for cert in certifications:
-            result.add(cert.certification_name)
-        
-        db_session.close()
-        return result
+        return certification_vocabulary.load()
     
     except Exception as e:
         st.error(f"Error retrieving certifications: {e}")
@@ -1246,18 +3114,7 @@ def get_all_certifications():
 def add_skill(skill_name):
     """Add a skill to the database if it doesn't exist"""
     try:
-        db_session = Session()
-        
-        # Check if skill already exists
-        existing = db_session.query(Skill).filter_by(skill_name=skill_name).first()
-        
-        if not existing:
-            # Add new skill
-            skill = Skill(skill_name=skill_name)
-            db_session.add(skill)
-            db_session.commit()
-        
-        db_session.close()
+        skill_vocabulary.resolve([skill_name])
         return True
     
     except Exception as e:
@@ -1267,18 +3124,7 @@ def add_skill(skill_name):
 def add_department(department_name):
     """Add a department to the database if it doesn't exist"""
     try:
-        db_session = Session()
-        
-        # Check if department already exists
-        existing = db_session.query(Department).filter_by(department_name=department_name).first()
-        
-        if not existing:
-            # Add new department
-            department = Department(department_name=department_name)
-            db_session.add(department)
-            db_session.commit()
-        
-        db_session.close()
+        department_vocabulary.resolve([department_name])
         return True
     
     except Exception as e:
@@ -1288,20 +3134,13 @@ def add_department(department_name):
 def add_certification(certification_name):
     """Add a certification to the database if it doesn't exist"""
     try:
-        db_session = Session()
-        
-        # Check if certification already exists
-        existing = db_session.query(Certification).filter_by(certification_name=certification_name).first()
-        
-        if not existing:
-            # Add new certification
-            certification = Certification(certification_name=certification_name)
-            db_session.add(certification)
-            db_session.commit()
-        
-        db_session.close()
+        certification_vocabulary.resolve([certification_name])
         return True
     
     except Exception as e:
         st.error(f"Error adding certification: {e}")
         return False
+
+# Start the write-behind worker once everything it calls is defined
+if WRITE_BEHIND:
+    enable_write_behind()
@@ -0,0 +1,107 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+# Get the database connection string from environment variables
+DATABASE_URL = os.environ.get('DATABASE_URL')
+if not DATABASE_URL:
+    # Provide a default SQLite connection for local development
+    DATABASE_URL = "sqlite:///chevron_skills.db"
+
+# Connection pool settings (overridable through environment variables)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+# How long SQLite waits on a locked database before failing (milliseconds)
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 30000))
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure every new SQLite connection for concurrent readers and writers"""
+    cursor = dbapi_connection.cursor()
+    # Write-ahead logging lets readers proceed while a write is in progress
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Safe with WAL and much cheaper than FULL
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # Wait for locks instead of failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def create_database_engine(url=DATABASE_URL):
+    """
+    Create the SQLAlchemy engine with pooling tuned for a multi-threaded Streamlit server
+
+    Parameters:
+    - url: Database connection string
+
+    Returns:
+    - SQLAlchemy Engine
+    """
+    if url.startswith('sqlite'):
+        pool_options = {}
+        if url not in ('sqlite://', 'sqlite:///:memory:'):
+            # File databases use a regular queue pool; in-memory ones keep SQLAlchemy's default
+            pool_options = {'pool_size': DB_POOL_SIZE, 'max_overflow': DB_MAX_OVERFLOW,
+                            'pool_timeout': DB_POOL_TIMEOUT}
+        db_engine = create_engine(
+            url,
+            connect_args={'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+            pool_pre_ping=DB_POOL_PRE_PING,
+            **pool_options
+        )
+        event.listen(db_engine, 'connect', _set_sqlite_pragmas)
+        return db_engine
+
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+
+
+# Create database engine and session factories
+engine = create_database_engine()
+Session = sessionmaker(bind=engine)
+
+# One session per thread (Streamlit runs each user session on its own thread)
+ScopedSession = scoped_session(Session)
+_scope_state = threading.local()
+
+
+@contextmanager
+def session_scope():
+    """
+    Provide a transactional scope around a series of operations
+
+    The session belongs to the current thread. It is committed when the
+    outermost scope exits normally, rolled back if an exception escapes, and
+    always closed and released back to the pool. Nested scopes on the same
+    thread join the outer transaction instead of committing on their own.
+    """
+    depth = getattr(_scope_state, 'depth', 0)
+    session = ScopedSession()
+    _scope_state.depth = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            session.commit()
+    except Exception:
+        if depth == 0:
+            session.rollback()
+        raise
+    finally:
+        _scope_state.depth = depth
+        if depth == 0:
+            ScopedSession.remove()
@@ -1,11 +1,10 @@
-import streamlit as st
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-from text_processor import extract_soft_skills, process_text
+from text_processor import process_text
+from nlp_cache import cached_sentiment, cached_soft_skills
 
 # Download necessary NLTK data if not already downloaded
 try:
@@ -229,27 +228,83 @@ def calculate_education_match(employee, role):
 
 def calculate_soft_skills_score(employee):
     """Calculate a soft skills score based on peer reviews and performance data"""
-    peer_reviews = employee.get('peer_reviews', '')
+    # Use the score stored when the peer reviews were last written, if available
+    stored_score = employee.get('soft_skills_score')
+    if stored_score is not None and not pd.isna(stored_score):
+        return float(stored_score)
     
-    # If no peer reviews are available, return a neutral score
-    if not peer_reviews:
-        return 0.5
+    return compute_soft_skills_features(employee.get('peer_reviews', ''))['soft_skills_score']
+
+def soft_skills_score_from_features(sentiment_compound, soft_skill_count):
+    """Combine a sentiment compound score (-1 to 1) and a soft skill count into a 0-1 score"""
+    # Calculate soft skills score based on sentiment and number of identified skills
+    sentiment_component = (sentiment_compound + 1) / 2  # Convert to 0-1 scale
+    skills_component = min(1.0, soft_skill_count / 5)  # Cap at 1.0
     
-    # Extract soft skills from peer reviews
-    soft_skills = extract_soft_skills(peer_reviews)
+    # Combine components (sentiment is weighted more heavily)
+    return (0.7 * sentiment_component) + (0.3 * skills_component)
+
+def compute_soft_skills_features(peer_reviews):
+    """
+    Derive the soft skills features stored alongside an employee's peer reviews
     
-    # Perform sentiment analysis on peer reviews
-    sia = SentimentIntensityAnalyzer()
-    sentiment_scores = sia.polarity_scores(peer_reviews)
+    Parameters:
+    - peer_reviews: Peer review text
     
-    # Calculate soft skills score based on sentiment and number of identified skills
-    sentiment_component = (sentiment_scores['compound'] + 1) / 2  # Convert to 0-1 scale
-    skills_component = min(1.0, len(soft_skills) / 5)  # Cap at 1.0
+    Returns:
+    - Dictionary with review_sentiment (compound score), review_soft_skills
+      (list of soft skills found) and soft_skills_score
+    """
+    # If no peer reviews are available, use a neutral score
+    if not peer_reviews or not isinstance(peer_reviews, str):
+        return {
+            'review_count': 0,
+            'review_sentiment_sum': 0.0,
+            'review_sentiment': 0.0,
+            'review_soft_skills': [],
+            'soft_skills_score': 0.5
+        }
+    
+    # Extract soft skills from peer reviews (cached by review text)
+    soft_skills = cached_soft_skills(peer_reviews)
+    
+    # Perform sentiment analysis on peer reviews (cached by review text)
+    sentiment_scores = cached_sentiment(peer_reviews)
     
-    # Combine components (sentiment is weighted more heavily)
-    soft_skills_score = (0.7 * sentiment_component) + (0.3 * skills_component)
+    return {
+        'review_count': 1,
+        'review_sentiment_sum': sentiment_scores['compound'],
+        'review_sentiment': sentiment_scores['compound'],
+        'review_soft_skills': soft_skills,
+        'soft_skills_score': soft_skills_score_from_features(sentiment_scores['compound'], len(soft_skills))
+    }
+
+def add_review_to_features(features, review_features):
+    """
+    Fold one new review into an employee's running soft skills aggregate
+    
+    Parameters:
+    - features: Current aggregate (review_count, review_sentiment_sum, review_soft_skills)
+    - review_features: Features of the new review (from compute_soft_skills_features)
+    
+    Returns:
+    - Updated aggregate with review_sentiment (mean compound) and soft_skills_score
+    """
+    if not review_features['review_count']:
+        return dict(features)
+    
+    count = (features.get('review_count') or 0) + 1
+    sentiment_sum = (features.get('review_sentiment_sum') or 0.0) + review_features['review_sentiment']
+    soft_skills = list(features.get('review_soft_skills') or [])
+    soft_skills += [skill for skill in review_features['review_soft_skills'] if skill not in soft_skills]
     
-    return soft_skills_score
+    return {
+        'review_count': count,
+        'review_sentiment_sum': sentiment_sum,
+        'review_sentiment': sentiment_sum / count,
+        'review_soft_skills': soft_skills,
+        'soft_skills_score': soft_skills_score_from_features(sentiment_sum / count, len(soft_skills))
+    }
 
 def identify_skill_gaps(employee, role):
     """Identify skills required by the role that the employee is missing"""
@@ -286,11 +341,14 @@ def match_employees_to_roles(employees=None, roles=None, top_n=5):
     Returns:
     - Dictionary with top employee matches for each role and top role matches for each employee
     """
+    # Imported here because data_manager depends on this module
+    from data_manager import get_employees, get_roles
+    
     if employees is None:
-        employees = st.session_state.employees
+        employees = get_employees()
     
     if roles is None:
-        roles = st.session_state.roles
+        roles = get_roles()
     
     # Initialize results dictionary
     results = {
@@ -0,0 +1,381 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from text_processor import (analyze_sentiment, extract_soft_skills, extract_key_phrases,
+                            extract_key_phrases_batch, normalize_review)
+
+# Bump this whenever the analyzers or their keyword lists change so that
+# previously cached results are no longer served
+ANALYZER_VERSION = "1"
+
+# Cache location and limits (overridable through environment variables)
+NLP_CACHE_PATH = os.environ.get('NLP_CACHE_PATH', 'nlp_cache.db')
+NLP_CACHE_MAX_ENTRIES = int(os.environ.get('NLP_CACHE_MAX_ENTRIES', 200000))
+NLP_CACHE_MEMORY_ENTRIES = int(os.environ.get('NLP_CACHE_MEMORY_ENTRIES', 5000))
+
+# Number of keys per SELECT ... IN (...) lookup (below SQLite's variable limit)
+LOOKUP_BATCH_SIZE = 500
+
+
+def _copied(value):
+    """Copy of a cached value (results are flat lists or dicts), so callers can't mutate the cache"""
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class NLPCache:
+    """
+    Two-level cache for NLP results: an in-memory LRU in front of a SQLite
+    key-value table. Keys are a hash of the analyzer version, the kind of
+    analysis, its parameters and the text itself, so any change to the text
+    or to the analyzers results in a new key.
+    """
+
+    def __init__(self, path=NLP_CACHE_PATH, max_entries=NLP_CACHE_MAX_ENTRIES,
+                 memory_entries=NLP_CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = None
+        self._entry_count = 0
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self):
+        """Open the SQLite file, falling back to a memory-only cache on failure"""
+        try:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS nlp_cache ("
+                "cache_key TEXT PRIMARY KEY, "
+                "kind TEXT NOT NULL, "
+                "value TEXT NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_nlp_cache_last_access ON nlp_cache (last_access)"
+            )
+            conn.commit()
+            self._entry_count = conn.execute("SELECT COUNT(*) FROM nlp_cache").fetchone()[0]
+            self._conn = conn
+        except sqlite3.Error:
+            self._conn = None
+
+    @staticmethod
+    def make_key(kind, text, params=""):
+        """Build the content-addressed key for a piece of text"""
+        digest = hashlib.sha256()
+        for part in (ANALYZER_VERSION, kind, str(params), text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _remember(self, key, value):
+        """Insert a value into the in-memory LRU, evicting the oldest entry if full"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, keys):
+        """Look up several keys on disk, returning a dict of the ones found"""
+        found = {}
+        if self._conn is None or not keys:
+            return found
+        try:
+            now = time.time()
+            for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT cache_key, value FROM nlp_cache WHERE cache_key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for cache_key, value in rows:
+                    found[cache_key] = json.loads(value)
+                if rows:
+                    # Refresh access time so eviction keeps recently used entries
+                    self._conn.executemany(
+                        "UPDATE nlp_cache SET last_access = ? WHERE cache_key = ?",
+                        [(now, cache_key) for cache_key, _ in rows]
+                    )
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
+        return found
+
+    def _write_disk(self, kind, items):
+        """Persist (key, value) pairs and enforce the size bound"""
+        if self._conn is None or not items:
+            return
+        try:
+            now = time.time()
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO nlp_cache (cache_key, kind, value, last_access) VALUES (?, ?, ?, ?)",
+                [(key, kind, json.dumps(value), now) for key, value in items]
+            )
+            self._entry_count += max(cursor.rowcount, 0)
+            self._evict()
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def _evict(self):
+        """Delete the least recently used rows once the table exceeds max_entries"""
+        if self._entry_count <= self.max_entries:
+            return
+        # Evict down to 90% of the limit so we don't evict on every insert
+        excess = self._entry_count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM nlp_cache WHERE cache_key IN "
+            "(SELECT cache_key FROM nlp_cache ORDER BY last_access LIMIT ?)",
+            (excess,)
+        )
+        self._entry_count = self._conn.execute("SELECT COUNT(*) FROM nlp_cache").fetchone()[0]
+
+    def get(self, kind, text, compute, params=""):
+        """
+        Return the cached result for text, computing and storing it on a miss
+
+        Parameters:
+        - kind: Name of the analysis (e.g. 'sentiment')
+        - text: Input text
+        - compute: Callable taking the text and returning a JSON-serializable result
+        - params: Extra parameters that influence the result (part of the key)
+
+        Returns:
+        - The analysis result
+        """
+        key = self.make_key(kind, text, params)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return _copied(self._memory[key])
+
+            found = self._read_disk([key])
+            if key in found:
+                self.hits += 1
+                self._remember(key, found[key])
+                return _copied(found[key])
+
+            self.misses += 1
+
+        value = compute(text)
+        with self._lock:
+            self._remember(key, value)
+            self._write_disk(kind, [(key, value)])
+        return _copied(value)
+
+    def get_many(self, kind, texts, compute_many, params=""):
+        """
+        Bulk version of get: resolve all texts with batched lookups and compute the misses together
+
+        Parameters:
+        - kind: Name of the analysis
+        - texts: List of input texts
+        - compute_many: Callable taking a list of texts and returning a list of results
+        - params: Extra parameters that influence the result
+
+        Returns:
+        - List of results in the same order as texts
+        """
+        keys = [self.make_key(kind, text, params) for text in texts]
+        results = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    results[key] = self._memory[key]
+            missing_keys = list({key for key in keys if key not in results})
+            results.update(self._read_disk(missing_keys))
+
+        # Compute each distinct missing text once
+        pending = OrderedDict()
+        for key, text in zip(keys, texts):
+            if key not in results and key not in pending:
+                pending[key] = text
+
+        with self._lock:
+            self.hits += len(keys) - len(pending)
+            self.misses += len(pending)
+
+        if pending:
+            computed = compute_many(list(pending.values()))
+            new_items = list(zip(pending.keys(), computed))
+            results.update(new_items)
+            with self._lock:
+                self._write_disk(kind, new_items)
+
+        with self._lock:
+            for key in keys:
+                self._remember(key, results[key])
+        return [_copied(results[key]) for key in keys]
+
+    def put_many(self, kind, items, params=""):
+        """
+        Store precomputed results without computing anything
+
+        Parameters:
+        - kind: Name of the analysis
+        - items: Iterable of (text, result) pairs
+        - params: Extra parameters that influence the result
+        """
+        keyed = [(self.make_key(kind, text, params), value) for text, value in items]
+        with self._lock:
+            for key, value in keyed:
+                self._remember(key, value)
+            self._write_disk(kind, keyed)
+
+    def clear(self):
+        """Remove every cached entry from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM nlp_cache")
+                    self._conn.commit()
+                except sqlite3.Error:
+                    pass
+            self._entry_count = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return basic cache statistics"""
+        with self._lock:
+            return {
+                'path': self.path if self._conn is not None else None,
+                'analyzer_version': ANALYZER_VERSION,
+                'disk_entries': self._entry_count,
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide NLP cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = NLPCache()
+    return _cache
+
+
+def cached_sentiment(text):
+    """Cached version of text_processor.analyze_sentiment (on normalized text)"""
+    text = normalize_review(text)
+    if not text:
+        return analyze_sentiment(text)
+    return get_cache().get('sentiment', text, analyze_sentiment)
+
+
+def cached_soft_skills(text):
+    """Cached version of text_processor.extract_soft_skills (on normalized text)"""
+    text = normalize_review(text)
+    if not text:
+        return []
+    return get_cache().get('soft_skills', text, extract_soft_skills)
+
+
+def cached_key_phrases(text, num_phrases=5):
+    """Cached version of text_processor.extract_key_phrases (on normalized text)"""
+    text = normalize_review(text)
+    if not text:
+        return []
+    return get_cache().get(
+        'key_phrases', text,
+        lambda t: extract_key_phrases(t, num_phrases=num_phrases),
+        params=num_phrases
+    )
+
+
+def warm_cache(texts, kinds=('sentiment', 'soft_skills', 'key_phrases'), num_phrases=5):
+    """
+    Precompute and store NLP results for many texts at once
+
+    Parameters:
+    - texts: Iterable of texts (empty and non-string values are skipped)
+    - kinds: Which analyses to warm
+    - num_phrases: Number of key phrases to cache per text
+
+    Returns:
+    - Number of distinct texts processed
+    """
+    texts = list({normalize_review(text) for text in texts} - {""})
+    if not texts:
+        return 0
+
+    cache = get_cache()
+    if 'sentiment' in kinds:
+        cache.get_many('sentiment', texts, lambda batch: [analyze_sentiment(t) for t in batch])
+    if 'soft_skills' in kinds:
+        cache.get_many('soft_skills', texts, lambda batch: [extract_soft_skills(t) for t in batch])
+    if 'key_phrases' in kinds:
+        cache.get_many(
+            'key_phrases', texts,
+            lambda batch: extract_key_phrases_batch(batch, num_phrases=num_phrases, use_idf=False),
+            params=num_phrases
+        )
+    return len(texts)
+
+
+def clear_cache():
+    """Remove all cached NLP results"""
+    get_cache().clear()
+
+
+def _warm_from_database():
+    """Warm the cache from every peer review and role description in the database"""
+    from data_manager import get_all_employees, get_all_roles
+    from nlp_pipeline import run_enrichment
+
+    employees = get_all_employees()
+    roles = get_all_roles()
+
+    texts = []
+    if 'peer_reviews' in employees:
+        texts.extend(employees['peer_reviews'].tolist())
+    if 'description' in roles:
+        texts.extend(roles['description'].tolist())
+
+    # Deduplicate up front; the pipeline spreads the work over all cores
+    texts = list({normalize_review(text) for text in texts} - {""})
+    run_enrichment(enumerate(texts), total=len(texts))
+    return len(texts)
+
+
+if __name__ == '__main__':
+    # Usage: python nlp_cache.py [warm|stats|clear]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'warm':
+        count = _warm_from_database()
+        print(f"Warmed NLP cache with {count} texts")
+    elif command == 'clear':
+        clear_cache()
+        print("NLP cache cleared")
+    elif command == 'stats':
+        print(json.dumps(get_cache().stats(), indent=2))
+    else:
+        print("Usage: python nlp_cache.py [warm|stats|clear]")
+        sys.exit(1)
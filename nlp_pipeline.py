@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from itertools import islice
+
+import nltk
+
+from nlp_worker import enrich_chunk, init_worker
+from nlp_cache import get_cache
+
+# Stages applied to every review, in order
+PIPELINE_STAGES = ('normalize', 'soft_skills', 'sentiment', 'key_phrases')
+
+# Default number of reviews per chunk sent to a worker process
+DEFAULT_CHUNK_SIZE = 500
+
+# Below this many records the pool start-up cost outweighs the parallelism
+MIN_PARALLEL_RECORDS = 2000
+
+
+def write_to_cache(results, num_phrases=5):
+    """
+    Default writer: store a chunk of enrichment results in the NLP cache in bulk
+
+    Parameters:
+    - results: List of (record_id, enrichment) pairs
+    - num_phrases: Number of key phrases the results were computed with
+    """
+    enriched = [item for _, item in results if item['text']]
+    if not enriched:
+        return
+
+    cache = get_cache()
+    cache.put_many('soft_skills', [(item['text'], item['soft_skills']) for item in enriched])
+    cache.put_many('sentiment', [(item['text'], item['sentiment']) for item in enriched])
+    cache.put_many(
+        'key_phrases',
+        [(item['text'], item['key_phrases']) for item in enriched],
+        params=num_phrases
+    )
+
+
+def _chunks(records, chunk_size):
+    """Yield lists of at most chunk_size (record_id, text) pairs"""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_enrichment(records, total=None, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None,
+                   max_in_flight=None, num_phrases=5, writer=None, progress_callback=None, nltk_data=None):
+    """
+    Run the NLP enrichment pipeline over many reviews using a process pool
+
+    Records are consumed lazily in chunks. At most max_in_flight chunks are
+    submitted at once, so memory stays bounded however large the input is,
+    and each finished chunk is handed to the writer in one call.
+
+    Parameters:
+    - records: Iterable of (record_id, text) pairs
+    - total: Total number of records, if known (only used for progress reporting)
+    - chunk_size: Number of reviews per chunk
+    - max_workers: Number of worker processes (default: number of CPUs)
+    - max_in_flight: Maximum number of submitted but unfinished chunks (default: 2 per worker)
+    - num_phrases: Number of key phrases to extract per review
+    - writer: Callable receiving a list of (record_id, enrichment) pairs per chunk
+      (default: store results in the NLP cache)
+    - progress_callback: Callable receiving (records_done, total) after each chunk
+    - nltk_data: Directories the workers search for NLTK data such as the
+      sentiment lexicon (default: this process's nltk.data.path)
+
+    Returns:
+    - Number of records processed
+    """
+    if writer is None:
+        writer = lambda results: write_to_cache(results, num_phrases=num_phrases)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = 2 * max_workers
+
+    done = 0
+
+    def handle(ids, enriched):
+        nonlocal done
+        writer(list(zip(ids, enriched)))
+        done += len(ids)
+        if progress_callback:
+            progress_callback(done, total)
+
+    # Small inputs (or a single worker) are processed inline
+    if max_workers <= 1 or (total is not None and total < MIN_PARALLEL_RECORDS):
+        for chunk in _chunks(records, chunk_size):
+            ids, texts = zip(*chunk)
+            handle(ids, enrich_chunk(list(texts), num_phrases))
+        return done
+
+    # Workers run nlp_worker, which does not download anything, so they are
+    # pointed at the NLTK data this process already has
+    if nltk_data is None:
+        nltk_data = list(nltk.data.path)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(nltk_data,)) as executor:
+        in_flight = {}
+        for chunk in _chunks(records, chunk_size):
+            # Backpressure: wait for a slot before submitting another chunk
+            while len(in_flight) >= max_in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    handle(in_flight.pop(future), future.result())
+
+            ids, texts = zip(*chunk)
+            in_flight[executor.submit(enrich_chunk, list(texts), num_phrases)] = ids
+
+        for future in as_completed(list(in_flight)):
+            handle(in_flight.pop(future), future.result())
+
+    return done
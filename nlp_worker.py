@@ -0,0 +1,45 @@
+# Worker process entry points for nlp_pipeline. Only side-effect-free modules
+# are imported here, so starting a worker neither imports streamlit nor
+# downloads NLTK data.
+from text_analysis import (normalize_review, extract_soft_skills, analyze_sentiment, extract_key_phrases_batch,
+                           use_nltk_data)
+
+
+def init_worker(nltk_data=None):
+    """Process pool initializer: search the parent's NLTK data directories"""
+    use_nltk_data(nltk_data)
+
+
+def enrich_chunk(texts, num_phrases=5):
+    """
+    Run every pipeline stage over one chunk of review texts
+
+    Parameters:
+    - texts: List of raw review texts
+    - num_phrases: Number of key phrases to extract per review
+
+    Returns:
+    - List of dictionaries (one per text) with the normalized text, soft skills,
+      sentiment scores and key phrases
+    """
+    # Stage 1: normalize
+    normalized = [normalize_review(text) for text in texts]
+
+    # Stage 2: soft skills
+    soft_skills = [extract_soft_skills(text) for text in normalized]
+
+    # Stage 3: sentiment (analyzer is created once per worker process)
+    sentiment = [analyze_sentiment(text) for text in normalized]
+
+    # Stage 4: key phrases, batched over the whole chunk
+    key_phrases = extract_key_phrases_batch(normalized, num_phrases=num_phrases, use_idf=False)
+
+    return [
+        {
+            'text': normalized[i],
+            'soft_skills': soft_skills[i],
+            'sentiment': sentiment[i],
+            'key_phrases': key_phrases[i]
+        }
+        for i in range(len(texts))
+    ]
@@ -0,0 +1,1026 @@
+import datetime
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype
+from pandas.api.indexers import check_array_indexer
+from pandas.api.types import union_categoricals
+
+
+def empty_bitmap(size):
+    """Return an all-zero bitmap for size rows (one bit per row, packed into bytes)"""
+    return np.zeros((size + 7) // 8, dtype=np.uint8)
+
+
+def full_bitmap(size):
+    """Return a bitmap with the first size bits set"""
+    return np.packbits(np.ones(size, dtype=bool), bitorder='little')
+
+
+def bitmap_from_mask(mask):
+    """Pack a boolean row mask into a bitmap"""
+    return np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+
+
+def bitmap_positions(bitmap, size):
+    """Return the row positions whose bit is set"""
+    return np.flatnonzero(np.unpackbits(bitmap, count=size, bitorder='little'))
+
+
+class StringInterner:
+    """
+    Append-only mapping between strings and int32 IDs
+
+    One interner is shared by every list column of every table, so list
+    arrays can be concatenated and compared without translating IDs, and
+    each distinct skill or certification name is stored once per process.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self.names = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def ids(self, names):
+        """Return the IDs of names as an int32 array, assigning IDs to new names"""
+        ids = self._ids
+        missing = [name for name in set(names) if name not in ids]
+        if missing:
+            with self._lock:
+                for name in missing:
+                    if name not in ids:
+                        self.names.append(str(name))
+                        ids[name] = len(self.names) - 1
+        return np.fromiter((ids[name] for name in names), dtype=np.int32, count=len(names))
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the names and the lookup dictionary"""
+        return sum(sys.getsizeof(name) for name in self.names) + sys.getsizeof(self._ids) + \
+            sys.getsizeof(self.names)
+
+
+interner = StringInterner()
+
+
+@register_extension_dtype
+class StringListDtype(ExtensionDtype):
+    """pandas dtype of list-of-strings columns stored as StringListArray"""
+
+    name = 'string_list'
+    type = list
+    kind = 'O'
+    na_value = None
+
+    @classmethod
+    def construct_array_type(cls):
+        return StringListArray
+
+    def __repr__(self):
+        return 'StringListDtype()'
+
+
+class StringListArray(ExtensionArray):
+    """
+    Column of string lists in CSR layout: row i holds the interned IDs
+    ids[offsets[i]:offsets[i + 1]]
+
+    Compared with a column of Python lists, a row costs one offset instead of
+    a list object plus a pointer and a string per item. Cells are
+    materialized as lists when read, so code that iterates the column, reads
+    a row or converts the frame keeps working unchanged. Missing cells
+    (None) are tracked in a mask and read as None.
+    """
+
+    def __init__(self, offsets, ids, missing=None):
+        self._offsets = offsets
+        self._ids = ids
+        self._missing = missing
+
+    @staticmethod
+    def _offset_dtype(total):
+        return np.int32 if total < 2 ** 31 else np.int64
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        """Build the array from lists (or other sequences) of strings and None; raises TypeError otherwise"""
+        if isinstance(scalars, cls):
+            return scalars.copy() if copy else scalars
+        cells = list(scalars)
+        missing = np.fromiter((cell is None or (isinstance(cell, float) and np.isnan(cell)) for cell in cells),
+                              dtype=bool, count=len(cells))
+        lengths = np.fromiter((0 if is_missing else len(cell) for cell, is_missing in zip(cells, missing)),
+                              dtype=np.int64, count=len(cells))
+        flat = [item for cell, is_missing in zip(cells, missing) if not is_missing for item in cell]
+        if not all(isinstance(item, str) for item in flat):
+            raise TypeError("StringListArray only holds lists of strings")
+        offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(offsets.astype(cls._offset_dtype(len(flat))), interner.ids(flat),
+                   missing if missing.any() else None)
+
+    @classmethod
+    def from_arrow(cls, column):
+        """Build the array from an Arrow list<string> column without creating Python lists"""
+        column = column.combine_chunks()
+        encoded = column.flatten().dictionary_encode()
+        mapping = interner.ids(encoded.dictionary.to_pylist())
+        ids = mapping[encoded.indices.to_numpy()] if len(mapping) else np.zeros(0, dtype=np.int32)
+        offsets = column.offsets.to_numpy().astype(np.int64)
+        offsets -= offsets[0]
+        missing = column.is_null().to_numpy(zero_copy_only=False)
+        return cls(offsets.astype(cls._offset_dtype(len(ids))), ids.astype(np.int32),
+                   missing if missing.any() else None)
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls._from_sequence([None if value is None else list(value) for value in values])
+
+    def _values_for_factorize(self):
+        values = np.empty(len(self), dtype=object)
+        for i, cell in enumerate(self):
+            values[i] = None if cell is None else tuple(cell)
+        return values, None
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        to_concat = list(to_concat)
+        shifts = np.cumsum([0] + [len(array._ids) for array in to_concat])
+        offsets = np.concatenate([array._offsets[:-1].astype(np.int64) + shift
+                                  for array, shift in zip(to_concat, shifts)] + [shifts[-1:]])
+        missing = None
+        if any(array._missing is not None for array in to_concat):
+            missing = np.concatenate([array.isna() for array in to_concat])
+        return cls(offsets.astype(cls._offset_dtype(shifts[-1])),
+                   np.concatenate([array._ids for array in to_concat]).astype(np.int32), missing)
+
+    @property
+    def dtype(self):
+        return StringListDtype()
+
+    @property
+    def nbytes(self):
+        return self._offsets.nbytes + self._ids.nbytes + (0 if self._missing is None else self._missing.nbytes)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __iter__(self):
+        names = interner.names
+        flat = [names[i] for i in self._ids.tolist()]
+        offsets = self._offsets.tolist()
+        missing = self.isna()
+        for i in range(len(self)):
+            yield None if missing[i] else flat[offsets[i]:offsets[i + 1]]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            position = int(item) + len(self) if item < 0 else int(item)
+            if self._missing is not None and self._missing[position]:
+                return None
+            names = interner.names
+            return [names[i] for i in self._ids[self._offsets[position]:self._offsets[position + 1]].tolist()]
+        if isinstance(item, slice):
+            return self._take_positions(np.arange(len(self))[item])
+        return self._take_positions(np.arange(len(self))[check_array_indexer(self, item)])
+
+    def _gather(self, starts, lengths, source_ids, missing):
+        """New array whose row i is source_ids[starts[i]:starts[i] + lengths[i]]"""
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        gather = np.repeat(starts.astype(np.int64) - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return StringListArray(offsets.astype(self._offset_dtype(offsets[-1])), source_ids[gather],
+                               missing if missing is not None and missing.any() else None)
+
+    def _take_positions(self, positions, fill=None):
+        starts = self._offsets[positions]
+        lengths = self._offsets[positions + 1] - starts
+        missing = None if self._missing is None else self._missing[positions]
+        if fill is not None and fill.any():
+            lengths = np.where(fill, 0, lengths)
+            missing = fill if missing is None else missing | fill
+        return self._gather(starts, lengths, self._ids, missing)
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        indices = np.asarray(indices, dtype=np.intp)
+        if not allow_fill:
+            return self._take_positions(np.arange(len(self))[indices])
+        if (indices < -1).any():
+            raise ValueError("Invalid value in 'indices': must be >= -1 when allow_fill is True")
+        fill = indices == -1
+        if len(self) == 0 and not fill.all():
+            raise IndexError("cannot do a non-empty take from an empty array")
+        return self._take_positions(np.where(fill, 0, indices), fill)
+
+    def replaced(self, positions, values):
+        """Return a copy with the cells at positions replaced by values (lists of strings or None)"""
+        update = StringListArray._from_sequence(values)
+        positions = np.asarray(positions, dtype=np.intp)
+        starts = self._offsets[:-1].astype(np.int64)
+        lengths = np.diff(self._offsets).astype(np.int64)
+        starts[positions] = update._offsets[:-1].astype(np.int64) + len(self._ids)
+        lengths[positions] = np.diff(update._offsets)
+        missing = self.isna()
+        missing[positions] = update.isna()
+        return self._gather(starts, lengths, np.concatenate([self._ids, update._ids]), missing)
+
+    def __setitem__(self, key, value):
+        if not isinstance(key, (int, np.integer, slice)):
+            key = check_array_indexer(self, key)
+        positions = np.atleast_1d(np.arange(len(self))[key])
+        if np.ndim(key) == 0 and not isinstance(key, slice):
+            values = [value]
+        elif value is None or all(isinstance(item, str) for item in value):
+            # One list (or None) written to every selected cell
+            values = [value] * len(positions)
+        else:
+            values = list(value)
+        updated = self.replaced(positions, values)
+        self._offsets, self._ids, self._missing = updated._offsets, updated._ids, updated._missing
+
+    def isna(self):
+        return np.zeros(len(self), dtype=bool) if self._missing is None else self._missing.copy()
+
+    def _explode(self):
+        """Series.explode support: one row per item, with empty and missing cells as a single NaN row"""
+        lengths = np.where(self.isna(), 0, np.diff(self._offsets).astype(np.int64))
+        counts = np.maximum(lengths, 1)
+        present = lengths > 0
+        row_lengths = lengths[present]
+        # Within-row position of every item, then where it comes from and where it goes
+        within = np.arange(row_lengths.sum()) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+        source = np.repeat(self._offsets[:-1][present].astype(np.int64), row_lengths) + within
+        target = np.repeat((np.cumsum(counts) - counts)[present], row_lengths) + within
+        values = np.full(counts.sum(), np.nan, dtype=object)
+        names = interner.names
+        values[target] = [names[i] for i in self._ids[source].tolist()]
+        return values, counts.astype(np.uint64)
+
+    def copy(self):
+        return StringListArray(self._offsets.copy(), self._ids.copy(),
+                               None if self._missing is None else self._missing.copy())
+
+    def __array__(self, dtype=None, copy=None):
+        result = np.empty(len(self), dtype=object)
+        for i, cell in enumerate(self):
+            result[i] = cell
+        return result if dtype is None or np.dtype(dtype) == object else result.astype(dtype)
+
+    def astype(self, dtype, copy=True):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, StringListDtype):
+            return self.copy() if copy else self
+        if isinstance(dtype, pd.StringDtype):
+            return pd.array([None if cell is None else str(cell) for cell in self], dtype=dtype)
+        if dtype.kind in 'US':
+            return np.array([str(cell) for cell in self], dtype=dtype)
+        return self.__array__(dtype)
+
+    def __eq__(self, other):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+        if isinstance(other, (list, tuple)) and not isinstance(other, StringListArray) and \
+                all(isinstance(item, str) for item in other):
+            return np.array([cell == list(other) for cell in self], dtype=bool)
+        return np.array([left == (None if right is None else list(right))
+                         for left, right in zip(self, other)], dtype=bool)
+
+    def __arrow_array__(self, type=None):
+        import pyarrow as pa
+
+        values = pa.array(interner.names, type=pa.string()).take(pa.array(self._ids))
+        mask = None if self._missing is None else pa.array(self._missing)
+        result = pa.ListArray.from_arrays(pa.array(self._offsets.astype(np.int32)), values, mask=mask)
+        return result if type is None or result.type == type else result.cast(type)
+
+
+def compact_frame(frame, categorical=(), lists=(), float32=()):
+    """
+    Return the frame with a compact in-memory representation of some columns
+
+    Parameters:
+    - frame: DataFrame to compact (not modified)
+    - categorical: Low-cardinality string columns, stored as pandas categoricals
+    - lists: List-of-strings columns, stored as StringListArray (columns holding
+      anything else are left as they are)
+    - float32: Numeric columns, stored as float32
+
+    Returns:
+    - DataFrame with the same columns and values
+    """
+    columns = {}
+    for column in categorical:
+        if column in frame and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            columns[column] = frame[column].astype('category')
+    for column in lists:
+        if column in frame and not isinstance(frame[column].array, StringListArray):
+            try:
+                columns[column] = pd.Series(StringListArray._from_sequence(frame[column]), index=frame.index)
+            except TypeError:
+                pass
+    for column in float32:
+        if column in frame:
+            try:
+                columns[column] = frame[column].astype(np.float32)
+            except (TypeError, ValueError):
+                pass
+    if not columns:
+        return frame
+    # Rebuilt column by column: untouched columns would otherwise be views of
+    # pandas' 2-D object block and keep the replaced list columns alive
+    return pd.DataFrame({column: columns[column] if column in columns else frame[column].copy()
+                         for column in frame.columns})
+
+
+def plain_frame(frame):
+    """Return the frame with categoricals, string lists and float32 columns in their plain pandas form"""
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype) or isinstance(values.array, StringListArray):
+            columns[column] = pd.Series(np.asarray(values.array, dtype=object), index=frame.index)
+        elif values.dtype == np.float32:
+            columns[column] = values.astype(np.float64)
+    return frame.assign(**columns) if columns else frame
+
+
+def frame_memory(frame):
+    """
+    Bytes used by each column of a frame, counting the contents of list cells
+
+    (pandas' deep memory usage counts a list cell as the list object only.)
+    """
+    usage = frame.memory_usage(deep=True, index=False)
+    for column in frame.columns:
+        if frame[column].dtype == object:
+            usage[column] += sum(sys.getsizeof(item) for cell in frame[column]
+                                 if isinstance(cell, list) for item in cell)
+    return usage
+
+
+def _concat_column(values, appended):
+    """Append a column of new values to a column, keeping its compact representation"""
+    if len(values) == 0:
+        return appended
+    array = values.array
+    try:
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return union_categoricals([array, pd.Categorical(appended.to_numpy(dtype=object))], ignore_order=True)
+        if isinstance(array, StringListArray):
+            return StringListArray._concat_same_type([array, StringListArray._from_sequence(appended)])
+        if values.dtype == np.float32:
+            return np.concatenate([values.to_numpy(), appended.astype(np.float32).to_numpy()])
+    except (TypeError, ValueError):
+        pass
+    return pd.concat([values, appended], ignore_index=True).array
+
+
+def _replace_values(series, positions, values):
+    """Return a copy of a column's values with values written at positions"""
+    if isinstance(series.array, StringListArray):
+        try:
+            return series.array.replaced(positions, values)
+        except TypeError:
+            pass
+    elif isinstance(series.dtype, pd.CategoricalDtype):
+        new = pd.Index(pd.unique(pd.Series(list(values), dtype=object).dropna()))
+        try:
+            result = series.array.add_categories(new[~new.isin(series.cat.categories)])
+            result[positions] = values
+            return result
+        except (TypeError, ValueError):
+            pass
+    result = series.to_numpy(copy=True)
+    if result.dtype.kind == 'f':
+        values = [np.nan if value is None else value for value in values]
+    try:
+        result[positions] = values
+    except (TypeError, ValueError):
+        # e.g. None written into a float column: fall back to object dtype
+        result = series.to_numpy(dtype=object, copy=True)
+        result[positions] = values
+    return result
+
+
+class BitmapIndex:
+    """
+    Per-value row bitmaps for one column of a snapshot
+
+    Scalar columns (e.g. department) get one bitmap per distinct value; list
+    columns (e.g. skills) get one bitmap per element. Bitmaps are packed one
+    bit per row, so combining criteria is a handful of vectorized byte-wise
+    AND/OR operations. Updates are copy-on-write per bitmap, so readers of an
+    older snapshot are never affected.
+    """
+
+    def __init__(self, bitmaps, size):
+        self._bitmaps = bitmaps
+        self.size = size
+
+    @classmethod
+    def build(cls, values):
+        """Build the index from a column (Series of scalars or lists)"""
+        array = values.array if isinstance(values, pd.Series) else values
+        if isinstance(array, StringListArray):
+            return cls._build_grouped(interner.names, array._ids,
+                                      np.repeat(np.arange(len(array)), np.diff(array._offsets)), len(array))
+        if isinstance(array, pd.Categorical):
+            present = array.codes >= 0
+            return cls._build_grouped(array.categories, array.codes[present],
+                                      np.flatnonzero(present), len(array))
+
+        size = len(values)
+        positions = {}
+        for position, value in enumerate(values):
+            for item in cls._items(value):
+                positions.setdefault(item, []).append(position)
+
+        bitmaps = {}
+        for item, rows in positions.items():
+            mask = np.zeros(size, dtype=bool)
+            mask[rows] = True
+            bitmaps[item] = bitmap_from_mask(mask)
+        return cls(bitmaps, size)
+
+    @classmethod
+    def _build_grouped(cls, names, codes, rows, size):
+        """Build the index from integer item codes and the row of each (CSR lists and categoricals)"""
+        order = np.argsort(codes, kind='stable')
+        codes, rows = codes[order], rows[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        bitmaps = {}
+        for start, end in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(codes)]])):
+            if start == end:
+                continue
+            mask = np.zeros(size, dtype=bool)
+            mask[rows[start:end]] = True
+            bitmaps[names[codes[start]]] = bitmap_from_mask(mask)
+        return cls(bitmaps, size)
+
+    @staticmethod
+    def _items(value):
+        """Return the distinct indexable items of a cell"""
+        if isinstance(value, (list, tuple, set)):
+            return set(value)
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return set()
+        return {value}
+
+    def get(self, item):
+        """Return the bitmap of rows containing item (all zeros if none)"""
+        bitmap = self._bitmaps.get(item)
+        return empty_bitmap(self.size) if bitmap is None else bitmap
+
+    def all_of(self, items):
+        """Bitmap of rows containing every one of items"""
+        result = full_bitmap(self.size)
+        for item in items:
+            result = result & self.get(item)
+        return result
+
+    def any_of(self, items):
+        """Bitmap of rows containing at least one of items"""
+        result = empty_bitmap(self.size)
+        for item in items:
+            result = result | self.get(item)
+        return result
+
+    def patched(self, changes, size):
+        """
+        Return a new index with rows changed and grown to size rows
+
+        changes is a list of (position, old_value, new_value); old_value is
+        None for appended rows. Only the bitmaps of affected items are copied.
+        """
+        nbytes = (size + 7) // 8
+        bitmaps = dict(self._bitmaps)
+        copied = set()
+
+        def writable(item):
+            if item not in copied:
+                bitmap = bitmaps.get(item)
+                new_bitmap = np.zeros(nbytes, dtype=np.uint8)
+                if bitmap is not None:
+                    new_bitmap[:len(bitmap)] = bitmap
+                bitmaps[item] = new_bitmap
+                copied.add(item)
+            return bitmaps[item]
+
+        for position, old_value, new_value in changes:
+            old_items, new_items = self._items(old_value), self._items(new_value)
+            byte, bit = position >> 3, np.uint8(1 << (position & 7))
+            for item in old_items - new_items:
+                writable(item)[byte] &= ~bit
+            for item in new_items - old_items:
+                writable(item)[byte] |= bit
+
+        if size != self.size:
+            # Grow the bitmaps that weren't touched (new rows are zero in them)
+            for item, bitmap in bitmaps.items():
+                if item not in copied and len(bitmap) < nbytes:
+                    bitmaps[item] = np.concatenate([bitmap, np.zeros(nbytes - len(bitmap), dtype=np.uint8)])
+        return BitmapIndex(bitmaps, size)
+
+
+class AppendBuffer:
+    """
+    Rows appended to a table since its frame was last consolidated
+
+    The buffer is shared by successive snapshots: each one only sees the
+    first tail_size rows, so appending for a newer snapshot never changes
+    what an older one returns. Appends are made by a single writer at a time
+    (under SharedTable's load lock).
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.positions = {}
+
+    def append(self, key, records):
+        """Append records (dictionaries of full rows) and remember where each key went"""
+        for record in records:
+            self.positions[record[key]] = len(self.rows)
+            self.rows.append(record)
+
+
+class _Consolidated:
+    """A frame, its key index and bitmaps, covering the first `consumed` buffered rows"""
+
+    def __init__(self, frame, index, bitmaps, consumed):
+        self.frame = frame
+        self.index = index
+        self.bitmaps = bitmaps
+        self.consumed = consumed
+
+
+class TableSnapshot:
+    """
+    Immutable view of a table at one data version: the frame, a hash index
+    from primary key to row position, and per-column bitmap indexes that are
+    built on first use
+
+    Appended rows go to an AppendBuffer instead of being concatenated onto the
+    frame one at a time. They are merged into the frame lazily, the first
+    time someone reads the frame, or once the buffer grows as large as the
+    frame itself, so appending n rows costs O(n) overall.
+    """
+
+    def __init__(self, frame, key, version, bitmaps=None, index=None, buffer=None, tail_size=0):
+        self.key = key
+        self.version = version
+        self._state = _Consolidated(frame, pd.Index(frame[key]) if index is None else index,
+                                    dict(bitmaps or {}), 0)
+        self._buffer = AppendBuffer() if buffer is None else buffer
+        self._tail_size = tail_size
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        state = self._state
+        return len(state.frame) + self._tail_size - state.consumed
+
+    def _consolidate(self):
+        """Merge the buffered rows visible to this snapshot into its frame"""
+        state = self._state
+        if state.consumed == self._tail_size:
+            return state
+        with self._lock:
+            state = self._state
+            if state.consumed == self._tail_size:
+                return state
+            records = self._buffer.rows[state.consumed:self._tail_size]
+            appended = pd.DataFrame.from_records(records, columns=state.frame.columns)
+            frame = pd.DataFrame({
+                column: _concat_column(state.frame[column], appended[column]) for column in state.frame.columns
+            }) if len(state.frame) else appended
+            index = state.index.append(pd.Index(appended[self.key]))
+            offset = len(state.frame)
+            bitmaps = {
+                column: bitmap_index.patched(
+                    [(offset + i, None, value) for i, value in enumerate(appended[column])], len(frame)
+                )
+                for column, bitmap_index in state.bitmaps.items()
+            }
+            # Publish frame, index and bitmaps together so readers never see a mix
+            state = _Consolidated(frame, index, bitmaps, self._tail_size)
+            self._state = state
+        return state
+
+    @property
+    def frame(self):
+        """The full table as a DataFrame (merging buffered appends on first access)"""
+        return self._consolidate().frame
+
+    @property
+    def index(self):
+        """Hash index from primary key to row position in frame"""
+        return self._consolidate().index
+
+    def _buffered(self, record_id):
+        """Return the offset of a key among the buffered rows not yet in the frame, or None"""
+        offset = self._buffer.positions.get(record_id)
+        if offset is not None and self._state.consumed <= offset < self._tail_size:
+            return offset
+        return None
+
+    def get(self, record_id):
+        """Return the row with the given key in O(1), or None"""
+        state = self._state
+        try:
+            return state.frame.iloc[state.index.get_loc(record_id)]
+        except KeyError:
+            pass
+        offset = self._buffered(record_id)
+        if offset is None:
+            return None
+        # Served from the buffer without consolidating the whole table
+        position = len(state.frame) + offset - state.consumed
+        return pd.Series(self._buffer.rows[offset], index=state.frame.columns, name=position)
+
+    def get_many(self, record_ids):
+        """Return the rows with the given keys in the order requested (unknown keys are skipped)"""
+        record_ids = list(record_ids)
+        if any(self._buffered(record_id) is not None for record_id in record_ids):
+            state = self._consolidate()
+        else:
+            state = self._state
+        positions = state.index.get_indexer(pd.Index(record_ids, dtype=object))
+        return state.frame.take(positions[positions >= 0])
+
+    def bitmap(self, column):
+        """Return the BitmapIndex of a column, building it on first use"""
+        state = self._consolidate()
+        index = state.bitmaps.get(column)
+        if index is None:
+            with self._lock:
+                index = state.bitmaps.get(column)
+                if index is None:
+                    index = BitmapIndex.build(state.frame[column])
+                    state.bitmaps[column] = index
+        return index
+
+    def select(self, bitmap):
+        """Project the rows selected by a bitmap (the only copy made by a filter)"""
+        frame = self.frame
+        return frame.take(bitmap_positions(bitmap, len(frame)))
+
+    def patched(self, records, version):
+        """
+        Return a new snapshot with records (dictionaries of full rows) updated
+        in place or appended, carrying the bitmap indexes forward incrementally
+        """
+        records = list(records)
+        if not records:
+            return TableSnapshot._sharing(self, version, self._tail_size)
+
+        keys = [record[self.key] for record in records]
+        known = pd.Index(keys, dtype=object)
+        state = self._state
+        updated = state.index.get_indexer(known) >= 0
+        updated |= np.array([self._buffered(key) is not None for key in keys], dtype=bool)
+
+        if not updated.any():
+            # Appends only: extend the buffer, sharing the frame with this snapshot
+            buffer = self._buffer
+            if len(buffer.rows) != self._tail_size:
+                # Never overwrite rows another snapshot can see
+                buffer = AppendBuffer()
+                buffer.append(self.key, self._buffer.rows[state.consumed:self._tail_size])
+                snapshot = TableSnapshot(state.frame, self.key, version, state.bitmaps, state.index,
+                                         buffer, len(buffer.rows))
+            else:
+                snapshot = TableSnapshot._sharing(self, version, self._tail_size)
+            buffer.append(self.key, records)
+            snapshot._tail_size = len(buffer.rows)
+            if len(snapshot) - len(state.frame) > max(len(state.frame), 1):
+                # Consolidate geometrically so the buffer never outgrows the frame
+                snapshot._consolidate()
+            return snapshot
+
+        state = self._consolidate()
+        positions = state.index.get_indexer(known)
+        updated = positions >= 0
+        update_positions = positions[updated]
+        update_records = [record for record, is_update in zip(records, updated) if is_update]
+
+        frame = state.frame
+        columns = {column: np.empty(len(update_records), dtype=object) for column in frame.columns}
+        for i, record in enumerate(update_records):
+            for column, values in columns.items():
+                values[i] = record.get(column)
+        frame = pd.DataFrame({
+            column: _replace_values(frame[column], update_positions, columns[column])
+            for column in frame.columns
+        })
+
+        # Bitmaps: (position, old value, new value) per changed cell
+        bitmaps = {}
+        for column, bitmap_index in state.bitmaps.items():
+            changes = [(position, state.frame[column].iat[position], value)
+                       for position, value in zip(update_positions, columns[column])]
+            bitmaps[column] = bitmap_index.patched(changes, len(frame))
+        snapshot = TableSnapshot(frame, self.key, version, bitmaps, state.index)
+
+        appended = [record for record, is_update in zip(records, updated) if not is_update]
+        return snapshot.patched(appended, version)
+
+    def without(self, record_ids, version):
+        """Return a new snapshot without the rows with the given keys (bitmaps are rebuilt on next use)"""
+        state = self._consolidate()
+        positions = state.index.get_indexer(pd.Index(list(record_ids), dtype=object))
+        if not (positions >= 0).any():
+            return TableSnapshot._sharing(self, version, self._tail_size)
+        keep = np.ones(len(state.frame), dtype=bool)
+        keep[positions[positions >= 0]] = False
+        return TableSnapshot(state.frame[keep].reset_index(drop=True), self.key, version)
+
+    @staticmethod
+    def _sharing(snapshot, version, tail_size):
+        """A new snapshot over the same consolidated state and buffer"""
+        state = snapshot._state
+        new = TableSnapshot.__new__(TableSnapshot)
+        new.key = snapshot.key
+        new.version = version
+        new._state = state
+        new._buffer = snapshot._buffer
+        new._tail_size = tail_size
+        new._lock = threading.Lock()
+        return new
+
+
+class SharedTable:
+    """
+    Process-wide, read-only snapshot of one table, shared by every session
+
+    The snapshot carries a data version. Writers either patch the snapshot
+    with the rows they changed or deleted (refresh, remove) or, when that isn't possible, bump the
+    version so the next reader reloads the table once on behalf of all
+    sessions. Readers must treat the returned DataFrame as read-only and copy
+    it before modifying it.
+
+    Writes made by other processes are picked up by delta sync: given a
+    delta callable, readers merge the rows changed since the last load or
+    sync at most every sync_interval seconds. delta(since) returns
+    (records, deleted_keys) for changes at or after the datetime since, or
+    None if it can't tell (the table is then reloaded). stamp names the
+    column holding each row's modification time; rows whose stamp matches the
+    snapshot are already known and skipped.
+
+    compact(frame), if given, converts each loaded frame to its in-memory
+    representation (e.g. compact_frame); later snapshots keep those dtypes.
+
+    With delta sync, the table can also start from a saved copy instead of
+    the database: seed() returns (frame, watermark) from a snapshot file, or
+    None, and the first load merges the delta since that watermark. After the
+    table changes, persist(frame, watermark) is called on a background thread
+    (at most every persist_interval seconds) to refresh the saved copy.
+    """
+
+    def __init__(self, name, loader, key, delta=None, stamp=None, sync_interval=5.0, seed=None,
+                 persist=None, persist_interval=60.0, compact=None):
+        self.name = name
+        self.loader = loader
+        self.key = key
+        self.compact = compact
+        self.delta = delta
+        self.stamp = stamp
+        self.sync_interval = sync_interval
+        self.seed = seed
+        self.persist = persist
+        self.persist_interval = persist_interval
+        self._snapshot = None
+        self._version = 0
+        self._watermark = None
+        self._synced = 0.0
+        self._persisted = None
+        self._persisting = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def version(self):
+        """Current data version (increases with every committed write)"""
+        return self._version
+
+    def current(self):
+        """Return the published snapshot if it is up to date, else None (never loads)"""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        return None
+
+    def is_current(self):
+        """Return True if a snapshot is loaded and no write happened since"""
+        return self.current() is not None
+
+    def bump(self):
+        """Record that the table changed; the snapshot is reloaded on next read"""
+        with self._lock:
+            self._version += 1
+            return self._version
+
+    def load(self):
+        """
+        Return the current TableSnapshot, reloading the table if it is stale
+
+        Only one thread reloads at a time; concurrent readers wait for it and
+        then share the result instead of each loading their own copy.
+        """
+        snapshot = self.current()
+        if snapshot is not None and self._sync_due():
+            snapshot = self.sync()
+        if snapshot is None:
+            seeded = False
+            with self._load_lock:
+                # Another thread may have reloaded while we were waiting
+                snapshot = self.current()
+                if snapshot is None:
+                    # Writes that land during the load make this snapshot stale again
+                    version = self._version
+                    saved = self._seed() if self._snapshot is None else None
+                    if saved is not None:
+                        frame, watermark = saved
+                        snapshot = TableSnapshot(self._compacted(frame), self.key, version)
+                        self._snapshot = snapshot
+                        # Due immediately: the delta since the saved copy is merged below
+                        self._watermark, self._synced = watermark, 0.0
+                        seeded = True
+                    else:
+                        started = datetime.datetime.now()
+                        snapshot = TableSnapshot(self._compacted(self.loader()), self.key, version)
+                        self._snapshot = snapshot
+                        self._watermark, self._synced = started, time.monotonic()
+                        self._save(snapshot)
+            if seeded:
+                # Falls back to a full load if the delta can't be determined
+                snapshot = self.sync() or self.load()
+        return snapshot
+
+    def _seed(self):
+        """Return (frame, watermark) from the saved copy, or None to load from the loader"""
+        if self.seed is None or self.delta is None:
+            return None
+        return self.seed()
+
+    def _save(self, snapshot):
+        """Refresh the saved copy in the background, at most every persist_interval seconds"""
+        if self.persist is None:
+            return
+        # Tested and set under the lock so concurrent refreshes start at most one writer
+        with self._lock:
+            if self._persisting:
+                return
+            if self._persisted is not None and time.monotonic() - self._persisted < self.persist_interval:
+                return
+            self._persisting, self._persisted = True, time.monotonic()
+            watermark = self._watermark
+
+        def run():
+            try:
+                self.persist(snapshot.frame, watermark)
+            finally:
+                with self._lock:
+                    self._persisting = False
+
+        threading.Thread(target=run, name=f'persist-{self.name}', daemon=True).start()
+
+    def _compacted(self, frame):
+        """A freshly loaded frame in its in-memory representation"""
+        frame = frame.reset_index(drop=True)
+        return frame if self.compact is None else self.compact(frame)
+
+    def _sync_due(self):
+        """Return True if changes from other processes should be merged now"""
+        return self.delta is not None and time.monotonic() - self._synced >= self.sync_interval
+
+    def sync(self):
+        """
+        Merge rows changed in the database since the last load or sync into
+        the snapshot, without reloading the table
+
+        Returns the current snapshot, or None if there is none (or the delta
+        couldn't be determined and the table must be reloaded). The version is
+        only bumped when something actually changed.
+        """
+        with self._load_lock:
+            snapshot = self.current()
+            if snapshot is None or self.delta is None:
+                return snapshot
+            started = datetime.datetime.now()
+            changes = self.delta(self._watermark)
+            self._synced = time.monotonic()
+            if changes is None:
+                self.bump()
+                return None
+            self._watermark = started
+
+            records, deleted = changes
+            records = self._new_records(snapshot, records)
+            changed_keys = {record[self.key] for record in records}
+            deleted = [record_id for record_id in deleted
+                       if record_id not in changed_keys and snapshot.get(record_id) is not None]
+            if not records and not deleted:
+                return snapshot
+
+            with self._lock:
+                self._version += 1
+                version = self._version
+            if deleted:
+                snapshot = snapshot.without(deleted, version)
+            snapshot = snapshot.patched(records, version)
+            self._snapshot = snapshot
+            self._save(snapshot)
+            return snapshot
+
+    def _new_records(self, snapshot, records):
+        """Keep the changed records whose stamp differs from the snapshot's copy of the row"""
+        if self.stamp is None or not records:
+            return list(records)
+        frame, index = snapshot.frame, snapshot.index
+        positions = index.get_indexer(pd.Index([record[self.key] for record in records], dtype=object))
+        known = pd.Series(frame[self.stamp].to_numpy()[positions])
+        changed = pd.Series([record[self.stamp] for record in records], dtype=known.dtype)
+        is_new = (positions < 0) | ~(known == changed).to_numpy()
+        return [record for record, new in zip(records, is_new) if new]
+
+    def refresh(self, fetch, save=True):
+        """
+        Publish committed changes to some rows without reloading the table
+
+        fetch is called under the table's lock and returns the changed rows
+        as a list of dictionaries of full records; they are patched into the snapshot
+        together with its bitmap indexes. Running the fetch under the lock
+        keeps concurrent writers from publishing an older state of a row
+        after a newer one. Without an up-to-date snapshot there is nothing to
+        patch and the version is simply bumped. With save=False the patched
+        snapshot is not written to the saved copy (for rows not yet committed).
+        """
+        with self._load_lock:
+            snapshot = self.current()
+            rows = fetch() if snapshot is not None else None
+            with self._lock:
+                self._version += 1
+                version = self._version
+            if snapshot is not None:
+                self._snapshot = snapshot.patched(rows, version)
+                if save:
+                    self._save(self._snapshot)
+            return version
+
+    def remove(self, record_ids):
+        """
+        Publish committed deletes of some rows without reloading the table
+
+        The rows are dropped from the snapshot (its bitmap indexes are rebuilt
+        on next use). Without an up-to-date snapshot there is nothing to patch
+        and the version is simply bumped.
+        """
+        with self._load_lock:
+            snapshot = self.current()
+            with self._lock:
+                self._version += 1
+                version = self._version
+            if snapshot is not None:
+                self._snapshot = snapshot.without(record_ids, version)
+                self._save(self._snapshot)
+            return version
+
+    def peek(self):
+        """Return the loaded frame if it is current, without loading anything"""
+        snapshot = self.current()
+        return None if snapshot is None else snapshot.frame
+
+    def get(self, record_id):
+        """
+        Return the row with the given key from the current snapshot in O(1)
+
+        Returns None if the key is unknown, or raises LookupError if there is
+        no current snapshot (the caller should query the database instead).
+        """
+        snapshot = self.sync() if self._sync_due() else self.current()
+        if snapshot is None:
+            raise LookupError(self.name)
+        return snapshot.get(record_id)
+
+    def get_many(self, record_ids):
+        """
+        Return the rows with the given keys from the current snapshot, in the
+        order requested (unknown keys are skipped)
+
+        Raises LookupError if there is no current snapshot.
+        """
+        snapshot = self.sync() if self._sync_due() else self.current()
+        if snapshot is None:
+            raise LookupError(self.name)
+        return snapshot.get_many(record_ids)
+
+    def clear(self):
+        """Drop the snapshot and invalidate every reader"""
+        with self._load_lock:
+            self._snapshot = None
+        self.bump()
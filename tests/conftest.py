@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Point the app at a throwaway SQLite database before data_manager is imported;
+# relative files (table snapshots, caches, queues) are written there as well
+WORK_DIR = tempfile.mkdtemp(prefix='talent-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(WORK_DIR, 'test.db')}")
+os.chdir(WORK_DIR)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
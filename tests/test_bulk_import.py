@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+import data_manager
+from database import _scope_state
+from data_manager import Employee, Match, PeerReview, Role, import_data, initialize_data, session_scope
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+
+
+def test_import_keeps_last_row_of_repeated_employee_id():
+    data = io.StringIO(
+        "employee_id,name,department,skills,peer_reviews\n"
+        "dup-e1,First,Engineering,\"[\"\"Python\"\"]\",Reliable and organized\n"
+        "dup-e2,Other,Finance,[],\n"
+        "dup-e1,Second,Finance,\"[\"\"SQL\"\"]\",Great communicator\n"
+    )
+
+    assert import_data('employees', data, 'csv')
+
+    with session_scope() as db_session:
+        employees = db_session.query(Employee).filter(Employee.employee_id.in_(['dup-e1', 'dup-e2'])).all()
+        reviews = db_session.query(PeerReview).filter_by(employee_id='dup-e1').all()
+        by_id = {employee.employee_id: employee for employee in employees}
+        assert len(employees) == 2
+        assert by_id['dup-e1'].name == 'Second'
+        assert by_id['dup-e1'].skills == ['SQL']
+        assert [review.review_text for review in reviews] == ['Great communicator']
+
+
+def test_import_keeps_last_row_of_repeated_role_and_match_id():
+    roles = io.StringIO(
+        "role_id,title,department\n"
+        "dup-r1,Analyst,Finance\n"
+        "dup-r1,Lead Analyst,Finance\n"
+    )
+    matches = io.StringIO(
+        "match_id,employee_id,role_id,match_score\n"
+        "dup-m1,dup-e1,dup-r1,0.5\n"
+        "dup-m1,dup-e1,dup-r1,0.75\n"
+    )
+
+    assert import_data('roles', roles, 'csv')
+    assert import_data('matches', matches, 'csv')
+
+    with session_scope() as db_session:
+        assert [role.title for role in db_session.query(Role).filter_by(role_id='dup-r1')] == ['Lead Analyst']
+        assert [match.match_score for match in db_session.query(Match).filter_by(match_id='dup-m1')] == [0.75]
+
+
+def test_repeated_ids_are_deduplicated_before_the_upsert(monkeypatch):
+    # PostgreSQL rejects an ON CONFLICT DO UPDATE that touches the same row twice
+    batches = []
+    upsert = data_manager.bulk_upsert
+    monkeypatch.setattr(data_manager, 'bulk_upsert',
+                        lambda db_session, model, rows, *args: (batches.append(rows), upsert(db_session, model, rows, *args)))
+
+    assert import_data('roles', io.StringIO("role_id,title\ndup-r2,A\ndup-r2,B\ndup-r2,C\n"), 'csv')
+
+    assert [[row['role_id'] for row in rows] for rows in batches] == [['dup-r2']]
+
+
+def test_reviews_are_enriched_outside_the_write_transaction(monkeypatch):
+    depths = []
+    enrich = data_manager.enrich_peer_reviews
+    monkeypatch.setattr(data_manager, 'enrich_peer_reviews',
+                        lambda employees_df: (depths.append(_scope_state.depth), enrich(employees_df)))
+
+    assert import_data('employees', io.StringIO("employee_id,peer_reviews\ntx-e1,Helpful mentor\n"), 'csv')
+
+    assert depths == [0]
@@ -0,0 +1,46 @@
+import pytest
+
+import data_manager
+from data_manager import (add_employee, add_match, add_role, delete_employee, delete_role, get_table,
+                          initialize_data, shared_tables)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+    add_employee({'employee_id': 'del-e1', 'name': 'Ada'})
+    add_employee({'employee_id': 'del-e2', 'name': 'Grace'})
+    add_role({'role_id': 'del-r1', 'title': 'Analyst'})
+    add_role({'role_id': 'del-r2', 'title': 'Engineer'})
+    for employee_id in ('del-e1', 'del-e2'):
+        for role_id in ('del-r1', 'del-r2'):
+            add_match({'match_id': f'{employee_id}:{role_id}', 'employee_id': employee_id, 'role_id': role_id,
+                       'match_score': 0.5})
+
+
+@pytest.fixture
+def no_reload(monkeypatch):
+    """Load the shared tables, then fail any later full reload"""
+    for data_type in ('employees', 'roles', 'matches'):
+        get_table(data_type)
+        monkeypatch.setattr(shared_tables[data_type], 'loader', lambda: pytest.fail('table was reloaded'))
+
+
+def match_ids():
+    return set(get_table('matches')['match_id']) & {f'{e}:{r}' for e in ('del-e1', 'del-e2')
+                                                     for r in ('del-r1', 'del-r2')}
+
+
+def test_delete_employee_drops_its_rows_from_the_snapshots(no_reload):
+    assert delete_employee('del-e1')
+
+    assert 'del-e1' not in set(get_table('employees')['employee_id'])
+    assert match_ids() == {'del-e2:del-r1', 'del-e2:del-r2'}
+
+
+def test_delete_role_drops_its_rows_from_the_snapshots(no_reload):
+    assert delete_role('del-r1')
+
+    assert 'del-r1' not in set(get_table('roles')['role_id'])
+    assert match_ids() == {'del-e2:del-r2'}
+    assert data_manager.get_record('roles', 'del-r2')['title'] == 'Engineer'
@@ -0,0 +1,31 @@
+import datetime
+
+import pytest
+
+from data_manager import (DeletedRecord, Employee, add_employee, get_record, get_table, initialize_data,
+                          session_scope, shared_tables, sync_changes)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+
+
+def test_changes_from_another_process_are_merged_without_a_reload(monkeypatch):
+    add_employee({'employee_id': 'ds-e1', 'name': 'Ada'})
+    add_employee({'employee_id': 'ds-e2', 'name': 'Grace'})
+    get_table('employees')
+    monkeypatch.setattr(shared_tables['employees'], 'loader', lambda: pytest.fail('table was reloaded'))
+
+    # Another process renames one employee and deletes the other
+    now = datetime.datetime.now()
+    with session_scope() as db_session:
+        db_session.query(Employee).filter_by(employee_id='ds-e1').update({'name': 'Ada L.', 'last_updated': now})
+        db_session.query(Employee).filter_by(employee_id='ds-e2').delete()
+        db_session.add(DeletedRecord(table_name='employees', record_id='ds-e2', deleted_at=now))
+
+    sync_changes('employees')
+
+    assert get_record('employees', 'ds-e1')['name'] == 'Ada L.'
+    assert get_record('employees', 'ds-e2') is None
+    assert 'ds-e2' not in set(get_table('employees')['employee_id'])
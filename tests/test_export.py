@@ -0,0 +1,22 @@
+import datetime
+import json
+
+import pytest
+
+from data_manager import add_employee, export_data, initialize_data
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+
+
+@pytest.mark.parametrize('file_format', ['json', 'jsonl'])
+def test_export_writes_dates_as_iso_strings(file_format):
+    add_employee({'employee_id': 'exp-e1', 'name': 'Exported', 'joining_date': datetime.datetime(2024, 3, 1, 9, 30)})
+
+    text = export_data('employees', file_format)
+    rows = json.loads(text) if file_format == 'json' else [json.loads(line) for line in text.splitlines()]
+
+    row = next(row for row in rows if row['employee_id'] == 'exp-e1')
+    assert row['joining_date'] == '2024-03-01T09:30:00.000'
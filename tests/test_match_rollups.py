@@ -0,0 +1,64 @@
+import datetime
+
+import pytest
+
+import data_manager
+from data_manager import (Match, MatchRollup, add_match, add_role, compact_matches, initialize_data,
+                          match_score_trend, session_scope)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+    add_role({'role_id': 'tr-r1', 'title': 'Analyst', 'department': 'Finance'})
+
+
+def add_scores(prefix, role_id, date, scores):
+    for i, score in enumerate(scores):
+        add_match({'match_id': f'{prefix}-{i}', 'employee_id': f'{prefix}-e{i}', 'role_id': role_id,
+                   'match_score': score, 'match_date': date})
+
+
+def test_trend_summarizes_raw_matches_once_per_data_version(monkeypatch):
+    add_scores('tr-a', 'tr-r1', datetime.datetime(2021, 1, 5, 9), [0.2, 0.4])
+    calls = []
+    score_parts = data_manager._score_parts
+    monkeypatch.setattr(data_manager, '_score_parts', lambda *args: (calls.append(args[2:]), score_parts(*args))[1])
+
+    first = match_score_trend('day', 'role', 'tr-r1')
+    second = match_score_trend('day', 'role', 'tr-r1')
+
+    assert calls == [('day', 'role')]
+    assert first.equals(second)
+    assert first[['match_count', 'mean']].values.tolist() == [[2, pytest.approx(0.3)]]
+
+    add_scores('tr-b', 'tr-r1', datetime.datetime(2021, 1, 5, 17), [0.9])
+
+    assert match_score_trend('day', 'role', 'tr-r1')['match_count'].tolist() == [3]
+    assert calls == [('day', 'role')] * 2
+
+
+def test_compaction_merges_late_matches_into_stored_rollups():
+    add_role({'role_id': 'cm-r1', 'title': 'Engineer', 'department': 'Engineering'})
+    add_scores('cm-a', 'cm-r1', datetime.datetime(2020, 3, 2, 10), [0.2, 0.4, 0.6])
+    assert compact_matches(now=datetime.datetime(2020, 8, 1)) >= 3
+
+    # Late-arriving rows for a day (and month) already rolled up
+    add_scores('cm-b', 'cm-r1', datetime.datetime(2020, 3, 2, 15), [0.8, 1.0])
+    add_scores('cm-c', 'cm-r1', datetime.datetime(2020, 3, 20, 8), [0.5])
+    assert compact_matches(now=datetime.datetime(2020, 8, 1)) >= 3
+
+    with session_scope() as db_session:
+        assert db_session.query(Match).filter(Match.role_id == 'cm-r1').count() == 0
+        rollups = {(rollup.period, rollup.period_start): rollup for rollup in db_session.query(MatchRollup).filter(
+            MatchRollup.scope == 'role', MatchRollup.scope_id == 'cm-r1')}
+        day = rollups['day', datetime.datetime(2020, 3, 2)]
+        month = rollups['month', datetime.datetime(2020, 3, 1)]
+        assert (day.match_count, day.score_sum, day.score_min, day.score_max) == \
+            (5, pytest.approx(3.0), pytest.approx(0.2), pytest.approx(1.0))
+        assert (month.match_count, month.score_sum) == (6, pytest.approx(3.5))
+        # Merged quantile sketches are approximate: the median lands between its neighbours
+        assert 0.4 < day.p50 < 0.8
+
+    department = match_score_trend('month', 'department', 'Engineering', since=datetime.datetime(2020, 1, 1))
+    assert department[['match_count', 'mean']].values.tolist()[0] == [6, pytest.approx(3.5 / 6)]
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from nlp_cache import NLPCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return NLPCache(path=str(tmp_path / 'nlp_cache.db'), max_entries=10, memory_entries=3)
+
+
+def counting(calls):
+    def compute(text):
+        calls.append(text)
+        return {'length': len(text)}
+    return compute
+
+
+def test_hits_and_misses_are_counted(cache):
+    calls = []
+
+    assert cache.get('sentiment', 'good', counting(calls)) == {'length': 4}
+    assert cache.get('sentiment', 'good', counting(calls)) == {'length': 4}
+    assert cache.get('sentiment', 'good', counting(calls), params=2) == {'length': 4}
+
+    assert calls == ['good', 'good']
+    assert {key: cache.stats()[key] for key in ('hits', 'misses', 'disk_entries')} == \
+        {'hits': 1, 'misses': 2, 'disk_entries': 2}
+
+
+def test_memory_lru_falls_back_to_disk(cache):
+    calls = []
+    for text in ('a', 'b', 'c', 'd'):
+        cache.get('soft_skills', text, counting(calls))
+    assert cache.stats()['memory_entries'] == 3
+
+    # 'a' was evicted from memory but is still on disk
+    assert cache.get('soft_skills', 'a', counting(calls)) == {'length': 1}
+    assert calls == ['a', 'b', 'c', 'd']
+
+
+def test_disk_eviction_keeps_recently_used_entries(cache):
+    calls = []
+    texts = [f'text {i}' for i in range(10)]
+    cache.get_many('key_phrases', texts, lambda batch: [counting(calls)(text) for text in batch])
+    cache._memory.clear()
+    # Touch the oldest entry so it survives eviction
+    cache.get('key_phrases', 'text 0', counting(calls))
+
+    cache.get('key_phrases', 'one more', counting(calls))
+
+    assert cache.stats()['disk_entries'] == 9
+    # Two untouched entries went (down to 90% of max_entries), the touched one stayed
+    keys = {cache.make_key('key_phrases', text): text for text in texts}
+    kept = {keys[key] for key in cache._read_disk(list(keys))}
+    assert len(kept) == 8 and 'text 0' in kept
+
+
+def test_get_many_computes_each_distinct_miss_once(cache):
+    batches = []
+
+    def compute_many(texts):
+        batches.append(list(texts))
+        return [len(text) for text in texts]
+
+    cache.get('sentiment', 'x', lambda text: 1)
+    assert cache.get_many('sentiment', ['x', 'yy', 'yy', 'zzz'], compute_many) == [1, 2, 2, 3]
+
+    assert batches == [['yy', 'zzz']]
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 3
+
+
+def test_cached_values_are_returned_as_copies(cache):
+    first = cache.get('soft_skills', 'team player', lambda text: ['Teamwork'])
+    first.append('Mutated')
+
+    assert cache.get('soft_skills', 'team player', lambda text: ['other']) == ['Teamwork']
+    assert cache.get_many('soft_skills', ['team player'], lambda texts: [['other']]) == [['Teamwork']]
+
+
+def test_results_survive_a_new_cache_on_the_same_file(tmp_path):
+    path = str(tmp_path / 'nlp_cache.db')
+    NLPCache(path=path).get('sentiment', 'fine', lambda text: {'compound': 0.2})
+
+    reopened = NLPCache(path=path)
+    assert reopened.get('sentiment', 'fine', lambda text: pytest.fail('recomputed')) == {'compound': 0.2}
+    assert os.path.exists(path)
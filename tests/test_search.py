@@ -0,0 +1,80 @@
+import pytest
+
+import data_manager
+from data_manager import (add_employee, add_role, delete_employee, initialize_data, search, search_supported,
+                          update_employee)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+    add_employee({'employee_id': 'fts-e1', 'name': 'Ada',
+                  'peer_reviews': 'Great at mentoring juniors and leading offshore teams'})
+    add_employee({'employee_id': 'fts-e2', 'name': 'Grace', 'peer_reviews': 'Mentored two interns; calm under pressure'})
+    add_employee({'employee_id': 'fts-e3', 'name': 'Alan', 'peer_reviews': 'Reliable offshore coordination'})
+    add_role({'role_id': 'fts-r1', 'title': 'Lead', 'description': 'Lead the offshore platform team',
+              'responsibilities': ['Mentoring engineers', 'Quarterly planning']})
+
+
+def found(query, scope='reviews'):
+    return sorted(record_id for record_id in search(query, scope) if record_id.startswith('fts-'))
+
+
+def test_sqlite_uses_the_fts5_index():
+    assert search_supported()
+
+
+def test_terms_are_stemmed_and_combined():
+    assert found('mentor') == ['fts-e1', 'fts-e2']
+    assert found('mentoring AND offshore') == ['fts-e1']
+    assert found('interns OR coordination') == ['fts-e2', 'fts-e3']
+    assert found('offshore NOT mentoring') == ['fts-e3']
+    assert found('"offshore teams"') == ['fts-e1']
+
+
+def test_malformed_query_falls_back_to_all_the_words():
+    assert found('offshore (mentoring') == ['fts-e1']
+    assert found('"') == []
+
+
+def test_roles_are_searched_by_description_and_responsibilities():
+    assert found('quarterly planning', scope='roles') == ['fts-r1']
+    assert found('offshore', scope='roles') == ['fts-r1']
+    assert found('quarterly') == []
+
+
+def test_index_follows_updates_and_deletes():
+    add_employee({'employee_id': 'fts-e4', 'name': 'Edsger', 'peer_reviews': 'Writes terse proofs'})
+    assert found('proofs') == ['fts-e4']
+
+    update_employee('fts-e4', {'peer_reviews': 'Prefers chalkboards'})
+    assert found('proofs') == []
+    assert found('chalkboards') == ['fts-e4']
+
+    delete_employee('fts-e4')
+    assert found('chalkboards') == []
+
+
+class FakeConnection:
+    """Answers the pg_ts_config lookup from a fixed set of configurations"""
+
+    def __init__(self, configurations):
+        self.configurations = configurations
+        self.params = []
+
+    def execute(self, statement, params):
+        self.params.append(params)
+        language = params['language'] if params['language'] in self.configurations else None
+        return type('Result', (), {'scalar': lambda self: language})()
+
+
+def test_search_language_must_be_a_known_configuration(monkeypatch):
+    conn = FakeConnection({'english', 'german'})
+
+    monkeypatch.setattr(data_manager, 'SEARCH_LANGUAGE', 'german')
+    assert data_manager._search_language(conn) == 'german'
+
+    monkeypatch.setattr(data_manager, 'SEARCH_LANGUAGE', "english'); DROP TABLE employees; --")
+    with pytest.raises(ValueError):
+        data_manager._search_language(conn)
+    assert conn.params[-1] == {'language': "english'); DROP TABLE employees; --"}
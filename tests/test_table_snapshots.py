@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+
+import data_manager
+from data_manager import (DeletedRecord, Employee, add_employee, get_table, initialize_data, load_table_snapshot,
+                          save_table_snapshot, session_scope)
+from table_store import plain_frame
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+    add_employee({'employee_id': 'sn-e1', 'name': 'Ada', 'department': 'Engineering', 'skills': ['Python', 'SQL'],
+                  'certifications': [], 'peer_reviews': 'Reliable'})
+    add_employee({'employee_id': 'sn-e2', 'name': 'Grace', 'department': 'Finance', 'skills': ['Excel']})
+
+
+def selected_ids(snapshot, skill):
+    ids = snapshot.select(snapshot.bitmap('skills').get(skill))['employee_id']
+    return sorted(employee_id for employee_id in ids if employee_id.startswith('sn-'))
+
+
+def test_snapshot_round_trip():
+    frame = get_table('employees')
+    watermark = datetime.datetime(2024, 5, 1, 12, 30)
+
+    assert save_table_snapshot('employees', frame, watermark)
+    loaded, loaded_watermark = load_table_snapshot('employees')
+
+    assert loaded_watermark == watermark
+    expected = plain_frame(frame).set_index('employee_id').sort_index()
+    actual = plain_frame(loaded).set_index('employee_id').sort_index()
+    assert actual.loc['sn-e1', 'skills'] == ['Python', 'SQL']
+    assert actual.loc['sn-e2', 'department'] == 'Finance'
+    assert actual[['name', 'department', 'skills', 'experience']].equals(
+        expected[['name', 'department', 'skills', 'experience']])
+
+
+def test_cold_start_merges_the_delta_since_the_snapshot(monkeypatch):
+    watermark = datetime.datetime.now()
+    assert save_table_snapshot('employees', get_table('employees'), watermark)
+
+    # Changed after the snapshot was saved
+    later = watermark + datetime.timedelta(seconds=1)
+    with session_scope() as db_session:
+        db_session.query(Employee).filter_by(employee_id='sn-e1').update({'name': 'Ada L.', 'last_updated': later})
+        db_session.query(Employee).filter_by(employee_id='sn-e2').delete()
+        db_session.add(DeletedRecord(table_name='employees', record_id='sn-e2', deleted_at=later))
+    add_employee({'employee_id': 'sn-e3', 'name': 'Alan', 'skills': ['Go']})
+
+    # A fresh process: seeded from the file, never loading the whole table
+    table = data_manager._shared_table('employees')
+    monkeypatch.setattr(table, 'loader', lambda: pytest.fail('table was loaded from the database'))
+    snapshot = table.load()
+
+    assert snapshot.get('sn-e1')['name'] == 'Ada L.'
+    assert snapshot.get('sn-e2') is None
+    assert list(snapshot.get('sn-e3')['skills']) == ['Go']
+    assert selected_ids(snapshot, 'Python') == ['sn-e1']
+
+
+def test_snapshot_from_another_format_is_ignored(monkeypatch):
+    assert save_table_snapshot('employees', get_table('employees'), datetime.datetime.now())
+    monkeypatch.setattr(data_manager, 'TABLE_SNAPSHOT_FORMAT', 'old')
+
+    assert load_table_snapshot('employees') is None
@@ -0,0 +1,236 @@
+import pandas as pd
+import pytest
+
+from table_store import (SharedTable, StringListArray, TableSnapshot, bitmap_positions, compact_frame,
+                         plain_frame)
+
+
+def employees(compact=False):
+    frame = pd.DataFrame({
+        'employee_id': ['e1', 'e2', 'e3', 'e4'],
+        'department': ['Finance', 'Engineering', 'Engineering', 'Sales'],
+        'skills': [['SQL', 'Excel'], ['Python', 'SQL'], ['Python'], []]
+    })
+    return compact_frame(frame, categorical=['department'], lists=['skills']) if compact else frame
+
+
+def selected(snapshot, bitmap):
+    return sorted(snapshot.select(bitmap)['employee_id'])
+
+
+@pytest.fixture(params=[False, True], ids=['plain', 'compact'])
+def snapshot(request):
+    return TableSnapshot(employees(request.param), 'employee_id', 1)
+
+
+def test_all_of_and_any_of(snapshot):
+    skills = snapshot.bitmap('skills')
+
+    assert selected(snapshot, skills.all_of(['Python', 'SQL'])) == ['e2']
+    assert selected(snapshot, skills.any_of(['Excel', 'Python'])) == ['e1', 'e2', 'e3']
+    assert selected(snapshot, skills.all_of([])) == ['e1', 'e2', 'e3', 'e4']
+    assert selected(snapshot, skills.any_of(['Go'])) == []
+
+
+def test_bitmaps_follow_patched_updates_and_appends(snapshot):
+    snapshot.bitmap('skills'), snapshot.bitmap('department')  # Built before the patch, so they are carried forward
+
+    patched = snapshot.patched([
+        {'employee_id': 'e3', 'department': 'Finance', 'skills': ['SQL', 'Python']},
+        {'employee_id': 'e5', 'department': 'Engineering', 'skills': ['Python', 'Go']}
+    ], 2)
+
+    skills, departments = patched.bitmap('skills'), patched.bitmap('department')
+    assert selected(patched, skills.all_of(['Python', 'SQL'])) == ['e2', 'e3']
+    assert selected(patched, skills.any_of(['Go', 'Excel'])) == ['e1', 'e5']
+    assert selected(patched, departments.get('Engineering')) == ['e2', 'e5']
+    assert selected(patched, departments.get('Finance') & skills.get('Python')) == ['e3']
+
+    # The older snapshot and its bitmaps are unchanged
+    assert selected(snapshot, snapshot.bitmap('skills').all_of(['Python', 'SQL'])) == ['e2']
+    assert selected(snapshot, snapshot.bitmap('department').get('Engineering')) == ['e2', 'e3']
+
+
+def test_bitmaps_after_without(snapshot):
+    snapshot.bitmap('skills')
+
+    remaining = snapshot.without(['e2', 'unknown'], 2)
+
+    assert len(remaining) == 3
+    assert selected(remaining, remaining.bitmap('skills').any_of(['SQL', 'Python'])) == ['e1', 'e3']
+    assert selected(remaining, remaining.bitmap('department').get('Engineering')) == ['e3']
+    assert remaining.get('e2') is None and remaining.get('e4')['department'] == 'Sales'
+
+
+def test_bitmap_positions_match_the_rows():
+    snapshot = TableSnapshot(employees(), 'employee_id', 1)
+    bitmap = snapshot.bitmap('department').get('Engineering')
+
+    assert bitmap_positions(bitmap, len(snapshot)).tolist() == [1, 2]
+
+
+def test_appends_are_buffered_and_invisible_to_older_snapshots():
+    base = TableSnapshot(employees(), 'employee_id', 1)
+    first = base.patched([{'employee_id': 'e5', 'department': 'Sales', 'skills': ['Go']}], 2)
+    second = first.patched([{'employee_id': 'e6', 'department': 'Sales', 'skills': []}], 3)
+
+    # Served from the buffer without merging it into the frame
+    assert second.get('e6')['department'] == 'Sales'
+    assert len(base) == 4 and len(first) == 5 and len(second) == 6
+    assert first.get('e6') is None
+    assert list(first.frame['employee_id']) == ['e1', 'e2', 'e3', 'e4', 'e5']
+    assert list(second.frame['employee_id']) == ['e1', 'e2', 'e3', 'e4', 'e5', 'e6']
+    assert list(base.frame['employee_id']) == ['e1', 'e2', 'e3', 'e4']
+
+
+def test_appending_to_an_older_snapshot_does_not_overwrite_newer_rows():
+    base = TableSnapshot(employees(), 'employee_id', 1)
+    newer = base.patched([{'employee_id': 'e5', 'department': 'Sales', 'skills': []}], 2)
+    branch = base.patched([{'employee_id': 'e9', 'department': 'Finance', 'skills': []}], 3)
+
+    assert list(newer.frame['employee_id'])[-1] == 'e5'
+    assert list(branch.frame['employee_id'])[-1] == 'e9'
+    assert newer.get('e9') is None and branch.get('e5') is None
+
+
+def test_many_appends_keep_every_row_and_its_bitmaps():
+    snapshot = TableSnapshot(employees(compact=True), 'employee_id', 1)
+    snapshot.bitmap('skills')
+    for i in range(50):
+        snapshot = snapshot.patched([{'employee_id': f'n{i}', 'department': 'Support',
+                                      'skills': ['Python'] if i % 2 else []}], i + 2)
+
+    assert len(snapshot) == 54
+    assert snapshot.get_many(['n49', 'e1', 'n0'])['employee_id'].tolist() == ['n49', 'e1', 'n0']
+    assert len(selected(snapshot, snapshot.bitmap('skills').get('Python'))) == 2 + 25
+    assert snapshot.index.get_loc('n10') == 14
+
+
+def stamped(frame, stamp):
+    return frame.assign(last_updated=pd.Timestamp(stamp))
+
+
+class FakeDelta:
+    """delta callable returning queued (records, deleted) answers and recording the since arguments"""
+
+    def __init__(self):
+        self.answers = []
+        self.since = []
+
+    def __call__(self, since):
+        self.since.append(since)
+        return self.answers.pop(0) if self.answers else ([], [])
+
+
+def delta_table(delta, frame):
+    return SharedTable('employees', lambda: frame, 'employee_id', delta=delta, stamp='last_updated',
+                       sync_interval=0)
+
+
+def test_delta_sync_applies_updates_and_tombstones_together():
+    delta = FakeDelta()
+    table = delta_table(delta, stamped(employees(), '2024-01-01'))
+    table.load().bitmap('skills')
+    version = table.version
+
+    delta.answers.append((
+        [
+            {'employee_id': 'e1', 'department': 'Finance', 'skills': ['SQL', 'Excel'],
+             'last_updated': pd.Timestamp('2024-01-01')},  # Unchanged stamp: already known
+            {'employee_id': 'e2', 'department': 'Sales', 'skills': ['Go'], 'last_updated': pd.Timestamp('2024-02-01')},
+            {'employee_id': 'e5', 'department': 'Sales', 'skills': ['SQL'], 'last_updated': pd.Timestamp('2024-02-01')}
+        ],
+        ['e3', 'e5', 'gone']  # e5 was deleted and re-created; gone was never loaded
+    ))
+    snapshot = table.sync()
+
+    assert table.version == version + 1
+    assert sorted(snapshot.frame['employee_id']) == ['e1', 'e2', 'e4', 'e5']
+    assert snapshot.get('e2')['department'] == 'Sales'
+    assert selected(snapshot, snapshot.bitmap('skills').get('SQL')) == ['e1', 'e5']
+    assert selected(snapshot, snapshot.bitmap('skills').get('Python')) == []
+
+    # Nothing changed since: the version stays put
+    assert table.sync() is snapshot and table.version == version + 1
+    assert delta.since[1] > delta.since[0]
+
+
+def test_unknown_delta_forces_a_reload():
+    delta = FakeDelta()
+    loads = []
+    frame = stamped(employees(), '2024-01-01')
+    table = SharedTable('employees', lambda: loads.append(1) or frame, 'employee_id', delta=delta,
+                        stamp='last_updated', sync_interval=0)
+    table.load()
+
+    delta.answers.append(None)
+    assert table.sync() is None
+    assert len(table.load()) == 4 and len(loads) == 2
+
+
+CELLS = [['Python', 'SQL'], [], None, ['Go'], ['SQL', 'Excel', 'Python']]
+
+
+def string_lists(cells=CELLS):
+    return StringListArray._from_sequence(cells)
+
+
+def test_string_lists_read_back_as_lists():
+    array = string_lists()
+
+    assert list(array) == CELLS
+    assert array[0] == ['Python', 'SQL'] and array[2] is None and array[-1] == ['SQL', 'Excel', 'Python']
+    assert array.isna().tolist() == [False, False, True, False, False]
+    assert list(array[1:4]) == CELLS[1:4]
+
+
+def test_string_list_take():
+    array = string_lists()
+
+    assert list(array.take([4, 0, 0, 2])) == [CELLS[4], CELLS[0], CELLS[0], None]
+    assert list(array.take([3, -1], allow_fill=True)) == [['Go'], None]
+    assert list(array.take([-1])) == [CELLS[-1]]
+    with pytest.raises(IndexError):
+        string_lists([]).take([0], allow_fill=True)
+
+
+def test_string_list_copy_is_independent():
+    array = string_lists()
+    copy = array.copy()
+
+    copy[0] = ['Rust']
+    copy[[1, 2]] = ['C']
+
+    assert list(array) == CELLS
+    assert list(copy) == [['Rust'], ['C'], ['C'], ['Go'], CELLS[4]]
+
+
+def test_string_list_concat():
+    first, second = string_lists(CELLS[:2]), string_lists(CELLS[2:])
+
+    joined = StringListArray._concat_same_type([first, second])
+    assert list(joined) == CELLS
+    assert list(pd.concat([pd.Series(first), pd.Series(second)], ignore_index=True)) == CELLS
+
+
+def test_plain_frame_round_trip():
+    frame = pd.DataFrame({'employee_id': ['e1', 'e2', 'e3', 'e4', 'e5'], 'skills': CELLS,
+                          'department': ['A', 'B', 'A', None, 'B'], 'experience': [1.5, 2.0, 3.0, 4.0, 5.25]})
+
+    compact = compact_frame(frame, categorical=['department'], lists=['skills'], float32=['experience'])
+    assert isinstance(compact['skills'].array, StringListArray)
+
+    plain = plain_frame(compact)
+    assert plain['skills'].dtype == object and list(plain['skills']) == CELLS
+    assert plain['experience'].dtype == 'float64'
+    assert plain.equals(frame)
+
+
+def test_explode_matches_a_column_of_lists():
+    index = list('vwxyz')
+    compact = pd.Series(string_lists(), index=index)
+
+    exploded = compact.explode()
+    assert exploded.equals(pd.Series(CELLS, index=index, dtype=object).explode())
+    assert exploded.loc['z'].tolist() == ['SQL', 'Excel', 'Python']
+    assert exploded.value_counts()['Python'] == 2
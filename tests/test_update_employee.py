@@ -0,0 +1,43 @@
+import pytest
+
+from data_manager import Employee, add_employee, initialize_data, session_scope, update_employee
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+
+
+def stored(employee_id):
+    with session_scope() as db_session:
+        employee = db_session.query(Employee).filter_by(employee_id=employee_id).one()
+        return {column: getattr(employee, column) for column in
+                ('name', 'peer_reviews', 'review_count', 'review_sentiment', 'soft_skills_score')}
+
+
+def test_partial_update_keeps_the_stored_review_features():
+    add_employee({'employee_id': 'up-e1', 'name': 'Ada', 'peer_reviews': 'Reliable and a great communicator'})
+    before = stored('up-e1')
+
+    assert update_employee('up-e1', {'name': 'Ada L.'})
+
+    assert stored('up-e1') == {**before, 'name': 'Ada L.'}
+
+
+def test_derived_columns_in_an_update_payload_are_ignored():
+    add_employee({'employee_id': 'up-e2', 'name': 'Grace', 'peer_reviews': 'Organized team player'})
+    before = stored('up-e2')
+
+    assert update_employee('up-e2', {'soft_skills_score': 0.9})
+
+    assert stored('up-e2') == before
+
+
+def test_changed_reviews_recompute_the_features():
+    add_employee({'employee_id': 'up-e3', 'name': 'Alan', 'peer_reviews': 'Quiet'})
+
+    assert update_employee('up-e3', {'peer_reviews': 'Great leader'})
+
+    after = stored('up-e3')
+    assert after['peer_reviews'] == 'Great leader'
+    assert after['review_count'] == 1
@@ -0,0 +1,57 @@
+import pytest
+
+from data_manager import Skill, Vocabulary, initialize_data, session_scope
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+
+
+@pytest.fixture
+def vocabulary():
+    return Vocabulary(Skill, 'skill_id', 'skill_name')
+
+
+def stored_ids(names):
+    with session_scope() as db_session:
+        return dict(db_session.query(Skill.skill_name, Skill.skill_id).filter(Skill.skill_name.in_(names)))
+
+
+def test_resolve_creates_missing_names_once(vocabulary):
+    ids = vocabulary.resolve([' voc-Rust ', 'voc-Rust', 'voc-Zig', '', None])
+
+    assert ids == stored_ids(['voc-Rust', 'voc-Zig'])
+    assert vocabulary.resolve(['voc-Zig', 'voc-Rust']) == ids
+    # A second instance finds the rows instead of inserting duplicates
+    assert Vocabulary(Skill, 'skill_id', 'skill_name').resolve(['voc-Rust']) == {'voc-Rust': ids['voc-Rust']}
+
+
+def test_name_inserted_concurrently_resolves_to_the_existing_row(vocabulary, monkeypatch):
+    with session_scope() as db_session:
+        db_session.add(Skill(skill_name='voc-Elixir'))
+    existing = stored_ids(['voc-Elixir'])['voc-Elixir']
+
+    # The first lookup misses it, as if another process inserted it right after
+    lookup = vocabulary._lookup
+    misses = iter([True])
+    monkeypatch.setattr(vocabulary, '_lookup',
+                        lambda db_session, names: {} if next(misses, False) else lookup(db_session, names))
+
+    assert vocabulary.resolve(['voc-Elixir']) == {'voc-Elixir': existing}
+    assert stored_ids(['voc-Elixir']) == {'voc-Elixir': existing}
+
+
+def test_inserted_ids_are_only_cached_after_commit(vocabulary):
+    with pytest.raises(RuntimeError):
+        with session_scope() as db_session:
+            vocabulary.resolve(['voc-Haskell'], db_session)
+            assert 'voc-Haskell' not in vocabulary._ids
+            raise RuntimeError("roll back")
+
+    assert 'voc-Haskell' not in vocabulary._ids
+    assert stored_ids(['voc-Haskell']) == {}
+
+    with session_scope() as db_session:
+        ids = vocabulary.resolve(['voc-Haskell'], db_session)
+    assert vocabulary._ids['voc-Haskell'] == ids['voc-Haskell'] == stored_ids(['voc-Haskell'])['voc-Haskell']
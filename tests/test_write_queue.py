@@ -0,0 +1,76 @@
+import pytest
+
+import data_manager
+from data_manager import (apply_queued_writes, get_record, get_table, initialize_data, record_exists,
+                          write_queue_path)
+from write_queue import WriteQueue
+
+
+@pytest.fixture(scope='module', autouse=True)
+def database():
+    initialize_data()
+
+
+def test_rolled_back_batch_is_not_published_to_the_shared_snapshot():
+    get_table('employees')  # Load the snapshot so writes patch it in place
+
+    with pytest.raises(ValueError):
+        apply_queued_writes([
+            ('employees', 'add', 'wq-e1', {'employee_id': 'wq-e1', 'name': 'Queued'}),
+            ('employees', 'add', 'wq-e2', {'employee_id': 'wq-e2', 'name': 'Broken', 'experience': 'n/a'})
+        ])
+
+    assert not record_exists('employees', 'wq-e1')
+    assert get_record('employees', 'wq-e1') is None
+
+
+def test_committed_batch_is_published_after_the_commit():
+    get_table('employees')
+
+    apply_queued_writes([
+        ('employees', 'add', 'wq-e3', {'employee_id': 'wq-e3', 'name': 'Queued'}),
+        ('employees', 'update', 'wq-e3', {'name': 'Renamed'})
+    ])
+
+    assert get_record('employees', 'wq-e3')['name'] == 'Renamed'
+
+
+def test_queue_file_is_named_after_the_database(monkeypatch):
+    path = write_queue_path()
+    monkeypatch.setattr(data_manager, 'DATABASE_URL', 'sqlite:///elsewhere.db')
+
+    assert write_queue_path() != path
+
+
+def test_workers_sharing_a_queue_file_never_take_the_same_writes(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    first, second = WriteQueue(lambda writes: None, path), WriteQueue(lambda writes: None, path)
+    for queue in (first, second):
+        queue.stop(flush=False)
+
+    first.enqueue('employees', 'add', 'e1', {'name': 'A'})
+    first.enqueue('employees', 'update', 'e1', {'name': 'B'})
+    second.enqueue('employees', 'add', 'e2', {'name': 'C'})
+
+    claimed = first._next_batch()
+    assert [write[3] for write in claimed] == ['e1', 'e1', 'e2']
+    assert second._next_batch() == []
+
+    # A later write to a claimed record waits for the claim to be released
+    second.enqueue('employees', 'update', 'e1', {'name': 'D'})
+    assert second._next_batch() == []
+    first._done([write[0] for write in claimed])
+    assert [write[4] for write in second._next_batch()] == [{'name': 'D'}]
+
+
+def test_writes_of_a_worker_whose_lease_ran_out_are_taken_over(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    first = WriteQueue(lambda writes: None, path, lease_seconds=0)
+    second = WriteQueue(lambda writes: None, path)
+    for queue in (first, second):
+        queue.stop(flush=False)
+
+    first.enqueue('roles', 'add', 'r1', {'title': 'Analyst'})
+    assert len(first._next_batch()) == 1
+
+    assert [write[3] for write in second._next_batch()] == ['r1']
@@ -0,0 +1,304 @@
+# Text analysis functions (tokenizing, soft skills, sentiment, key phrases).
+# Unlike text_processor this module has no import side effects: it neither
+# imports streamlit nor downloads NLTK data, so worker processes can import it
+# cheaply. NLTK data is looked up on nltk.data.path (see use_nltk_data).
+import re
+
+import nltk
+from nltk.sentiment import SentimentIntensityAnalyzer
+from nltk.tokenize import word_tokenize, sent_tokenize
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+# Tokens of two or more word characters, equivalent to process_text followed
+# by the single-character filter used for key phrase frequencies
+KEY_PHRASE_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+_sentiment_analyzer = None
+
+def use_nltk_data(paths):
+    """Search the given directories for NLTK data (lexicons, tokenizers) first"""
+    for path in reversed(list(paths or [])):
+        if path not in nltk.data.path:
+            nltk.data.path.insert(0, path)
+
+def process_text(text):
+    """
+    Process text for analysis:
+    - Convert to lowercase
+    - Remove special characters
+    - Tokenize
+    
+    Parameters:
+    - text: Input text to process
+    
+    Returns:
+    - Processed text and tokens
+    """
+    if not text or not isinstance(text, str):
+        return "", []
+    
+    # Convert to lowercase
+    text = text.lower()
+    
+    # Remove special characters
+    text = re.sub(r'[^\w\s]', ' ', text)
+    
+    # Try to use NLTK's word_tokenize, but fall back to simple splitting if it fails
+    tokens = []
+    try:
+        # First check if the punkt resource is available
+        if nltk.data.find('tokenizers/punkt'):
+            tokens = word_tokenize(text)
+        else:
+            # If punkt is not available, use simple splitting
+            tokens = text.split()
+    except Exception as e:
+        # Simple fallback tokenization
+        tokens = text.split()
+    
+    return text, tokens
+
+def normalize_review(text):
+    """
+    Normalize review text before analysis:
+    - Strip leading/trailing whitespace
+    - Collapse runs of whitespace (including newlines) into single spaces
+    
+    Parameters:
+    - text: Input text to normalize
+    
+    Returns:
+    - Normalized text ("" for empty or non-string input)
+    """
+    if not text or not isinstance(text, str):
+        return ""
+    return " ".join(text.split())
+
+def split_sentences(text, use_punkt=None):
+    """
+    Split text into sentences, using NLTK's punkt tokenizer when available
+    
+    Parameters:
+    - text: Input text to split
+    - use_punkt: Whether punkt is available (checked if not provided)
+    
+    Returns:
+    - List of sentences
+    """
+    if use_punkt is None:
+        use_punkt = punkt_available()
+    
+    try:
+        if use_punkt:
+            return sent_tokenize(text)
+    except Exception:
+        pass
+    
+    # Simple fallback for sentence tokenization
+    sentences = re.split(r'[.!?]+', text)
+    return [s.strip() for s in sentences if s.strip()]
+
+def punkt_available():
+    """Check whether the NLTK punkt tokenizer can be loaded"""
+    try:
+        return bool(nltk.data.find('tokenizers/punkt'))
+    except LookupError:
+        return False
+
+def extract_soft_skills(text):
+    """
+    Extract soft skills mentioned in text
+    
+    Parameters:
+    - text: Input text to analyze
+    
+    Returns:
+    - List of identified soft skills
+    """
+    if not text or not isinstance(text, str):
+        return []
+    
+    # Common soft skills to look for
+    soft_skills_keywords = [
+        'communication', 'teamwork', 'leadership', 'problem solving', 'problem-solving',
+        'critical thinking', 'time management', 'adaptability', 'flexibility', 'creativity',
+        'work ethic', 'interpersonal', 'collaboration', 'decision making', 'decision-making',
+        'emotional intelligence', 'conflict resolution', 'negotiation', 'persuasion',
+        'public speaking', 'customer service', 'attention to detail', 'organization',
+        'planning', 'strategic thinking', 'analytical', 'project management', 'multitasking',
+        'resourcefulness', 'active listening', 'empathy', 'patience', 'confidence',
+        'self-motivation', 'reliability', 'professionalism', 'integrity', 'ethics',
+        'cultural awareness', 'mentoring', 'coaching', 'feedback', 'delegation',
+        'resilience', 'positive attitude', 'enthusiasm', 'innovation'
+    ]
+    
+    # Process text
+    processed_text, _ = process_text(text)
+    
+    # Find soft skills in text
+    found_skills = []
+    for skill in soft_skills_keywords:
+        if skill in processed_text:
+            found_skills.append(skill)
+    
+    return found_skills
+
+def get_sentiment_analyzer():
+    """Return this process's shared SentimentIntensityAnalyzer, creating it on first use"""
+    global _sentiment_analyzer
+    if _sentiment_analyzer is None:
+        _sentiment_analyzer = SentimentIntensityAnalyzer()
+    return _sentiment_analyzer
+
+def analyze_sentiment(text):
+    """
+    Analyze sentiment of text using NLTK's SentimentIntensityAnalyzer
+    
+    Parameters:
+    - text: Input text to analyze
+    
+    Returns:
+    - Dictionary with sentiment scores
+    """
+    if not text or not isinstance(text, str):
+        return {'pos': 0, 'neg': 0, 'neu': 1, 'compound': 0}
+    
+    # Reuse one sentiment analyzer per process (loading the lexicon is expensive)
+    sia = get_sentiment_analyzer()
+    
+    # Analyze text
+    sentiment_scores = sia.polarity_scores(text)
+    
+    return sentiment_scores
+
+def extract_key_phrases(text, num_phrases=5):
+    """
+    Extract key phrases from text based on frequency and positioning
+    
+    Parameters:
+    - text: Input text to analyze
+    - num_phrases: Number of key phrases to extract
+    
+    Returns:
+    - List of key phrases
+    """
+    if not text or not isinstance(text, str):
+        return []
+    
+    # Split into sentences with fallback
+    sentences = split_sentences(text)
+    
+    # Process sentences
+    processed_sentences = []
+    for sentence in sentences:
+        processed_text, tokens = process_text(sentence)
+        if tokens:
+            processed_sentences.append((processed_text, tokens))
+    
+    # Count word frequencies
+    word_freq = {}
+    for _, tokens in processed_sentences:
+        for token in tokens:
+            if len(token) > 1:  # Filter out single-character tokens
+                word_freq[token] = word_freq.get(token, 0) + 1
+    
+    # Score sentences based on word frequency and position
+    sentence_scores = []
+    for i, (sentence, tokens) in enumerate(processed_sentences):
+        score = 0
+        for token in tokens:
+            if token in word_freq:
+                score += word_freq[token]
+        
+        # Add position weight (earlier sentences often contain key information)
+        position_weight = 1.0 - (0.5 * i / len(processed_sentences))
+        score *= position_weight
+        
+        sentence_scores.append((sentence, score))
+    
+    # Sort sentences by score
+    sorted_sentences = sorted(sentence_scores, key=lambda x: x[1], reverse=True)
+    
+    # Extract top phrases
+    key_phrases = [sentence for sentence, _ in sorted_sentences[:num_phrases]]
+    
+    return key_phrases
+
+def extract_key_phrases_batch(texts, num_phrases=5, use_idf=True):
+    """
+    Extract key phrases from many documents at once
+    
+    Sentences from all documents are tokenized in a single pass into a sparse
+    sentence-term matrix. Each sentence is scored against its own document's
+    term frequencies (optionally weighted by corpus-level IDF so that terms
+    common to every document count for less), then by the same position
+    weight as extract_key_phrases.
+    
+    Parameters:
+    - texts: List of input texts (e.g. role descriptions or peer reviews)
+    - num_phrases: Number of key phrases to extract per text
+    - use_idf: Down-weight terms that appear in many of the documents
+    
+    Returns:
+    - List of key phrase lists, one per input text
+    """
+    if not texts:
+        return []
+    
+    use_punkt = punkt_available()
+    
+    # Split and normalize every sentence once
+    processed_sentences = []
+    doc_offsets = [0]
+    for text in texts:
+        if text and isinstance(text, str):
+            for sentence in split_sentences(text, use_punkt):
+                processed = re.sub(r'[^\w\s]', ' ', sentence.lower())
+                if processed.split():
+                    processed_sentences.append(processed)
+        doc_offsets.append(len(processed_sentences))
+    
+    if not processed_sentences:
+        return [[] for _ in texts]
+    
+    doc_offsets = np.asarray(doc_offsets)
+    sentence_counts = np.diff(doc_offsets)
+    doc_index = np.repeat(np.arange(len(texts)), sentence_counts)
+    
+    # Sentence-term count matrix for the whole batch
+    vectorizer = CountVectorizer(lowercase=False, token_pattern=KEY_PHRASE_TOKEN_PATTERN)
+    try:
+        sentence_terms = vectorizer.fit_transform(processed_sentences).tocsr()
+    except ValueError:
+        # No multi-character tokens anywhere, so every sentence scores zero
+        sentence_terms = sparse.csr_matrix((len(processed_sentences), 1))
+    
+    # Per-document term frequencies: sum the rows of each document's sentences
+    membership = sparse.csr_matrix(
+        (np.ones(len(processed_sentences)), (doc_index, np.arange(len(processed_sentences)))),
+        shape=(len(texts), len(processed_sentences))
+    )
+    doc_terms = (membership @ sentence_terms).tocsr()
+    
+    if use_idf:
+        # Smoothed IDF, as in scikit-learn's TfidfTransformer
+        doc_freq = np.bincount(doc_terms.indices, minlength=doc_terms.shape[1])
+        idf = np.log((1 + len(texts)) / (1 + doc_freq)) + 1
+        doc_terms = doc_terms @ sparse.diags(idf)
+    
+    # Sentence score = sum over its tokens of the (weighted) document frequency
+    scores = np.asarray(sentence_terms.multiply(doc_terms[doc_index]).sum(axis=1)).ravel()
+    
+    # Position weight within each document (earlier sentences weigh more)
+    positions = np.arange(len(processed_sentences)) - doc_offsets[doc_index]
+    scores *= 1.0 - 0.5 * positions / sentence_counts[doc_index]
+    
+    results = []
+    for doc in range(len(texts)):
+        start, end = doc_offsets[doc], doc_offsets[doc + 1]
+        order = np.argsort(-scores[start:end], kind='stable')[:num_phrases]
+        results.append([processed_sentences[start + i] for i in order])
+    
+    return results
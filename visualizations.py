@@ -1,9 +1,9 @@
-import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+from data_manager import count_by, count_skills, match_score_trend
 
 def plot_match_score_radar(match_data):
     """
@@ -129,25 +129,26 @@ def plot_skill_distribution(employees=None):
     Create a bar chart showing the distribution of skills across employees
     
     Parameters:
-    - employees: DataFrame of employees (default: all employees in session state)
+    - employees: DataFrame of employees (default: all employees, counted in the database)
     
     Returns:
     - Plotly figure
     """
-    if employees is None:
-        employees = st.session_state.employees
-    
     # Extract all skills and count occurrences
-    skill_counts = {}
-    
-    for _, employee in employees.iterrows():
-        skills = employee.get('skills', [])
-        
-        if not isinstance(skills, list):
-            skills = [] if pd.isna(skills) else [skills]
+    if employees is None:
+        # Aggregated in the database from the employee_skill table
+        skill_counts = count_skills().to_dict()
+    else:
+        skill_counts = {}
         
-        for skill in skills:
-            skill_counts[skill] = skill_counts.get(skill, 0) + 1
+        for _, employee in employees.iterrows():
+            skills = employee.get('skills', [])
+            
+            if not isinstance(skills, list):
+                skills = [] if pd.isna(skills) else [skills]
+            
+            for skill in skills:
+                skill_counts[skill] = skill_counts.get(skill, 0) + 1
     
     # Convert to DataFrame for plotting
     skill_df = pd.DataFrame({
@@ -180,16 +181,17 @@ def plot_department_distribution(employees=None):
     Create a pie chart showing the distribution of employees across departments
     
     Parameters:
-    - employees: DataFrame of employees (default: all employees in session state)
+    - employees: DataFrame of employees (default: all employees, counted in the database)
     
     Returns:
     - Plotly figure
     """
-    if employees is None:
-        employees = st.session_state.employees
-    
     # Count employees by department
-    dept_counts = employees['department'].value_counts().reset_index()
+    if employees is None:
+        dept_counts = count_by('employees', 'department').reset_index()
+    else:
+        # Categorical columns also count departments with no rows in this subset
+        dept_counts = employees['department'].value_counts().loc[lambda counts: counts > 0].reset_index()
     dept_counts.columns = ['Department', 'Count']
     
     # Create pie chart
@@ -283,19 +285,20 @@ def plot_hiring_needs_forecast(roles=None):
     and current employee matches
     
     Parameters:
-    - roles: DataFrame of roles (default: all roles in session state)
+    - roles: DataFrame of roles (default: all roles, counted in the database)
     
     Returns:
     - Plotly figure
     """
-    if roles is None:
-        roles = st.session_state.roles
-    
     # This is a simple model that assumes each role needs to be filled
     # In a real application, you would use more sophisticated forecasting
     
     # Count roles by department
-    dept_counts = roles['department'].value_counts().reset_index()
+    if roles is None:
+        dept_counts = count_by('roles', 'department').reset_index()
+    else:
+        # Categorical columns also count departments with no rows in this subset
+        dept_counts = roles['department'].value_counts().loc[lambda counts: counts > 0].reset_index()
     dept_counts.columns = ['Department', 'Open Positions']
     
     # Create bar chart
@@ -312,35 +315,31 @@ def plot_hiring_needs_forecast(roles=None):
     
     return fig
 
-def plot_match_history_trend(matches=None):
+def plot_match_history_trend(matches=None, period='day', scope='all', scope_id=None):
     """
     Create a line chart showing match scores over time
     
     Parameters:
-    - matches: DataFrame of matches (default: all matches in session state)
+    - matches: DataFrame of raw matches to plot (default: the stored score trend,
+      served from match rollups plus the matches still retained)
+    - period: 'day' or 'month' (stored trend only)
+    - scope: 'all', 'role' or 'department' (stored trend only)
+    - scope_id: Role ID or department to plot (stored trend only)
     
     Returns:
     - Plotly figure
     """
     if matches is None:
-        matches = st.session_state.matches
+        return plot_match_score_trend(match_score_trend(period, scope, scope_id))
     
     # If no matches, create an empty figure with a message
     if len(matches) == 0:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="No match history available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=20)
-        )
-        fig.update_layout(title="Match Score Trend")
-        return fig
+        return _empty_trend_figure()
     
     # Convert match_date to datetime if not already
     if 'match_date' in matches.columns:
-        matches['match_date'] = pd.to_datetime(matches['match_date'])
+        # Shared snapshots are read-only, so convert on a new frame
+        matches = matches.assign(match_date=pd.to_datetime(matches['match_date']))
         
         # Sort by date
         matches = matches.sort_values('match_date')
@@ -379,3 +378,63 @@ def plot_match_history_trend(matches=None):
         )
     
     return fig
+
+def _empty_trend_figure():
+    """Figure shown when there is no match history"""
+    fig = go.Figure()
+    fig.add_annotation(
+        text="No match history available",
+        xref="paper", yref="paper",
+        x=0.5, y=0.5,
+        showarrow=False,
+        font=dict(size=20)
+    )
+    fig.update_layout(title="Match Score Trend")
+    return fig
+
+def plot_match_score_trend(trend):
+    """
+    Create a line chart of the mean match score per period with the interquartile range
+    
+    Parameters:
+    - trend: DataFrame returned by match_score_trend
+    
+    Returns:
+    - Plotly figure
+    """
+    if len(trend) == 0:
+        return _empty_trend_figure()
+    
+    fig = go.Figure()
+    for scope_id, series in trend.groupby('scope_id', sort=False):
+        name = scope_id or "All matches"
+        
+        # Shaded band between the 25th and 75th percentiles
+        fig.add_trace(go.Scatter(
+            x=pd.concat([series['period_start'], series['period_start'][::-1]]),
+            y=pd.concat([series['p75'], series['p25'][::-1]]),
+            fill='toself',
+            opacity=0.2,
+            line=dict(width=0),
+            hoverinfo='skip',
+            showlegend=False,
+            name=name
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=series['period_start'],
+            y=series['mean'],
+            mode='lines+markers',
+            name=name,
+            customdata=series[['match_count', 'p50']],
+            hovertemplate="%{x}<br>Mean: %{y:.2f}<br>Median: %{customdata[1]:.2f}"
+                          "<br>Matches: %{customdata[0]}<extra></extra>"
+        ))
+    
+    fig.update_layout(
+        title="Match Score Trend Over Time",
+        xaxis_title="Date",
+        yaxis_title="Match Score"
+    )
+    
+    return fig
@@ -0,0 +1,305 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Queue location and worker behaviour (overridable through environment variables)
+WRITE_QUEUE_DIR = os.environ.get('WRITE_QUEUE_DIR', '.')
+WRITE_QUEUE_BATCH_SIZE = int(os.environ.get('WRITE_QUEUE_BATCH_SIZE', 200))
+WRITE_QUEUE_MAX_ATTEMPTS = int(os.environ.get('WRITE_QUEUE_MAX_ATTEMPTS', 8))
+WRITE_QUEUE_RETRY_SECONDS = float(os.environ.get('WRITE_QUEUE_RETRY_SECONDS', 1))
+WRITE_QUEUE_MAX_RETRY_SECONDS = float(os.environ.get('WRITE_QUEUE_MAX_RETRY_SECONDS', 60))
+WRITE_QUEUE_LEASE_SECONDS = float(os.environ.get('WRITE_QUEUE_LEASE_SECONDS', 300))
+
+
+def _encode(value):
+    """JSON fallback for values found in write payloads (dates and numpy scalars)"""
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'__date__': value.isoformat()}
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot queue value of type {type(value).__name__}")
+
+
+def _decode(obj):
+    """Restore the values tagged by _encode"""
+    if '__datetime__' in obj:
+        return datetime.datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return datetime.date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def coalesce(writes):
+    """
+    Merge queued writes to the same record, keeping the order of first appearance
+
+    An 'add' is a full upsert and replaces whatever came before it; an
+    'update' only changes the fields it carries, so it is merged into the
+    previous write (an add followed by updates stays an add).
+
+    Parameters:
+    - writes: List of (seq, data_type, operation, record_id, payload) tuples in queue order
+
+    Returns:
+    - List of (seqs, data_type, operation, record_id, payload) tuples
+    """
+    merged = {}
+    for seq, data_type, operation, record_id, payload in writes:
+        key = (data_type, record_id)
+        if key in merged and operation == 'update':
+            seqs, _, previous_operation, _, previous_payload = merged[key]
+            merged[key] = (seqs + [seq], data_type, previous_operation, record_id, {**previous_payload, **payload})
+        elif key in merged:
+            merged[key] = (merged[key][0] + [seq], data_type, operation, record_id, payload)
+        else:
+            merged[key] = ([seq], data_type, operation, record_id, payload)
+    return list(merged.values())
+
+
+class WriteQueue:
+    """
+    Durable write-behind queue: writes are stored in a local SQLite file and
+    applied to the database by a background worker
+
+    The worker takes up to batch_size queued writes, coalesces those that
+    touch the same record and hands them to apply in one call (one
+    transaction). If the batch fails each write is retried on its own with
+    exponential backoff, and after max_attempts it is marked failed and kept
+    for inspection. Later writes to a record wait while an earlier one is
+    backing off or failed, so each record's writes land in order. Writes left
+    in the file by a previous process are applied on start-up.
+
+    Several processes may share one queue file: a worker claims its batch
+    in a single UPDATE that leases the writes for lease_seconds, so no two
+    workers apply the same writes, and writes leased by a worker that died
+    are picked up again once the lease runs out.
+    """
+
+    def __init__(self, apply, path, batch_size=WRITE_QUEUE_BATCH_SIZE, max_attempts=WRITE_QUEUE_MAX_ATTEMPTS,
+                 retry_seconds=WRITE_QUEUE_RETRY_SECONDS, lease_seconds=WRITE_QUEUE_LEASE_SECONDS):
+        self.apply = apply
+        self.path = path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.lease_seconds = lease_seconds
+        self._owner = f'{os.getpid()}-{uuid.uuid4().hex}'
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._stopped = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending_writes ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "data_type TEXT NOT NULL, "
+            "operation TEXT NOT NULL, "
+            "record_id TEXT NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "enqueued_at REAL NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt REAL NOT NULL DEFAULT 0, "
+            "failed INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, "
+            "owner TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pending_writes)")}
+        if 'owner' not in columns:
+            self._conn.execute("ALTER TABLE pending_writes ADD COLUMN owner TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_pending_writes_record ON pending_writes (data_type, record_id, seq)"
+        )
+        self._conn.commit()
+        self._worker = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._worker.start()
+
+    def enqueue(self, data_type, operation, record_id, payload):
+        """
+        Store a write durably and wake the worker
+
+        Parameters:
+        - data_type: Table the write belongs to (e.g. 'employees')
+        - operation: 'add' (full upsert) or 'update' (partial)
+        - record_id: Key of the record written
+        - payload: JSON-serializable dictionary (dates and numpy scalars are allowed)
+
+        Returns:
+        - Sequence number of the write
+        """
+        text = json.dumps(payload, default=_encode)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO pending_writes (data_type, operation, record_id, payload, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (data_type, operation, str(record_id), text, time.time())
+            )
+            self._conn.commit()
+        self._wake.set()
+        return cursor.lastrowid
+
+    def is_pending(self, data_type, record_id):
+        """Return True if a write to the record is still queued"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM pending_writes WHERE data_type = ? AND record_id = ? LIMIT 1",
+                (data_type, str(record_id))
+            ).fetchone() is not None
+
+    def _next_batch(self):
+        """
+        Claim the writes that are due, skipping records with an earlier write
+        backing off, failed or claimed by another worker
+
+        A claim moves next_attempt past the lease, so the same UPDATE that
+        takes the writes hides them (and later writes to their records) from
+        every other worker until they are done, retried or the lease expires.
+        """
+        now = time.time()
+        lease = now + self.lease_seconds
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pending_writes SET owner = ?, next_attempt = ? WHERE seq IN ("
+                "SELECT seq FROM pending_writes p "
+                "WHERE failed = 0 AND next_attempt <= ? AND NOT EXISTS ("
+                "SELECT 1 FROM pending_writes q WHERE q.data_type = p.data_type "
+                "AND q.record_id = p.record_id AND q.seq < p.seq AND (q.failed = 1 OR q.next_attempt > ?)) "
+                "ORDER BY seq LIMIT ?)",
+                (self._owner, lease, now, now, self.batch_size)
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT seq, data_type, operation, record_id, payload FROM pending_writes "
+                "WHERE owner = ? AND next_attempt = ? ORDER BY seq",
+                (self._owner, lease)
+            ).fetchall()
+        return [(seq, data_type, operation, record_id, json.loads(payload, object_hook=_decode))
+                for seq, data_type, operation, record_id, payload in rows]
+
+    def _done(self, seqs):
+        """Remove applied writes and wake anyone waiting in flush"""
+        with self._lock:
+            self._conn.executemany("DELETE FROM pending_writes WHERE seq = ?", [(seq,) for seq in seqs])
+            self._conn.commit()
+            self._changed.notify_all()
+
+    def _failed(self, seqs, error):
+        """Schedule a retry with exponential backoff, or mark the writes failed after max_attempts"""
+        with self._lock:
+            for seq in seqs:
+                attempts = self._conn.execute(
+                    "SELECT attempts FROM pending_writes WHERE seq = ?", (seq,)
+                ).fetchone()[0] + 1
+                delay = min(self.retry_seconds * 2 ** (attempts - 1), WRITE_QUEUE_MAX_RETRY_SECONDS)
+                self._conn.execute(
+                    "UPDATE pending_writes SET attempts = ?, next_attempt = ?, failed = ?, last_error = ?, "
+                    "owner = NULL WHERE seq = ?",
+                    (attempts, time.time() + delay, int(attempts >= self.max_attempts), str(error), seq)
+                )
+            self._conn.commit()
+            self._changed.notify_all()
+
+    def _process(self):
+        """Apply one batch; returns the number of writes taken from the queue"""
+        writes = self._next_batch()
+        if not writes:
+            return 0
+
+        merged = coalesce(writes)
+        try:
+            self.apply([write[1:] for write in merged])
+            self._done([seq for write in merged for seq in write[0]])
+        except Exception:
+            # Isolate the failing writes so the rest of the batch still lands
+            for write in merged:
+                try:
+                    self.apply([write[1:]])
+                    self._done(write[0])
+                except Exception as e:
+                    self._failed(write[0], e)
+        return len(writes)
+
+    def _run(self):
+        """Worker loop: drain the queue, then sleep until woken or a retry is due"""
+        while not self._stopped:
+            self._wake.clear()
+            try:
+                if self._process():
+                    continue
+            except Exception:
+                # Never let the worker die (e.g. the queue file is locked); try again shortly
+                time.sleep(self.retry_seconds)
+            self._wake.wait(timeout=self.retry_seconds)
+
+    def flush(self, timeout=None):
+        """
+        Barrier: wait until every write enqueued so far has been applied
+
+        Parameters:
+        - timeout: Maximum number of seconds to wait (None waits indefinitely)
+
+        Returns:
+        - True if all of them were committed, False on timeout or if some failed for good
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            barrier = self._conn.execute("SELECT MAX(seq) FROM pending_writes").fetchone()[0]
+            if barrier is None:
+                return True
+            while True:
+                # Writes queued behind a failed write to the same record cannot land either
+                waiting, failed = self._conn.execute(
+                    "SELECT SUM(failed = 0 AND NOT blocked), SUM(failed = 1 OR blocked) FROM ("
+                    "SELECT failed, EXISTS (SELECT 1 FROM pending_writes q WHERE q.data_type = p.data_type "
+                    "AND q.record_id = p.record_id AND q.seq < p.seq AND q.failed = 1) AS blocked "
+                    "FROM pending_writes p WHERE seq <= ?)", (barrier,)
+                ).fetchone()
+                if not waiting:
+                    return not failed
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._wake.set()
+                self._changed.wait(timeout=remaining if remaining is not None else 1.0)
+
+    def status(self):
+        """Return queue statistics: pending and failed (or blocked) writes, age of the oldest and the last error"""
+        with self._lock:
+            pending, failed, oldest = self._conn.execute(
+                "SELECT SUM(failed = 0 AND NOT blocked), SUM(failed = 1 OR blocked), MIN(enqueued_at) FROM ("
+                "SELECT failed, enqueued_at, EXISTS (SELECT 1 FROM pending_writes q WHERE q.data_type = p.data_type "
+                "AND q.record_id = p.record_id AND q.seq < p.seq AND q.failed = 1) AS blocked "
+                "FROM pending_writes p)"
+            ).fetchone()
+            last_error = self._conn.execute(
+                "SELECT last_error FROM pending_writes WHERE last_error IS NOT NULL ORDER BY seq DESC LIMIT 1"
+            ).fetchone()
+        return {
+            'pending': pending or 0,
+            'failed': failed or 0,
+            'oldest_age': time.time() - oldest if oldest else 0.0,
+            'last_error': last_error[0] if last_error else None
+        }
+
+    def retry_failed(self):
+        """Put writes that failed for good back in the queue"""
+        with self._lock:
+            self._conn.execute("UPDATE pending_writes SET failed = 0, attempts = 0, next_attempt = 0 WHERE failed = 1")
+            self._conn.commit()
+        self._wake.set()
+
+    def stop(self, flush=True, timeout=None):
+        """Stop the worker, by default after applying what is queued"""
+        if flush:
+            self.flush(timeout)
+        self._stopped = True
+        self._wake.set()
+        self._worker.join(timeout)